@@ -0,0 +1,88 @@
+"""
+Runtime admin endpoints for the products subgraph
+Small JSON GET/PUT resources used to adjust chaos and telemetry settings without a restart
+"""
+import hmac
+import json
+import os
+from typing import Any, Callable, Dict, Mapping, Optional
+
+from response_cache import read_body
+
+
+class AdminEndpoint:
+    """
+    ASGI app exposing one runtime setting as JSON.
+
+    - GET returns the current configuration
+    - PUT/POST applies a (partial) configuration and returns the result
+
+    Requests must send `Authorization: Bearer <token>`. Without a configured token
+    the endpoint answers 404: it shares the public port with /graphql, so it is
+    never left open unauthenticated.
+    """
+
+    def __init__(
+        self,
+        get_config: Callable[[], Dict[str, Any]],
+        update_config: Callable[[Mapping[str, Any]], Dict[str, Any]],
+        token: Optional[str] = None,
+    ):
+        """
+        Args:
+            get_config: Returns the current configuration
+            update_config: Applies a configuration and returns the result;
+                raises ValueError/TypeError for invalid input
+            token: Bearer token required for access (default: PRODUCTS_ADMIN_TOKEN;
+                empty = endpoint disabled)
+        """
+        self.get_config = get_config
+        self.update_config = update_config
+        self.token = token if token is not None else os.getenv("PRODUCTS_ADMIN_TOKEN", "")
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return
+
+        if not self.token:
+            await _send_json(send, 404, {"error": "not found"})
+            return
+        if not self._authorized(scope):
+            await _send_json(send, 401, {"error": "unauthorized"})
+            return
+
+        method = scope["method"]
+        if method == "GET":
+            await _send_json(send, 200, self.get_config())
+            return
+        if method not in ("PUT", "POST"):
+            await _send_json(send, 405, {"error": "method not allowed"})
+            return
+
+        try:
+            config = json.loads(await read_body(receive))
+            result = self.update_config(config)
+        except (ValueError, TypeError) as e:
+            await _send_json(send, 400, {"error": str(e)})
+            return
+        await _send_json(send, 200, result)
+
+    def _authorized(self, scope) -> bool:
+        expected = f"Bearer {self.token}".encode()
+        for name, value in scope.get("headers", []):
+            if name == b"authorization":
+                return hmac.compare_digest(value, expected)
+        return False
+
+
+async def _send_json(send, status: int, payload: Any) -> None:
+    body = json.dumps(payload).encode()
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,598 @@
+"""
+Pluggable product data backends for the products subgraph
+- InMemoryBackend: serves the indexed Catalog (default)
+- SQLiteBackend: local SQLite file, queried from a bounded pool of connections in worker threads
+- PostgresBackend: PostgreSQL through an asyncpg connection pool (optional dependency)
+
+All backends expose the same async interface so resolvers never block the event loop.
+"""
+import asyncio
+import json
+import os
+import sqlite3
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Iterable, List, Mapping, Optional, Sequence
+
+from catalog import Catalog, ProductRecord
+from tracing import child_span
+
+# Column order shared by every SQL query; matches ProductRecord's constructor
+PRODUCT_COLUMNS = "id, name, price, description, category, in_stock, rank"
+
+
+class ProductBackend:
+    """Async interface every product data source implements."""
+
+    name = "base"
+
+    def __init__(self):
+        self._change_listeners: List[Callable[[], None]] = []
+
+    def add_change_listener(self, callback: Callable[[], None]) -> None:
+        """
+        Register a callback invoked whenever the served product data changes.
+        Used to invalidate caches derived from the catalog.
+        """
+        self._change_listeners.append(callback)
+
+    def _notify_change(self) -> None:
+        for callback in self._change_listeners:
+            callback()
+
+    def snapshot(self) -> "ProductBackend":
+        """
+        Return a view of the backend to use for one request.
+        Backends whose data can be swapped at runtime pin the current version,
+        so every read of the request sees the same data.
+        """
+        return self
+
+    def product_count(self) -> Optional[int]:
+        """
+        Return the number of products served, for query cost estimates (None if not known yet).
+        Never blocks: backends that need a query to count return their last known count.
+        """
+        return None
+
+    async def get(self, id: str) -> Optional[ProductRecord]:
+        """Get a single product by id, or None."""
+        return (await self.get_many([id]))[0]
+
+    async def get_many(self, ids: Sequence[str]) -> List[Optional[ProductRecord]]:
+        """
+        Get several products in one round trip.
+
+        Args:
+            ids: Product identifiers (unique ids recommended, e.g. from a DataLoader)
+
+        Returns:
+            Records aligned with `ids`, with None for unknown ids
+        """
+        raise NotImplementedError
+
+    async def all(self) -> Sequence[ProductRecord]:
+        """Get every product in catalog order."""
+        raise NotImplementedError
+
+    async def top(self, limit: int) -> Sequence[ProductRecord]:
+        """Get the first `limit` products of the "top" ordering."""
+        raise NotImplementedError
+
+    async def page(self, offset: int, limit: int) -> Sequence[ProductRecord]:
+        """Get up to `limit` products starting at catalog position `offset`."""
+        raise NotImplementedError
+
+    async def by_category(self, category: str) -> Sequence[ProductRecord]:
+        """Get all products in a category, in catalog order."""
+        raise NotImplementedError
+
+    async def category_page(
+        self, category: str, in_stock: Optional[bool], offset: int, limit: int
+    ) -> Sequence[ProductRecord]:
+        """Get up to `limit` products of a category (optionally by stock status) from position `offset`."""
+        raise NotImplementedError
+
+    async def stock_page(self, in_stock: bool, offset: int, limit: int) -> Sequence[ProductRecord]:
+        """Get up to `limit` products with the given stock status from position `offset`."""
+        raise NotImplementedError
+
+    async def price_range(
+        self,
+        minimum: Optional[float],
+        maximum: Optional[float],
+        in_stock: Optional[bool],
+        offset: int,
+        limit: int,
+    ) -> Sequence[ProductRecord]:
+        """Get up to `limit` products priced within [minimum, maximum], cheapest first, from position `offset`."""
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        """Release any pooled resources."""
+
+
+class InMemoryBackend(ProductBackend):
+    """Backend serving an in-process, pre-indexed Catalog."""
+
+    name = "memory"
+
+    def __init__(self, catalog: Catalog):
+        super().__init__()
+        self.catalog = catalog
+
+    def replace(self, catalog: Catalog) -> None:
+        """Swap in a new catalog and notify change listeners."""
+        self.catalog = catalog
+        self._notify_change()
+
+    def snapshot(self) -> "InMemoryBackend":
+        """Return a backend bound to the current catalog; later `replace` calls do not affect it."""
+        return InMemoryBackend(self.catalog)
+
+    def product_count(self) -> Optional[int]:
+        return len(self.catalog)
+
+    async def get(self, id: str) -> Optional[ProductRecord]:
+        return self.catalog.get(id)
+
+    async def get_many(self, ids: Sequence[str]) -> List[Optional[ProductRecord]]:
+        return self.catalog.get_many(ids)
+
+    async def all(self) -> Sequence[ProductRecord]:
+        return self.catalog.all()
+
+    async def top(self, limit: int) -> Sequence[ProductRecord]:
+        return self.catalog.top(limit)
+
+    async def page(self, offset: int, limit: int) -> Sequence[ProductRecord]:
+        return self.catalog.page(offset, limit)
+
+    async def by_category(self, category: str) -> Sequence[ProductRecord]:
+        return self.catalog.by_category(category)
+
+    async def category_page(
+        self, category: str, in_stock: Optional[bool], offset: int, limit: int
+    ) -> Sequence[ProductRecord]:
+        return self.catalog.category_page(category, offset, limit, in_stock)
+
+    async def stock_page(self, in_stock: bool, offset: int, limit: int) -> Sequence[ProductRecord]:
+        return self.catalog.stock_page(in_stock, offset, limit)
+
+    async def price_range(
+        self,
+        minimum: Optional[float],
+        maximum: Optional[float],
+        in_stock: Optional[bool],
+        offset: int,
+        limit: int,
+    ) -> Sequence[ProductRecord]:
+        return self.catalog.price_range(minimum, maximum, offset, limit, in_stock)
+
+
+class SQLBackend(ProductBackend):
+    """
+    Shared query logic for SQL backends.
+
+    Subclasses provide the dialect-specific statements in `SQL` and implement
+    `_fetch(statement, *params)` returning rows in PRODUCT_COLUMNS order.
+    Statement texts are constant, so each one is prepared once per pooled
+    connection and reused; entity batches use a single bulk statement
+    regardless of batch size.
+    """
+
+    db_system = "sql"
+    SQL: Mapping[str, str] = {}
+    # Positions are dense from 0 (see _seed_rows), so this is an index lookup, not a table scan
+    COUNT_SQL = "SELECT COALESCE(MAX(position) + 1, 0) FROM products"
+    # Seconds a product count is reused before product_count() refreshes it
+    COUNT_TTL = 30.0
+
+    def __init__(self):
+        super().__init__()
+        self._span_names = {operation: f"db.query.{operation}" for operation in self.SQL}
+        self._count: Optional[int] = None
+        self._count_checked = float("-inf")
+        self._count_task: Optional[asyncio.Task] = None
+
+    def product_count(self) -> Optional[int]:
+        # Return the cached count and refresh it in the background once it is stale
+        now = time.monotonic()
+        if now - self._count_checked >= self.COUNT_TTL and (self._count_task is None or self._count_task.done()):
+            try:
+                self._count_task = asyncio.get_running_loop().create_task(self._refresh_count())
+                self._count_checked = now
+            except RuntimeError:
+                pass  # No running event loop (e.g. at import time)
+        return self._count
+
+    async def _refresh_count(self) -> None:
+        try:
+            rows = await self._fetch(self.COUNT_SQL)
+        except Exception as e:
+            print(f"⚠️  Could not count products in the {self.name} backend: {e}")
+            return
+        self._count = int(rows[0][0])
+
+    async def _fetch(self, statement: str, *params: Any) -> List[Sequence[Any]]:
+        raise NotImplementedError
+
+    async def _query(self, operation: str, *params: Any) -> List[ProductRecord]:
+        statement = self.SQL[operation]
+        with child_span(self._span_names[operation]) as span:
+            recording = span.is_recording()
+            if recording:
+                span.set_attribute("db.system", self.db_system)
+                span.set_attribute("db.operation", "SELECT")
+                span.set_attribute("db.statement", statement)
+            rows = await self._fetch(statement, *params)
+            if recording:
+                span.set_attribute("db.rows", len(rows))
+        return [_record_from_row(row) for row in rows]
+
+    async def get_many(self, ids: Sequence[str]) -> List[Optional[ProductRecord]]:
+        if not ids:
+            return []
+        records = await self._query("get_many", *self._ids_param(ids))
+        by_id = {record.id: record for record in records}
+        return [by_id.get(id) for id in ids]
+
+    async def all(self) -> Sequence[ProductRecord]:
+        return await self._query("all")
+
+    async def top(self, limit: int) -> Sequence[ProductRecord]:
+        if limit <= 0:
+            return []
+        return await self._query("top", limit)
+
+    async def page(self, offset: int, limit: int) -> Sequence[ProductRecord]:
+        if limit <= 0:
+            return []
+        return await self._query("page", offset, limit)
+
+    async def by_category(self, category: str) -> Sequence[ProductRecord]:
+        return await self._query("by_category", category)
+
+    async def category_page(
+        self, category: str, in_stock: Optional[bool], offset: int, limit: int
+    ) -> Sequence[ProductRecord]:
+        if limit <= 0:
+            return []
+        if in_stock is None:
+            return await self._query("category_page", category, limit, offset)
+        return await self._query("category_stock_page", category, in_stock, limit, offset)
+
+    async def stock_page(self, in_stock: bool, offset: int, limit: int) -> Sequence[ProductRecord]:
+        if limit <= 0:
+            return []
+        return await self._query("stock_page", in_stock, limit, offset)
+
+    async def price_range(
+        self,
+        minimum: Optional[float],
+        maximum: Optional[float],
+        in_stock: Optional[bool],
+        offset: int,
+        limit: int,
+    ) -> Sequence[ProductRecord]:
+        if limit <= 0:
+            return []
+        # Open bounds become infinite ones so the statement text stays constant
+        minimum = float("-inf") if minimum is None else minimum
+        maximum = float("inf") if maximum is None else maximum
+        if in_stock is None:
+            return await self._query("price_range", minimum, maximum, limit, offset)
+        return await self._query("price_stock_range", in_stock, minimum, maximum, limit, offset)
+
+    def _ids_param(self, ids: Sequence[str]) -> Sequence[Any]:
+        """Encode the id list as the bulk-fetch statement's parameters."""
+        return (list(ids),)
+
+
+def _record_from_row(row: Sequence[Any]) -> ProductRecord:
+    id, name, price, description, category, in_stock, rank = row
+    return ProductRecord(
+        id=str(id),
+        name=name,
+        price=float(price),
+        description=description,
+        category=category,
+        in_stock=bool(in_stock),
+        rank=rank,
+    )
+
+
+class SQLiteBackend(SQLBackend):
+    """
+    SQLite backend for local development, tests and realistic catalog sizes.
+
+    sqlite3 is blocking, so queries run in worker threads through a bounded
+    pool of connections; at most `pool_size` queries are in flight at once
+    and the event loop never waits on disk I/O.
+    """
+
+    name = "sqlite"
+    db_system = "sqlite"
+    SQL = {
+        # json_each() expands a JSON array parameter, the SQLite equivalent of `= ANY($1)`
+        "get_many": f"SELECT {PRODUCT_COLUMNS} FROM products WHERE id IN (SELECT value FROM json_each(?))",
+        "all": f"SELECT {PRODUCT_COLUMNS} FROM products ORDER BY position",
+        "top": f"SELECT {PRODUCT_COLUMNS} FROM products ORDER BY rank IS NULL, rank, position LIMIT ?",
+        "page": f"SELECT {PRODUCT_COLUMNS} FROM products WHERE position >= ? ORDER BY position LIMIT ?",
+        "by_category": f"SELECT {PRODUCT_COLUMNS} FROM products WHERE category = ? ORDER BY position",
+        # Filtered pages walk the (filter, position) and (filter, price, position) indexes
+        "category_page": (
+            f"SELECT {PRODUCT_COLUMNS} FROM products WHERE category = ? ORDER BY position LIMIT ? OFFSET ?"
+        ),
+        "category_stock_page": (
+            f"SELECT {PRODUCT_COLUMNS} FROM products WHERE category = ? AND in_stock = ?"
+            " ORDER BY position LIMIT ? OFFSET ?"
+        ),
+        "stock_page": f"SELECT {PRODUCT_COLUMNS} FROM products WHERE in_stock = ? ORDER BY position LIMIT ? OFFSET ?",
+        "price_range": (
+            f"SELECT {PRODUCT_COLUMNS} FROM products WHERE price BETWEEN ? AND ?"
+            " ORDER BY price, position LIMIT ? OFFSET ?"
+        ),
+        "price_stock_range": (
+            f"SELECT {PRODUCT_COLUMNS} FROM products WHERE in_stock = ? AND price BETWEEN ? AND ?"
+            " ORDER BY price, position LIMIT ? OFFSET ?"
+        ),
+    }
+
+    def __init__(self, path: str, pool_size: int = 4):
+        """
+        Args:
+            path: SQLite database file (created by `seed_sqlite`)
+            pool_size: Maximum number of open connections / concurrent queries
+        """
+        super().__init__()
+        self.path = path
+        self.pool_size = pool_size
+        self._pool: "asyncio.Queue[sqlite3.Connection]" = asyncio.Queue(maxsize=pool_size)
+        self._opened = 0
+        self._closed = False
+
+    def _connect(self) -> sqlite3.Connection:
+        # Connections move between worker threads but are only ever used by one at a time
+        conn = sqlite3.connect(
+            self.path, check_same_thread=False, cached_statements=len(self.SQL) * 4
+        )
+        conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    @asynccontextmanager
+    async def _connection(self) -> AsyncIterator[sqlite3.Connection]:
+        if self._closed:
+            raise RuntimeError("SQLite backend is closed")
+        if self._pool.empty() and self._opened < self.pool_size:
+            self._opened += 1
+            conn = await asyncio.to_thread(self._connect)
+        else:
+            conn = await self._pool.get()
+        try:
+            yield conn
+        finally:
+            if self._closed:
+                # Closed while this query ran: don't hand the connection out again
+                conn.close()
+            else:
+                self._pool.put_nowait(conn)
+
+    async def _fetch(self, statement: str, *params: Any) -> List[Sequence[Any]]:
+        async with self._connection() as conn:
+            return await asyncio.to_thread(
+                lambda: conn.execute(statement, params).fetchall()
+            )
+
+    def _ids_param(self, ids: Sequence[str]) -> Sequence[Any]:
+        return (json.dumps(list(ids)),)
+
+    async def close(self) -> None:
+        # Idle connections are closed now, in-flight ones when their query returns
+        self._closed = True
+        while not self._pool.empty():
+            self._pool.get_nowait().close()
+
+
+class PostgresBackend(SQLBackend):
+    """
+    PostgreSQL backend using an asyncpg connection pool.
+
+    asyncpg prepares and caches every statement per connection, and entity
+    batches are fetched with a single `WHERE id = ANY($1)` query.
+    """
+
+    name = "postgres"
+    db_system = "postgresql"
+    SQL = {
+        "get_many": f"SELECT {PRODUCT_COLUMNS} FROM products WHERE id = ANY($1::text[])",
+        "all": f"SELECT {PRODUCT_COLUMNS} FROM products ORDER BY position",
+        "top": f"SELECT {PRODUCT_COLUMNS} FROM products ORDER BY rank IS NULL, rank, position LIMIT $1",
+        "page": f"SELECT {PRODUCT_COLUMNS} FROM products WHERE position >= $1 ORDER BY position LIMIT $2",
+        "by_category": f"SELECT {PRODUCT_COLUMNS} FROM products WHERE category = $1 ORDER BY position",
+        "category_page": (
+            f"SELECT {PRODUCT_COLUMNS} FROM products WHERE category = $1 ORDER BY position LIMIT $2 OFFSET $3"
+        ),
+        "category_stock_page": (
+            f"SELECT {PRODUCT_COLUMNS} FROM products WHERE category = $1 AND in_stock = $2"
+            " ORDER BY position LIMIT $3 OFFSET $4"
+        ),
+        "stock_page": (
+            f"SELECT {PRODUCT_COLUMNS} FROM products WHERE in_stock = $1 ORDER BY position LIMIT $2 OFFSET $3"
+        ),
+        "price_range": (
+            f"SELECT {PRODUCT_COLUMNS} FROM products WHERE price BETWEEN $1 AND $2"
+            " ORDER BY price, position LIMIT $3 OFFSET $4"
+        ),
+        "price_stock_range": (
+            f"SELECT {PRODUCT_COLUMNS} FROM products WHERE in_stock = $1 AND price BETWEEN $2 AND $3"
+            " ORDER BY price, position LIMIT $4 OFFSET $5"
+        ),
+    }
+
+    def __init__(self, dsn: str, pool_size: int = 10):
+        """
+        Args:
+            dsn: PostgreSQL connection string (products table as in POSTGRES_SCHEMA, see `seed_postgres`)
+            pool_size: Maximum number of pooled connections
+        """
+        super().__init__()
+        self.dsn = dsn
+        self.pool_size = pool_size
+        self._pool = None
+        self._pool_lock = asyncio.Lock()
+
+    async def _get_pool(self):
+        if self._pool is None:
+            async with self._pool_lock:
+                if self._pool is None:
+                    try:
+                        import asyncpg
+                    except ImportError as e:
+                        raise RuntimeError(
+                            "PRODUCTS_BACKEND=postgres requires the asyncpg package"
+                        ) from e
+                    self._pool = await asyncpg.create_pool(
+                        self.dsn, min_size=1, max_size=self.pool_size, timeout=2
+                    )
+        return self._pool
+
+    async def _fetch(self, statement: str, *params: Any) -> List[Sequence[Any]]:
+        pool = await self._get_pool()
+        return await pool.fetch(statement, *params)
+
+    async def close(self) -> None:
+        if self._pool is not None:
+            await self._pool.close()
+            self._pool = None
+
+
+# Indexes shared by both SQL schemas. Filtered pages walk the (filter, position) and
+# (filter, price, position) indexes; position is dense from 0 and unique
+PRODUCT_INDEXES = (
+    "CREATE INDEX idx_products_category ON products(category, position)",
+    "CREATE INDEX idx_products_category_stock ON products(category, in_stock, position)",
+    "CREATE INDEX idx_products_stock ON products(in_stock, position)",
+    "CREATE INDEX idx_products_price ON products(price, position)",
+    "CREATE INDEX idx_products_stock_price ON products(in_stock, price, position)",
+    "CREATE INDEX idx_products_rank ON products(rank, position)",
+    "CREATE UNIQUE INDEX idx_products_position ON products(position)",
+)
+
+SQLITE_SCHEMA = """
+DROP TABLE IF EXISTS products;
+CREATE TABLE products (
+  id TEXT PRIMARY KEY,
+  name TEXT NOT NULL,
+  price REAL NOT NULL,
+  description TEXT,
+  category TEXT,
+  in_stock INTEGER NOT NULL DEFAULT 0,
+  rank REAL,
+  position INTEGER NOT NULL
+);
+""" + "".join(f"{index};\n" for index in PRODUCT_INDEXES)
+
+# Schema expected by PostgresBackend (created by `seed_postgres`)
+POSTGRES_SCHEMA = """
+DROP TABLE IF EXISTS products;
+CREATE TABLE products (
+  id TEXT PRIMARY KEY,
+  name TEXT NOT NULL,
+  price DOUBLE PRECISION NOT NULL,
+  description TEXT,
+  category TEXT,
+  in_stock BOOLEAN NOT NULL DEFAULT FALSE,
+  rank DOUBLE PRECISION,
+  position INTEGER NOT NULL
+);
+""" + "".join(f"{index};\n" for index in PRODUCT_INDEXES)
+
+
+def _seed_rows(records: Iterable[Mapping]) -> List[tuple]:
+    # Rows in table column order, positioned in catalog order
+    return [
+        (r.id, r.name, r.price, r.description, r.category, r.in_stock, r.rank, position)
+        for position, r in enumerate(Catalog(records).all())
+    ]
+
+
+def seed_sqlite(path: str, records: Iterable[Mapping]) -> int:
+    """
+    Create (or replace) the products table in a SQLite file and load records into it.
+
+    Args:
+        path: SQLite database file
+        records: Product dicts in PRODUCTS_DATA format
+
+    Returns:
+        Number of rows written
+    """
+    rows = _seed_rows(records)
+    with sqlite3.connect(path) as conn:
+        conn.executescript(SQLITE_SCHEMA)
+        conn.executemany("INSERT INTO products VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+    return len(rows)
+
+
+async def seed_postgres(dsn: str, records: Iterable[Mapping]) -> int:
+    """
+    Create (or replace) the products table in a PostgreSQL database and load records into it.
+
+    Args:
+        dsn: PostgreSQL connection string
+        records: Product dicts in PRODUCTS_DATA format
+
+    Returns:
+        Number of rows written
+    """
+    import asyncpg
+
+    rows = _seed_rows(records)
+    conn = await asyncpg.connect(dsn)
+    try:
+        async with conn.transaction():
+            await conn.execute(POSTGRES_SCHEMA)
+            await conn.copy_records_to_table(
+                "products",
+                records=rows,
+                columns=["id", "name", "price", "description", "category", "in_stock", "rank", "position"],
+            )
+    finally:
+        await conn.close()
+    return len(rows)
+
+
+def create_backend(catalog: Catalog) -> ProductBackend:
+    """
+    Create the product backend selected by PRODUCTS_BACKEND.
+
+    Environment variables:
+        PRODUCTS_BACKEND: "memory" (default), "sqlite" or "postgres"
+        PRODUCTS_SQLITE_PATH: SQLite file for the sqlite backend (default: products.db)
+        PRODUCTS_DATABASE_URL: PostgreSQL DSN for the postgres backend
+        PRODUCTS_DB_POOL_SIZE: Connection pool size for SQL backends
+
+    Args:
+        catalog: In-memory catalog served by the memory backend
+
+    Returns:
+        The configured backend
+    """
+    kind = os.getenv("PRODUCTS_BACKEND", "memory").lower()
+    pool_size = os.getenv("PRODUCTS_DB_POOL_SIZE")
+
+    if kind == "sqlite":
+        return SQLiteBackend(
+            os.getenv("PRODUCTS_SQLITE_PATH", "products.db"),
+            pool_size=int(pool_size or 4),
+        )
+    if kind == "postgres":
+        dsn = os.getenv("PRODUCTS_DATABASE_URL")
+        if not dsn:
+            raise RuntimeError("PRODUCTS_BACKEND=postgres requires PRODUCTS_DATABASE_URL")
+        return PostgresBackend(dsn, pool_size=int(pool_size or 10))
+    if kind != "memory":
+        print(f"⚠️  Unknown PRODUCTS_BACKEND '{kind}', falling back to in-memory catalog")
+
+    return InMemoryBackend(catalog)
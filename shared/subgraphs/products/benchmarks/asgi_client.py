@@ -0,0 +1,75 @@
+"""
+Minimal in-process ASGI client for the products subgraph benchmarks
+Calls the ASGI app directly (no sockets, no extra dependencies)
+"""
+import json
+from typing import Dict, List, Optional, Tuple
+
+
+async def request(
+    app,
+    body: bytes,
+    path: str = "/graphql",
+    method: str = "POST",
+    headers: Optional[Dict[str, str]] = None,
+) -> Tuple[int, List[Tuple[bytes, bytes]], bytes]:
+    """
+    Send one HTTP request to an ASGI app.
+
+    Args:
+        app: ASGI application
+        body: Raw request body
+        path: Request path
+        method: HTTP method
+        headers: Extra request headers
+
+    Returns:
+        (status, response headers, response body)
+    """
+    raw_headers = [(b"content-type", b"application/json")]
+    raw_headers += [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()]
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": b"",
+        "root_path": "",
+        "headers": raw_headers,
+        "client": ("127.0.0.1", 50000),
+        "server": ("127.0.0.1", 4003),
+    }
+    body_sent = False
+
+    async def receive():
+        nonlocal body_sent
+        if not body_sent:
+            body_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return {"type": "http.disconnect"}
+
+    status = 0
+    response_headers: List[Tuple[bytes, bytes]] = []
+    chunks = []
+
+    async def send(message):
+        nonlocal status, response_headers
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            response_headers = list(message.get("headers", []))
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await app(scope, receive, send)
+    return status, response_headers, b"".join(chunks)
+
+
+async def post_graphql(app, query: str, variables: Optional[dict] = None, **kwargs):
+    """POST a GraphQL operation and return (status, headers, body)."""
+    payload = {"query": query}
+    if variables is not None:
+        payload["variables"] = variables
+    return await request(app, json.dumps(payload).encode(), **kwargs)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Per-request allocation benchmark for the `products` resolver
+
+Compares the old resolver body (building a fresh Strawberry Product per catalog
+entry on every request) with the current one (returning the catalog's shared,
+pre-built ProductRecord objects).
+
+Usage:
+    python benchmarks/bench_allocations.py [--size 50000] [--requests 20]
+"""
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from catalog import Catalog  # noqa: E402
+from main import Product  # noqa: E402
+from synthetic import make_products  # noqa: E402
+
+
+def rebuild_per_request(catalog: Catalog):
+    """Resolver body before pre-materialization: copy every record into a new Product."""
+    return [
+        Product(
+            id=p.id,
+            name=p.name,
+            price=p.price,
+            description=p.description,
+            category=p.category,
+            in_stock=p.in_stock,
+        )
+        for p in catalog.all()
+    ]
+
+
+def shared_records(catalog: Catalog):
+    """Current resolver body: hand out the catalog's immutable records."""
+    return catalog.all()
+
+
+def measure(fn, catalog: Catalog, requests: int) -> dict:
+    """Measure allocated bytes/blocks held by one request's result, plus timing."""
+    fn(catalog)  # warm up
+
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = fn(catalog)
+    after = tracemalloc.take_snapshot()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    diff = after.compare_to(before, "filename")
+    allocated = sum(stat.size_diff for stat in diff if stat.size_diff > 0)
+    blocks = sum(stat.count_diff for stat in diff if stat.count_diff > 0)
+    del result
+
+    start = time.perf_counter()
+    for _ in range(requests):
+        fn(catalog)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "allocated_bytes": allocated,
+        "allocated_blocks": blocks,
+        "peak_bytes": peak,
+        "mean_ms": elapsed / requests * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--size", type=int, default=50_000, help="catalog size")
+    parser.add_argument("--requests", type=int, default=20, help="timed requests per variant")
+    args = parser.parse_args()
+
+    catalog = Catalog(make_products(args.size))
+    results = {
+        "catalog_size": args.size,
+        "before": measure(rebuild_per_request, catalog, args.requests),
+        "after": measure(shared_records, catalog, args.requests),
+    }
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
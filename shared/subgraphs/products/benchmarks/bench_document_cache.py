@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Requests/sec with and without the parsed/validated document cache
+
+Runs the subgraph operations the router sends to the products subgraph for the
+vegeta `products.json` and `large.json` payloads through the Strawberry app
+in-process (response cache bypassed), once without and once with the
+ParserCache and ValidationCache extensions (see document_cache.py).
+
+Usage:
+    python benchmarks/bench_document_cache.py [--requests 2000]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from strawberry.federation import Schema  # noqa: E402
+
+import main  # noqa: E402
+from asgi_client import post_graphql  # noqa: E402
+from document_cache import DocumentCache  # noqa: E402
+
+# Products-subgraph fetches in the router's query plans for the vegeta payloads
+WORKLOADS = {
+    # vegeta/products.json: topProducts { name reviews { ... } }
+    "products.json": {
+        "query": "query Products0__products__0{topProducts{__typename id name}}",
+        "variables": None,
+    },
+    # vegeta/large.json: nested reviews -> product { name price } entity fetches
+    "large.json": {
+        "query": (
+            "query Large__products__2($representations:[_Any!]!)"
+            "{_entities(representations:$representations){...on Product{name price}}}"
+        ),
+        "variables": {
+            "representations": [
+                {"__typename": "Product", "id": str(i % 5 + 1)} for i in range(25)
+            ]
+        },
+    },
+}
+
+
+def build_app(with_cache: bool):
+    extensions = DocumentCache(512).extensions() if with_cache else []
+    schema = Schema(query=main.Query, enable_federation_2=True, extensions=extensions)
+    return main.ProductsGraphQL(schema)
+
+
+async def run(app, workload: dict, requests: int) -> float:
+    for _ in range(50):  # warm up
+        await post_graphql(app, workload["query"], workload["variables"])
+    start = time.perf_counter()
+    for _ in range(requests):
+        status, _, _ = await post_graphql(app, workload["query"], workload["variables"])
+        assert status == 200
+    return requests / (time.perf_counter() - start)
+
+
+async def bench(requests: int) -> dict:
+    results = {}
+    for name, workload in WORKLOADS.items():
+        without_cache = await run(build_app(False), workload, requests)
+        with_cache = await run(build_app(True), workload, requests)
+        results[name] = {
+            "rps_without_cache": round(without_cache, 1),
+            "rps_with_cache": round(with_cache, 1),
+            "speedup": round(with_cache / without_cache, 3),
+        }
+    return results
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=2000, help="timed requests per variant")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(bench(args.requests)), indent=2))
+
+
+if __name__ == "__main__":
+    main_cli()
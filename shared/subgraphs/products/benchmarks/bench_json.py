@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+JSON serialization and compression cost of large `products` responses
+
+For 1k, 10k and 100k-product catalogs, executes the `products` query once and times
+encoding its result with Strawberry's default (`json.dumps` to str, then UTF-8) vs. the
+json_codec encoders, plus gzip/Brotli compression of the body. Also times complete
+in-process requests through Strawberry's stock GraphQL app vs. ProductsGraphQL
+(response cache bypassed).
+
+Usage:
+    python benchmarks/bench_json.py [--sizes 1000,10000,100000] [--rounds 5]
+"""
+import argparse
+import asyncio
+import gzip
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from strawberry.asgi import GraphQL  # noqa: E402
+
+import json_codec  # noqa: E402
+import main  # noqa: E402
+from asgi_client import post_graphql  # noqa: E402
+from catalog import Catalog  # noqa: E402
+from synthetic import make_products  # noqa: E402
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+QUERY = "query GetProducts{products{id name price description category inStock}}"
+
+
+def timed(fn, rounds: int) -> float:
+    """Median milliseconds of `rounds` calls."""
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return round(statistics.median(samples), 2)
+
+
+async def timed_request(app, rounds: int) -> float:
+    samples = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        status, _, body = await post_graphql(app, QUERY)
+        samples.append((time.perf_counter() - start) * 1000)
+        assert status == 200 and b'"errors"' not in body, body[:200]
+    return round(statistics.median(samples), 1)
+
+
+async def bench_size(size: int, rounds: int) -> dict:
+    main.backend.replace(Catalog(make_products(size)))
+    result = await main.schema.execute(QUERY)
+    assert not result.errors, result.errors
+    response_data = {"data": result.data}
+
+    body = json_codec.dumps(response_data)
+    encoders = {
+        "strawberry_default": lambda: json.dumps(response_data).encode(),
+        "stdlib_compact": lambda: json_codec.select_encoder("stdlib")(response_data),
+    }
+    if json_codec.orjson is not None:
+        encoders["orjson"] = lambda: json_codec.select_encoder("orjson")(response_data)
+
+    compressors = {"gzip_5": lambda: gzip.compress(body, compresslevel=5, mtime=0)}
+    if brotli is not None:
+        compressors["br_4"] = lambda: brotli.compress(body, quality=4)
+
+    report = {
+        "body_bytes": len(body),
+        "encode_ms": {name: timed(fn, rounds) for name, fn in encoders.items()},
+        "compress_ms": {name: timed(fn, rounds) for name, fn in compressors.items()},
+        "compressed_bytes": {name: len(fn()) for name, fn in compressors.items()},
+    }
+
+    # End to end: parse, execute, serialize and send, without the response cache
+    stock = GraphQL(main.schema)
+    await post_graphql(stock, QUERY)
+    await post_graphql(main.graphql_app, QUERY)
+    report["request_ms"] = {
+        "strawberry_graphql": await timed_request(stock, rounds),
+        "products_graphql": await timed_request(main.graphql_app, rounds),
+    }
+    return report
+
+
+async def run(sizes, rounds: int) -> dict:
+    return {str(size): await bench_size(size, rounds) for size in sizes}
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="1000,10000,100000", help="comma-separated catalog sizes")
+    parser.add_argument("--rounds", type=int, default=5, help="repetitions per measurement (the median is reported)")
+    args = parser.parse_args()
+
+    sizes = [int(s) for s in args.sizes.split(",")]
+    print(json.dumps(asyncio.run(run(sizes, args.rounds)), indent=2))
+
+
+if __name__ == "__main__":
+    main_cli()
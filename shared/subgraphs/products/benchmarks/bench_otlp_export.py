@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Throughput and drop behaviour of the OTLP span export pipeline under a span storm
+
+Starts a stub OTLP/HTTP receiver on localhost (optionally slowed down to mimic a
+congested collector), points the configured pipeline from export_pipeline.py at it,
+and ends spans as fast as possible from several threads. Reports spans created,
+received and dropped, export request count and latency, and bytes on the wire.
+
+Usage:
+    python benchmarks/bench_otlp_export.py [--spans 200000] [--threads 4] [--receiver-delay-ms 0]
+        [--queue-size 2048] [--batch-size 512] [--schedule-delay-ms 5000] [--compression gzip]
+"""
+import argparse
+import gzip
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from opentelemetry import metrics  # noqa: E402
+from opentelemetry.proto.collector.trace.v1.trace_service_pb2 import ExportTraceServiceRequest  # noqa: E402
+from opentelemetry.sdk.metrics import MeterProvider  # noqa: E402
+from opentelemetry.sdk.metrics.export import InMemoryMetricReader  # noqa: E402
+from opentelemetry.sdk.trace import TracerProvider  # noqa: E402
+
+# Metrics must be collectable before export_pipeline creates its instruments
+reader = InMemoryMetricReader()
+metrics.set_meter_provider(MeterProvider(metric_readers=[reader]))
+
+from export_pipeline import create_span_processor, exporter_options  # noqa: E402
+
+
+class StubReceiver(BaseHTTPRequestHandler):
+    """Accepts OTLP/HTTP protobuf trace exports and counts the spans they contain."""
+
+    delay = 0.0
+    lock = threading.Lock()
+    spans = 0
+    requests = 0
+    wire_bytes = 0
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        encoding = self.headers.get("Content-Encoding")
+        payload = gzip.decompress(body) if encoding == "gzip" else zlib.decompress(body) if encoding == "deflate" else body
+
+        request = ExportTraceServiceRequest()
+        request.ParseFromString(payload)
+        count = sum(len(ss.spans) for rs in request.resource_spans for ss in rs.scope_spans)
+        if self.delay:
+            time.sleep(self.delay)
+
+        with self.lock:
+            StubReceiver.spans += count
+            StubReceiver.requests += 1
+            StubReceiver.wire_bytes += len(body)
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-protobuf")
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+def metric_values():
+    values = {}
+    for resource_metrics in reader.get_metrics_data().resource_metrics:
+        for scope_metrics in resource_metrics.scope_metrics:
+            for metric in scope_metrics.metrics:
+                for point in metric.data.data_points:
+                    key = metric.name
+                    if point.attributes:
+                        key += "{" + ",".join(f"{k}={v}" for k, v in point.attributes.items()) + "}"
+                    if hasattr(point, "sum") and hasattr(point, "count"):
+                        values[key] = {"count": point.count, "mean_ms": round(point.sum / max(point.count, 1) * 1000, 2)}
+                    else:
+                        values[key] = point.value
+    return values
+
+
+def storm(tracer, spans: int, threads: int) -> float:
+    per_thread = spans // threads
+
+    def worker():
+        for i in range(per_thread):
+            with tracer.start_as_current_span("storm") as span:
+                span.set_attribute("storm.index", i)
+
+    workers = [threading.Thread(target=worker) for _ in range(threads)]
+    start = time.perf_counter()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return time.perf_counter() - start
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--spans", type=int, default=200_000, help="spans to create")
+    parser.add_argument("--threads", type=int, default=4, help="threads creating spans")
+    parser.add_argument("--receiver-delay-ms", type=float, default=0.0, help="extra latency per export request")
+    parser.add_argument("--queue-size", type=int, help="PRODUCTS_SPAN_QUEUE_SIZE")
+    parser.add_argument("--batch-size", type=int, help="PRODUCTS_SPAN_BATCH_SIZE")
+    parser.add_argument("--schedule-delay-ms", type=float, help="PRODUCTS_SPAN_SCHEDULE_DELAY_MS")
+    parser.add_argument("--compression", choices=["gzip", "deflate", "none"], help="PRODUCTS_OTLP_COMPRESSION")
+    args = parser.parse_args()
+
+    for option, env_var in (
+        ("queue_size", "PRODUCTS_SPAN_QUEUE_SIZE"),
+        ("batch_size", "PRODUCTS_SPAN_BATCH_SIZE"),
+        ("schedule_delay_ms", "PRODUCTS_SPAN_SCHEDULE_DELAY_MS"),
+        ("compression", "PRODUCTS_OTLP_COMPRESSION"),
+    ):
+        value = getattr(args, option)
+        if value is not None:
+            os.environ[env_var] = str(value)
+
+    StubReceiver.delay = args.receiver_delay_ms / 1000
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubReceiver)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+    exporter = OTLPSpanExporter(
+        endpoint=f"http://127.0.0.1:{server.server_port}/v1/traces", **exporter_options()
+    )
+    provider = TracerProvider()
+    provider.add_span_processor(create_span_processor(exporter))
+    tracer = provider.get_tracer("bench_otlp_export")
+
+    elapsed = storm(tracer, args.spans, args.threads)
+    created = args.spans // args.threads * args.threads
+    flush_start = time.perf_counter()
+    provider.shutdown()
+    flush_seconds = time.perf_counter() - flush_start
+    server.shutdown()
+
+    telemetry = metric_values()
+    print(json.dumps({
+        "config": {key: os.getenv(key) for key in (
+            "PRODUCTS_SPAN_QUEUE_SIZE", "PRODUCTS_SPAN_BATCH_SIZE",
+            "PRODUCTS_SPAN_SCHEDULE_DELAY_MS", "PRODUCTS_OTLP_COMPRESSION",
+        )},
+        "spans_created": created,
+        "spans_per_second": round(created / elapsed),
+        "spans_received": StubReceiver.spans,
+        "spans_dropped": telemetry.get("products.telemetry.spans_dropped", 0),
+        "drop_ratio": round(1 - StubReceiver.spans / created, 4),
+        "export_requests": StubReceiver.requests,
+        "wire_bytes_per_span": round(StubReceiver.wire_bytes / max(StubReceiver.spans, 1), 1),
+        "final_flush_seconds": round(flush_seconds, 3),
+        "metrics": telemetry,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Cold start cost of importing the products subgraph (`python -X importtime -c "import main"`)
+
+Runs fresh interpreters in the deferred (default) and eager telemetry init modes and
+reports the median cumulative import time of `main`, the median time from process launch
+until `main` is imported and the heaviest top-level packages (self time). Results are compared with the baseline
+tracked in benchmarks/startup_baseline.json; pass --write-baseline to update it.
+
+Usage:
+    python benchmarks/bench_startup.py [--runs 7] [--write-baseline]
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+APP_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "startup_baseline.json")
+
+# Endpoints must be configured for the exporters to be imported at all; nothing is sent to
+# them because the child exits right after the import
+ENDPOINTS = {
+    "DASH0_TRACES_ENDPOINT": "http://127.0.0.1:9/v1/traces",
+    "DASH0_METRICS_ENDPOINT": "http://127.0.0.1:9/v1/metrics",
+}
+
+MODES = {
+    "deferred": {**ENDPOINTS, "PRODUCTS_OTEL_INIT": "deferred"},
+    "eager": {**ENDPOINTS, "PRODUCTS_OTEL_INIT": "eager"},
+}
+
+# "import time: self [us] | cumulative | imported package", nested imports are indented
+IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+# Print when `main` is importable, then exit without running atexit telemetry flushes
+CHILD = "import os, time; import main; print(time.time()); os._exit(0)"
+
+
+def run_once(env: Dict[str, str]) -> Dict:
+    start = time.time()
+    child = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", CHILD],
+        cwd=APP_DIR,
+        env={**os.environ, **env},
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    ready = float(child.stdout.strip().splitlines()[-1])
+    stderr = child.stderr
+
+    main_us = 0
+    packages: Dict[str, int] = defaultdict(int)
+    for line in stderr.splitlines():
+        match = IMPORTTIME_LINE.match(line)
+        if not match:
+            continue
+        self_us, cumulative_us, indent, name = match.groups()
+        packages[name.split(".")[0]] += int(self_us)
+        if name == "main" and not indent:
+            main_us = int(cumulative_us)
+    return {"main_ms": main_us / 1000, "wall_ms": (ready - start) * 1000, "packages": packages}
+
+
+def measure(env: Dict[str, str], runs: int) -> Dict:
+    results: List[Dict] = [run_once(env) for _ in range(runs)]
+    packages: Dict[str, List[int]] = defaultdict(list)
+    for result in results:
+        for name, us in result["packages"].items():
+            packages[name].append(us)
+    heaviest = sorted(packages.items(), key=lambda item: -statistics.median(item[1]))[:10]
+    return {
+        "import_main_ms": round(statistics.median(r["main_ms"] for r in results), 1),
+        "process_ready_ms": round(statistics.median(r["wall_ms"] for r in results), 1),
+        "heaviest_packages_ms": {name: round(statistics.median(us) / 1000, 1) for name, us in heaviest},
+    }
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=7, help="fresh interpreters per mode (the median is reported)")
+    parser.add_argument("--write-baseline", action="store_true", help="store the results as the new baseline")
+    args = parser.parse_args()
+
+    report = {mode: measure(env, args.runs) for mode, env in MODES.items()}
+
+    if os.path.exists(BASELINE):
+        with open(BASELINE) as f:
+            baseline = json.load(f)
+        for mode, result in report.items():
+            if mode in baseline:
+                result["vs_baseline_ms"] = round(result["import_main_ms"] - baseline[mode]["import_main_ms"], 1)
+
+    if args.write_baseline:
+        with open(BASELINE, "w") as f:
+            json.dump({mode: {k: v for k, v in r.items() if k != "vs_baseline_ms"} for mode, r in report.items()}, f, indent=2)
+            f.write("\n")
+
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main_cli()
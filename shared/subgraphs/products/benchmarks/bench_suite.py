@@ -0,0 +1,263 @@
+#!/usr/bin/env python3
+"""
+End-to-end benchmark suite for the products subgraph, in-process through the full ASGI stack
+
+Sends `products`, `product(id)`, `topProducts(limit)` and `_entities` with 1, 100 and 1000
+representations to `main.app` (OpenTelemetry, trace context, load shedding, compression
+and response cache middleware included) without sockets or a router, for each synthetic
+catalog size, once with telemetry on and once with it off:
+
+    on:  every request sampled, resolver spans and metrics recorded, spans exported to a
+         discarding exporter and metrics collected in memory (measures creation, not the network)
+    off: nothing sampled or recorded (no resolver spans, no tail capture, no-op meter)
+
+The response cache is disabled unless --response-cache is given, so resolvers run on every
+request; expensive-operation slots and the concurrency limit are lifted (requests run one at a
+time anyway), while the default depth and cost limits stay in place.
+Each telemetry mode runs in a fresh interpreter because tracing settings are read at import.
+
+Results are JSON (per-request median/p99 in microseconds and requests/s) with the commit
+and library versions, so runs can be stored and compared across commits with --compare.
+
+Usage:
+    python benchmarks/bench_suite.py [--sizes 100,1000,10000] [--telemetry on,off]
+        [--requests 300] [--rounds 3] [--output results.json] [--compare baseline.json] [--threshold 0.1]
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from importlib import metadata
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+ENTITIES_QUERY = (
+    "query Entities($representations:[_Any!]!)"
+    "{_entities(representations:$representations){...on Product{id name price inStock}}}"
+)
+
+
+def operations(size: int) -> dict:
+    """GraphQL request bodies by operation name for a catalog of `size` products."""
+
+    def representations(count: int) -> list:
+        # Spread over the catalog (with repeats when it is smaller than the batch)
+        step = max(size // count, 1)
+        return [{"__typename": "Product", "id": str((i * step) % size + 1)} for i in range(count)]
+
+    ops = {
+        "products": {"query": "query Products{products{id name price category inStock}}"},
+        "product": {"query": f'query Product{{product(id:"{size // 2 + 1}"){{id name price description}}}}'},
+        "topProducts": {"query": "query TopProducts{topProducts(limit:10){id name price}}"},
+    }
+    for count in (1, 100, 1000):
+        ops[f"_entities[{count}]"] = {
+            "query": ENTITIES_QUERY,
+            "variables": {"representations": representations(count)},
+        }
+    return {name: json.dumps(body).encode() for name, body in ops.items()}
+
+
+TELEMETRY = {
+    "on": {
+        "PRODUCTS_TRACE_SAMPLE_RATIO": "1",
+        "PRODUCTS_TRACE_RATE_LIMIT": "0",
+        "PRODUCTS_SPAN_BUDGET": "0",
+    },
+    "off": {
+        "PRODUCTS_TRACE_SPANS": "",
+        "PRODUCTS_TRACE_SAMPLE_RATIO": "0",
+        "PRODUCTS_TRACE_KEEP_ERRORS": "false",
+        "PRODUCTS_TRACE_SLOW_THRESHOLD_MS": "0",
+    },
+}
+
+COMMON_ENV = {
+    "PRODUCTS_EXPENSIVE_QUERY_COST": "0",
+    "PRODUCTS_MAX_CONCURRENCY": "0",
+}
+
+
+async def measure(telemetry: str, sizes, requests: int, rounds: int, max_seconds: float) -> dict:
+    """Run inside a child process configured through the environment."""
+    if telemetry == "on":
+        from opentelemetry import metrics
+        from opentelemetry.sdk.metrics import MeterProvider
+        from opentelemetry.sdk.metrics.export import InMemoryMetricReader
+
+        # Instruments record into a real SDK provider, as they do once exporters start
+        metrics.set_meter_provider(MeterProvider(metric_readers=[InMemoryMetricReader()]))
+
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter, SpanExportResult
+
+    import main
+    import otel
+    from asgi_client import request
+    from catalog import Catalog
+    from synthetic import make_products
+
+    class DiscardingExporter(SpanExporter):
+        def export(self, spans):
+            return SpanExportResult.SUCCESS
+
+    otel._tail_processor.attach(BatchSpanProcessor(DiscardingExporter()) if telemetry == "on" else None)
+
+    results = {}
+    for size in sizes:
+        main.backend.replace(Catalog(make_products(size)))
+        results[str(size)] = {}
+        for name, body in operations(size).items():
+            status, _, response = await request(main.app, body)
+            assert status == 200 and b'"errors"' not in response, (name, response[:300])
+            for _ in range(min(requests // 10, 50)):  # warm up
+                await request(main.app, body)
+
+            latencies = []
+            round_means = []
+            for _ in range(rounds):
+                round_start = time.perf_counter()
+                count = 0
+                while count < requests:
+                    start = time.perf_counter()
+                    await request(main.app, body)
+                    latencies.append(time.perf_counter() - start)
+                    count += 1
+                    if start - round_start > max_seconds / rounds:
+                        break
+                round_means.append((time.perf_counter() - round_start) / count)
+
+            latencies.sort()
+            # Median over rounds, so a noisy neighbour does not skew a whole operation
+            mean = statistics.median(round_means)
+            results[str(size)][name] = {
+                "requests": len(latencies),
+                "mean_us": round(mean * 1e6, 1),
+                "p50_us": round(latencies[len(latencies) // 2] * 1e6, 1),
+                "p99_us": round(latencies[min(int(len(latencies) * 0.99), len(latencies) - 1)] * 1e6, 1),
+                "rps": round(1 / mean, 1),
+                "response_bytes": len(response),
+            }
+    return results
+
+
+def run_telemetry_mode(telemetry: str, args) -> dict:
+    child_env = {**os.environ, **COMMON_ENV, **TELEMETRY[telemetry]}
+    if not args.response_cache:
+        child_env["PRODUCTS_RESPONSE_CACHE_ENABLED"] = "false"
+    output = subprocess.run(
+        [
+            sys.executable, __file__, "--child", telemetry,
+            "--sizes", args.sizes, "--requests", str(args.requests),
+            "--rounds", str(args.rounds), "--max-seconds", str(args.max_seconds),
+        ],
+        env=child_env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def environment() -> dict:
+    """Commit and versions the results were measured with."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    versions = {}
+    for package in ("strawberry-graphql", "graphql-core", "starlette", "opentelemetry-sdk", "orjson"):
+        try:
+            versions[package] = metadata.version(package)
+        except metadata.PackageNotFoundError:
+            versions[package] = None
+    return {
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "packages": versions,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """
+    List operations whose mean time grew by more than `threshold` (a fraction) against a baseline.
+
+    Only configurations present in both runs are compared.
+    """
+    regressions = []
+    for telemetry, sizes in results.items():
+        for size, ops in sizes.items():
+            for name, current in ops.items():
+                previous = baseline.get(telemetry, {}).get(size, {}).get(name)
+                if previous is None:
+                    continue
+                change = current["mean_us"] / previous["mean_us"] - 1
+                if change > threshold:
+                    regressions.append({
+                        "telemetry": telemetry,
+                        "size": int(size),
+                        "operation": name,
+                        "baseline_us": previous["mean_us"],
+                        "current_us": current["mean_us"],
+                        "change": f"{change:+.1%}",
+                    })
+    return regressions
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", default="100,1000,10000", help="comma-separated synthetic catalog sizes")
+    parser.add_argument("--telemetry", default="on,off", help="telemetry modes to run (on, off)")
+    parser.add_argument("--requests", type=int, default=300, help="timed requests per operation and round")
+    parser.add_argument("--rounds", type=int, default=3, help="rounds per operation (the median is reported)")
+    parser.add_argument("--max-seconds", type=float, default=3.0,
+                        help="time budget per operation; large responses stop early")
+    parser.add_argument("--response-cache", action="store_true", help="leave the response cache enabled")
+    parser.add_argument("--output", help="also write the results to this file")
+    parser.add_argument("--compare", help="results file of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.1,
+                        help="mean time increase (fraction) reported as a regression")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    sizes = [int(s) for s in args.sizes.split(",")]
+
+    if args.child:
+        print(json.dumps(asyncio.run(measure(args.child, sizes, args.requests, args.rounds, args.max_seconds))))
+        return
+
+    modes = [m.strip() for m in args.telemetry.split(",") if m.strip()]
+    for mode in modes:
+        if mode not in TELEMETRY:
+            parser.error(f"unknown telemetry mode {mode!r}, expected one of: {', '.join(TELEMETRY)}")
+
+    report = {
+        "environment": environment(),
+        "settings": {"sizes": sizes, "requests": args.requests, "rounds": args.rounds,
+                     "response_cache": args.response_cache},
+        "results": {mode: run_telemetry_mode(mode, args) for mode in modes},
+    }
+    regressions = []
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report["results"], json.load(f)["results"], args.threshold)
+        report["regressions"] = regressions
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main_cli()
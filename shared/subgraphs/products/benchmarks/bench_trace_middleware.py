@@ -0,0 +1,89 @@
+#!/usr/bin/env python3
+"""
+Per-request overhead of the trace-context middleware stack
+
+Compares the previous BaseHTTPMiddleware-based TraceContextMiddleware with the
+current pure ASGI one. Both stacks sit under OpenTelemetryMiddleware (as in
+main.py) and serve a trivial endpoint, so the difference is middleware cost.
+
+Usage:
+    python benchmarks/bench_trace_middleware.py [--requests 5000]
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from opentelemetry import context  # noqa: E402
+from opentelemetry.propagate import extract  # noqa: E402
+from starlette.applications import Starlette  # noqa: E402
+from starlette.middleware.base import BaseHTTPMiddleware  # noqa: E402
+from starlette.responses import Response  # noqa: E402
+
+import main  # noqa: E402
+from asgi_client import request  # noqa: E402
+from otel import instrument_asgi_app  # noqa: E402
+
+HEADERS = {"traceparent": "00-4bf92f3577b34da6a3ce929d0e0e4736-00f067aa0ba902b7-01"}
+
+
+class LegacyTraceContextMiddleware(BaseHTTPMiddleware):
+    """The previous implementation, kept here for comparison."""
+
+    async def dispatch(self, request, call_next):
+        ctx = extract(request.headers)
+        token = context.attach(ctx)
+        try:
+            response = await call_next(request)
+        finally:
+            context.detach(token)
+        return response
+
+
+async def endpoint(scope, receive, send):
+    await Response(b'{"data":{}}', media_type="application/json")(scope, receive, send)
+
+
+def build_stack(middleware):
+    app = Starlette()
+    if middleware is not None:
+        app.add_middleware(middleware)
+    app.add_route("/graphql", endpoint)
+    return instrument_asgi_app(app)
+
+
+async def run(app, requests: int) -> float:
+    for _ in range(200):  # warm up
+        await request(app, b"{}", headers=HEADERS)
+    start = time.perf_counter()
+    for _ in range(requests):
+        await request(app, b"{}", headers=HEADERS)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+async def bench(requests: int) -> dict:
+    stacks = {
+        "no_trace_middleware": build_stack(None),
+        "base_http_middleware": build_stack(LegacyTraceContextMiddleware),
+        "pure_asgi_middleware": build_stack(main.TraceContextMiddleware),
+    }
+    results = {name: {"mean_us": round(await run(app, requests), 2)} for name, app in stacks.items()}
+    baseline = results["no_trace_middleware"]["mean_us"]
+    for result in results.values():
+        result["overhead_us"] = round(result["mean_us"] - baseline, 2)
+    return results
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=5000, help="timed requests per stack")
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(bench(args.requests)), indent=2))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""
+Resolver tracing overhead at 0%, 25% and 100% sampling
+
+Serves `product`, `topProducts` and `_entities` operations through the full app
+(OpenTelemetryMiddleware included) with the response cache disabled. Each sampling
+ratio is compared against a run that records nothing (resolver spans disabled with PRODUCTS_TRACE_SPANS="", 0%
+sampling, no tail capture). With the default settings the 0% case still records up to
+PRODUCTS_TRACE_TAIL_RATE_LIMIT unsampled traces per second for tail capture and skips child
+spans for the rest; it is also measured with tail capture switched off, where no unsampled
+trace is recorded at all. Spans are exported to a discarding exporter.
+
+Each configuration runs in a fresh interpreter because tracing settings are read at import.
+
+Usage:
+    python benchmarks/bench_tracing.py [--requests 1000] [--rounds 5]
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+OPERATIONS = {
+    "product": {"query": '{ product(id: "2") { id name price } }'},
+    "topProducts": {"query": "{ topProducts(limit: 5) { id name } }"},
+    "_entities": {
+        "query": "query($r: [_Any!]!) { _entities(representations: $r) { ... on Product { id name } } }",
+        "variables": {"r": [{"__typename": "Product", "id": str(i % 5 + 1)} for i in range(50)]},
+    },
+}
+
+NO_TAIL = {"PRODUCTS_TRACE_KEEP_ERRORS": "false", "PRODUCTS_TRACE_SLOW_THRESHOLD_MS": "0"}
+
+CONFIGURATIONS = {
+    "nothing_recorded": {"PRODUCTS_TRACE_SPANS": "", "PRODUCTS_TRACE_SAMPLE_RATIO": "0", **NO_TAIL},
+    "sampled_0_no_tail": {"PRODUCTS_TRACE_SAMPLE_RATIO": "0", **NO_TAIL},
+    "sampled_0": {"PRODUCTS_TRACE_SAMPLE_RATIO": "0"},
+    "sampled_25": {"PRODUCTS_TRACE_SAMPLE_RATIO": "0.25"},
+    "sampled_100": {"PRODUCTS_TRACE_SAMPLE_RATIO": "1"},
+}
+
+
+async def measure(requests: int, rounds: int) -> dict:
+    """Run inside a child process configured through the environment."""
+    from opentelemetry.sdk.trace.export import BatchSpanProcessor, SpanExporter, SpanExportResult
+
+    import main
+    from asgi_client import request
+    import otel
+
+    class DiscardingExporter(SpanExporter):
+        def export(self, spans):
+            return SpanExportResult.SUCCESS
+
+    # Replace the OTLP exporter so the benchmark measures span creation, not the network
+    processor = otel._tracer_provider._active_span_processor._span_processors[0]
+    processor.delegate = BatchSpanProcessor(DiscardingExporter())
+
+    results = {}
+    for name, payload in OPERATIONS.items():
+        body = json.dumps(payload).encode()
+        for _ in range(200):  # warm up
+            await request(main.app, body)
+        samples = []
+        for _ in range(rounds):
+            start = time.perf_counter()
+            for _ in range(requests):
+                await request(main.app, body)
+            samples.append((time.perf_counter() - start) / requests * 1e6)
+        # Median of several rounds, so a noisy neighbour does not skew a whole configuration
+        results[name] = round(statistics.median(samples), 2)
+    return results
+
+
+def run_configuration(env: dict, requests: int, rounds: int) -> dict:
+    child_env = {
+        **os.environ,
+        "PRODUCTS_RESPONSE_CACHE_ENABLED": "false",
+        "PRODUCTS_TRACE_RATE_LIMIT": "0",
+        "PRODUCTS_SPAN_BUDGET": "0",
+        **env,
+    }
+    output = subprocess.run(
+        [sys.executable, __file__, "--child", "--requests", str(requests), "--rounds", str(rounds)],
+        env=child_env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=1000, help="timed requests per operation and round")
+    parser.add_argument("--rounds", type=int, default=5, help="rounds per operation (the median is reported)")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(measure(args.requests, args.rounds))))
+        return
+
+    results = {name: run_configuration(env, args.requests, args.rounds) for name, env in CONFIGURATIONS.items()}
+    baseline = results["nothing_recorded"]
+    report = {
+        name: {
+            op: {"mean_us": us, "overhead_us": round(us - baseline[op], 2)}
+            for op, us in timings.items()
+        }
+        for name, timings in results.items()
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,539 @@
+#!/usr/bin/env python3
+"""
+Open-loop replay of recorded GraphQL workloads against the products subgraph (or the router)
+
+`record` turns vegeta/*.json bodies and JSONL captures into a replayable schedule: one JSON
+object per line with the request body and its send offset, drawn from a constant or Poisson
+arrival process with a fixed seed so runs are repeatable.
+
+`run` streams JSONL captures line by line (never loading the whole file) and vegeta bodies,
+and sends each request at its intended time, either at a target rate or on the recorded
+offsets, over a pool of keep-alive HTTP/1.1 connections. Latency is measured from the
+intended send time, so queueing behind a slow server shows up in the tail instead of being
+hidden by a closed-loop client waiting politely (coordinated omission); the time from the
+actual send is reported separately as service time. Both go into HDR-style log-linear
+histograms (3 significant digits) and a JSON summary that can be compared across runs.
+
+JSONL lines may be a GraphQL request body ({"query": ..., "variables": ...}) or a record
+({"body": {...} or "...", "offset": seconds, "name": ...}); other lines are skipped.
+
+Usage:
+    python benchmarks/replay.py record ../../../vegeta --rate 200 --duration 60 -o workload.jsonl
+    python benchmarks/replay.py run workload.jsonl --schedule recorded [--speed 2]
+    python benchmarks/replay.py run ../../../vegeta/products.json --rate 500 --duration 30 \\
+        [--url http://localhost:4003/graphql] [--connections 64] [--output run.json] [--compare baseline.json]
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import math
+import os
+import random
+import ssl
+import sys
+from typing import Dict, Iterator, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+PERCENTILES = (50.0, 90.0, 99.0, 99.9, 99.99)
+
+# A workload entry: (name, encoded body, send offset in seconds or None)
+Entry = Tuple[str, bytes, Optional[float]]
+
+
+class LatencyHistogram:
+    """
+    Log-linear histogram of integer microsecond values, in the style of HdrHistogram.
+
+    Values below `2 * 10**digits` are counted exactly; above that each power of two is
+    split into the same number of linear sub-buckets, so every recorded value is kept
+    to `digits` significant digits at a fixed, small memory cost.
+    """
+
+    def __init__(self, digits: int = 3):
+        self.sub_bits = math.ceil(math.log2(2 * 10 ** digits))
+        self.sub_count = 1 << self.sub_bits
+        self.half = self.sub_count >> 1
+        self.counts: Dict[int, int] = {}
+        self.total = 0
+        self.sum = 0
+        self.min = 0
+        self.max = 0
+
+    def _index(self, value: int) -> int:
+        if value < self.sub_count:
+            return value
+        shift = value.bit_length() - self.sub_bits
+        return self.sub_count + (shift - 1) * self.half + (value >> shift) - self.half
+
+    def _highest_equivalent(self, index: int) -> int:
+        if index < self.sub_count:
+            return index
+        shift = (index - self.sub_count) // self.half + 1
+        sub = (index - self.sub_count) % self.half + self.half
+        return ((sub + 1) << shift) - 1
+
+    def record(self, seconds: float) -> None:
+        value = max(int(seconds * 1_000_000), 0)
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.min = value if self.total == 0 else min(self.min, value)
+        self.max = max(self.max, value)
+        self.total += 1
+        self.sum += value
+
+    def percentile(self, percentile: float) -> int:
+        """Value (µs) at or below which `percentile` percent of the recorded values fall."""
+        if self.total == 0:
+            return 0
+        rank = max(math.ceil(percentile / 100 * self.total), 1)
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= rank:
+                return min(self._highest_equivalent(index), self.max)
+        return self.max
+
+    def summary(self) -> dict:
+        """Count, mean, min/max and percentiles in milliseconds."""
+        report = {
+            "count": self.total,
+            "mean_ms": round(self.sum / self.total / 1000, 3) if self.total else 0.0,
+            "min_ms": round(self.min / 1000, 3),
+            "max_ms": round(self.max / 1000, 3),
+        }
+        for p in PERCENTILES:
+            report[f"p{p:g}_ms".replace(".", "")] = round(self.percentile(p) / 1000, 3)
+        return report
+
+
+def _encode(body) -> bytes:
+    if isinstance(body, str):
+        return body.encode()
+    return json.dumps(body, separators=(",", ":")).encode()
+
+
+def _parse_record(record, default_name: str) -> Optional[Entry]:
+    if not isinstance(record, dict):
+        return None
+    if "query" in record:
+        return str(record.get("operationName") or default_name), _encode(record), None
+    body = record.get("body")
+    if isinstance(body, str) and body.lstrip().startswith("{"):
+        try:
+            body = json.loads(body)
+        except ValueError:
+            return None
+    if not isinstance(body, dict) or "query" not in body:
+        return None
+    offset = record.get("offset")
+    return (
+        str(record.get("name") or body.get("operationName") or default_name),
+        _encode(body),
+        float(offset) if offset is not None else None,
+    )
+
+
+def iter_source(path: str) -> Iterator[Entry]:
+    """
+    Yield workload entries from a JSONL capture (streamed), a JSON body or a directory of them.
+
+    Args:
+        path: .jsonl file, .json request body, or directory of .json bodies (e.g. vegeta/)
+    """
+    if os.path.isdir(path):
+        for filename in sorted(os.listdir(path)):
+            if filename.endswith(".json"):
+                yield from iter_source(os.path.join(path, filename))
+        return
+    name = os.path.basename(path)
+    if path.endswith(".jsonl"):
+        with open(path, "rb") as f:
+            for line in f:
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entry = _parse_record(json.loads(line), name)
+                except ValueError:
+                    continue
+                if entry is not None:
+                    yield entry
+        return
+    with open(path, "rb") as f:
+        try:
+            entry = _parse_record(json.load(f), name)
+        except ValueError:
+            entry = None
+    if entry is None:
+        print(f"⚠️  Skipping {path}: not a GraphQL request body", file=sys.stderr)
+    else:
+        yield entry
+
+
+def iter_workload(sources: List[str], loop: bool) -> Iterator[Entry]:
+    """Chain the sources, starting over from the first while `loop` is set."""
+    while True:
+        produced = False
+        for source in sources:
+            for entry in iter_source(source):
+                produced = True
+                yield entry
+        if not loop or not produced:
+            return
+
+
+def arrival_offsets(rate: float, arrival: str, seed: int) -> Iterator[float]:
+    """Send offsets (seconds) of a constant or Poisson arrival process at `rate` requests/s."""
+    if arrival == "poisson":
+        rng = random.Random(seed)
+        offset = 0.0
+        while True:
+            yield offset
+            offset += rng.expovariate(rate)
+    else:
+        for i in itertools.count():
+            yield i / rate
+
+
+class HTTPConnection:
+    """One keep-alive HTTP/1.1 connection speaking just enough of the protocol for JSON POSTs."""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.reusable = True
+
+    @classmethod
+    async def open(cls, host: str, port: int, tls: bool) -> "HTTPConnection":
+        context = ssl.create_default_context() if tls else None
+        reader, writer = await asyncio.open_connection(host, port, ssl=context)
+        return cls(reader, writer)
+
+    async def request(self, head: bytes, body: bytes) -> Tuple[int, bytes]:
+        """Send a request (pre-built head + body) and read the response status and body."""
+        self.writer.write(head + str(len(body)).encode() + b"\r\n\r\n" + body)
+        await self.writer.drain()
+
+        status_line = await self.reader.readuntil(b"\r\n")
+        status = int(status_line.split(b" ", 2)[1])
+        length = None
+        chunked = False
+        while True:
+            line = await self.reader.readuntil(b"\r\n")
+            if line == b"\r\n":
+                break
+            key, _, value = line.partition(b":")
+            key = key.strip().lower()
+            value = value.strip().lower()
+            if key == b"content-length":
+                length = int(value)
+            elif key == b"transfer-encoding" and b"chunked" in value:
+                chunked = True
+            elif key == b"connection" and value == b"close":
+                self.reusable = False
+
+        if chunked:
+            chunks = []
+            while True:
+                size = int((await self.reader.readuntil(b"\r\n")).split(b";", 1)[0], 16)
+                if size == 0:
+                    while await self.reader.readuntil(b"\r\n") != b"\r\n":
+                        pass
+                    break
+                chunks.append(await self.reader.readexactly(size))
+                await self.reader.readexactly(2)
+            return status, b"".join(chunks)
+        if length is not None:
+            return status, await self.reader.readexactly(length)
+        self.reusable = False
+        return status, await self.reader.read()
+
+    def close(self) -> None:
+        self.writer.close()
+
+
+class ConnectionPool:
+    """Bounded pool of keep-alive connections; requests beyond the bound wait for a free one."""
+
+    def __init__(self, host: str, port: int, tls: bool, size: int):
+        self.host = host
+        self.port = port
+        self.tls = tls
+        self.size = size
+        self.opened = 0
+        self.created = 0
+        self._idle: "asyncio.LifoQueue[HTTPConnection]" = asyncio.LifoQueue()
+
+    async def acquire(self) -> HTTPConnection:
+        if self._idle.empty() and self.opened < self.size:
+            self.opened += 1
+            try:
+                connection = await HTTPConnection.open(self.host, self.port, self.tls)
+            except BaseException:
+                self.opened -= 1
+                raise
+            self.created += 1
+            return connection
+        return await self._idle.get()
+
+    def release(self, connection: HTTPConnection, healthy: bool) -> None:
+        if healthy and connection.reusable:
+            self._idle.put_nowait(connection)
+        else:
+            connection.close()
+            self.opened -= 1
+
+    def close(self) -> None:
+        while not self._idle.empty():
+            self._idle.get_nowait().close()
+
+
+class Replayer:
+    """Sends workload entries open-loop and collects latency histograms and outcome counts."""
+
+    def __init__(self, url: str, connections: int, timeout: float, max_outstanding: int, graphql_errors: bool):
+        """
+        Args:
+            url: GraphQL endpoint, e.g. http://localhost:4003/graphql
+            connections: Maximum open connections
+            timeout: Seconds from the intended send time before a request counts as timed out
+            max_outstanding: Requests in flight or waiting for a connection before new arrivals
+                are counted as dropped (bounds client memory when the server falls behind)
+            graphql_errors: Count responses with an `errors` member as failures
+        """
+        parts = urlsplit(url)
+        tls = parts.scheme == "https"
+        host = parts.hostname or "localhost"
+        port = parts.port or (443 if tls else 80)
+        path = parts.path or "/"
+        if parts.query:
+            path += "?" + parts.query
+        self.pool = ConnectionPool(host, port, tls, connections)
+        self.head = (
+            f"POST {path} HTTP/1.1\r\nHost: {parts.netloc}\r\n"
+            "Content-Type: application/json\r\nAccept: application/json\r\n"
+            "Content-Length: "
+        ).encode()
+        self.timeout = timeout
+        self.max_outstanding = max_outstanding
+        self.graphql_errors = graphql_errors
+
+        self.response_time = LatencyHistogram()
+        self.service_time = LatencyHistogram()
+        self.outcomes: Dict[str, int] = {}
+        self.by_name: Dict[str, Dict[str, int]] = {}
+        self.by_name_latency: Dict[str, LatencyHistogram] = {}
+        self.max_send_lag = 0.0
+        self.outstanding = 0
+
+    def _count(self, name: str, outcome: str) -> None:
+        self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+        counts = self.by_name.setdefault(name, {})
+        counts[outcome] = counts.get(outcome, 0) + 1
+
+    async def _send(self, name: str, body: bytes, intended: float) -> None:
+        loop = asyncio.get_running_loop()
+        connection = None
+        healthy = False
+        outcome = "ok"
+        sent = None
+        try:
+            async with asyncio.timeout(intended + self.timeout - loop.time()):
+                connection = await self.pool.acquire()
+                sent = loop.time()
+                status, response = await connection.request(self.head, body)
+                healthy = True
+            if status != 200:
+                outcome = f"http_{status}"
+            elif self.graphql_errors and b'"errors"' in response:
+                outcome = "graphql_error"
+        except TimeoutError:
+            outcome = "timeout"
+        except (OSError, asyncio.IncompleteReadError, ValueError, IndexError):
+            outcome = "connection_error"
+        finally:
+            if connection is not None:
+                self.pool.release(connection, healthy)
+            self.outstanding -= 1
+
+        done = loop.time()
+        self.response_time.record(done - intended)
+        self.by_name_latency.setdefault(name, LatencyHistogram()).record(done - intended)
+        if sent is not None and outcome != "timeout":
+            self.service_time.record(done - sent)
+        self._count(name, outcome)
+
+    async def run(self, schedule: Iterator[Tuple[float, str, bytes]], duration: float) -> float:
+        """
+        Send each (offset, name, body) of the schedule at start + offset.
+
+        Args:
+            schedule: Entries in non-decreasing offset order
+            duration: Stop scheduling at this offset (0 = until the schedule ends)
+
+        Returns:
+            Seconds from the first intended send until the last response
+        """
+        loop = asyncio.get_running_loop()
+        tasks = set()
+        start = loop.time() + 0.05
+        for sent, (offset, name, body) in enumerate(schedule):
+            if duration and offset >= duration:
+                break
+            intended = start + offset
+            delay = intended - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            elif sent % 64 == 0:
+                # Running behind: still let responses be processed
+                await asyncio.sleep(0)
+            self.max_send_lag = max(self.max_send_lag, loop.time() - intended)
+            if self.outstanding >= self.max_outstanding:
+                self._count(name, "dropped")
+                continue
+            self.outstanding += 1
+            task = asyncio.create_task(self._send(name, body, intended))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+        if tasks:
+            await asyncio.gather(*tasks)
+        elapsed = loop.time() - start
+        self.pool.close()
+        return elapsed
+
+    def summary(self, elapsed: float, target_rate: Optional[float]) -> dict:
+        total = sum(self.outcomes.values())
+        failed = total - self.outcomes.get("ok", 0)
+        return {
+            "requests": total,
+            "elapsed_s": round(elapsed, 3),
+            "target_rps": target_rate,
+            "throughput_rps": round(total / elapsed, 1) if elapsed > 0 else 0.0,
+            "success_rps": round(self.outcomes.get("ok", 0) / elapsed, 1) if elapsed > 0 else 0.0,
+            "error_rate": round(failed / total, 5) if total else 0.0,
+            "outcomes": dict(sorted(self.outcomes.items())),
+            "connections_opened": self.pool.created,
+            "max_send_lag_ms": round(self.max_send_lag * 1000, 3),
+            "response_time": self.response_time.summary(),
+            "service_time": self.service_time.summary(),
+            "operations": {
+                name: {
+                    "requests": sum(counts.values()),
+                    "errors": sum(counts.values()) - counts.get("ok", 0),
+                    "p50_ms": round(self.by_name_latency[name].percentile(50) / 1000, 3)
+                    if name in self.by_name_latency else None,
+                    "p99_ms": round(self.by_name_latency[name].percentile(99) / 1000, 3)
+                    if name in self.by_name_latency else None,
+                }
+                for name, counts in sorted(self.by_name.items())
+            },
+        }
+
+
+def build_schedule(args) -> Iterator[Tuple[float, str, bytes]]:
+    """Pair the workload with send offsets: recorded (scaled by --speed) or a generated arrival process."""
+    if args.schedule == "recorded":
+        first = None
+        for name, body, offset in iter_workload(args.sources, loop=False):
+            if offset is None:
+                raise SystemExit(f"{name}: --schedule recorded needs an `offset` on every record")
+            first = offset if first is None else first
+            yield (offset - first) / args.speed, name, body
+        return
+    offsets = arrival_offsets(args.rate, args.arrival, args.seed)
+    entries = iter_workload(args.sources, loop=True)
+    if args.requests:
+        entries = itertools.islice(entries, args.requests)
+    for offset, (name, body, _) in zip(offsets, entries):
+        yield offset, name, body
+
+
+def compare(current: dict, baseline: dict) -> dict:
+    """Relative change of the headline numbers against a previous summary."""
+    keys = ("p50_ms", "p99_ms", "p999_ms", "max_ms")
+    report = {
+        f"response_time.{k}": (baseline["response_time"][k], current["response_time"][k]) for k in keys
+    }
+    report["throughput_rps"] = (baseline["throughput_rps"], current["throughput_rps"])
+    report["error_rate"] = (baseline["error_rate"], current["error_rate"])
+    return {
+        key: {"baseline": old, "current": new, "change": f"{(new - old) / old:+.1%}" if old else None}
+        for key, (old, new) in report.items()
+    }
+
+
+def cmd_record(args) -> None:
+    entries = list(iter_workload(args.sources, loop=False))
+    if not entries:
+        raise SystemExit("No GraphQL request bodies found in the sources")
+    rng = random.Random(args.seed)
+    count = 0
+    with open(args.output, "w") as f:
+        for offset in arrival_offsets(args.rate, args.arrival, args.seed):
+            if offset >= args.duration:
+                break
+            name, body, _ = entries[count % len(entries)] if args.order == "cycle" else rng.choice(entries)
+            f.write(json.dumps({"offset": round(offset, 6), "name": name, "body": json.loads(body)}) + "\n")
+            count += 1
+    print(json.dumps({"output": args.output, "requests": count, "distinct_bodies": len(entries)}, indent=2))
+
+
+def cmd_run(args) -> None:
+    if args.schedule == "rate" and not (args.duration or args.requests):
+        raise SystemExit("--schedule rate needs --duration or --requests")
+    replayer = Replayer(args.url, args.connections, args.timeout, args.max_outstanding, not args.ignore_graphql_errors)
+    elapsed = asyncio.run(replayer.run(build_schedule(args), args.duration if args.schedule == "rate" else 0))
+    report = replayer.summary(elapsed, args.rate if args.schedule == "rate" else None)
+    if args.compare:
+        with open(args.compare) as f:
+            report["compared_to"] = {"file": args.compare, **compare(report, json.load(f))}
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    print(json.dumps(report, indent=2))
+
+
+def main_cli():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def add_arrival(p):
+        p.add_argument("--rate", type=float, default=100.0, help="arrivals per second")
+        p.add_argument("--arrival", choices=("constant", "poisson"), default="poisson",
+                       help="inter-arrival distribution")
+        p.add_argument("--seed", type=int, default=1, help="random seed for Poisson arrivals and body order")
+
+    record = commands.add_parser("record", help="write a replayable JSONL schedule")
+    record.add_argument("sources", nargs="+", help="JSONL captures, .json bodies or directories of them")
+    add_arrival(record)
+    record.add_argument("--duration", type=float, default=60.0, help="schedule length in seconds")
+    record.add_argument("--order", choices=("random", "cycle"), default="random", help="how bodies are picked")
+    record.add_argument("-o", "--output", default="workload.jsonl", help="schedule file to write")
+    record.set_defaults(func=cmd_record)
+
+    run = commands.add_parser("run", help="replay sources open-loop and report latency")
+    run.add_argument("sources", nargs="+", help="JSONL captures/schedules, .json bodies or directories of them")
+    run.add_argument("--url", default="http://localhost:4003/graphql", help="GraphQL endpoint")
+    run.add_argument("--schedule", choices=("rate", "recorded"), default="rate",
+                     help="send at --rate, or at each record's `offset`")
+    add_arrival(run)
+    run.add_argument("--duration", type=float, default=0.0, help="seconds to send for (rate schedule)")
+    run.add_argument("--requests", type=int, default=0, help="requests to send (rate schedule, instead of --duration)")
+    run.add_argument("--speed", type=float, default=1.0, help="time compression of a recorded schedule")
+    run.add_argument("--connections", type=int, default=64, help="maximum open keep-alive connections")
+    run.add_argument("--timeout", type=float, default=10.0, help="seconds from intended send before a timeout")
+    run.add_argument("--max-outstanding", type=int, default=10000,
+                     help="requests pending before further arrivals are dropped")
+    run.add_argument("--ignore-graphql-errors", action="store_true",
+                     help="count 200 responses with `errors` as successes")
+    run.add_argument("--output", help="also write the summary to this file")
+    run.add_argument("--compare", help="previous summary to compare against")
+    run.set_defaults(func=cmd_run)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,33 @@
+"""
+Synthetic catalog generator shared by the products subgraph benchmarks
+Produces records in the same shape as PRODUCTS_DATA in main.py
+"""
+import random
+from typing import List
+
+CATEGORIES = ["Telescopes", "Binoculars", "Books & Charts", "Accessories", "Models"]
+
+
+def make_products(count: int, seed: int = 42) -> List[dict]:
+    """
+    Generate `count` deterministic product records.
+
+    Args:
+        count: Number of products to generate
+        seed: RNG seed so runs are comparable across commits
+
+    Returns:
+        List of product dicts with string ids "1".."count"
+    """
+    rng = random.Random(seed)
+    return [
+        {
+            "id": str(i),
+            "name": f"Synthetic Product {i}",
+            "price": round(rng.uniform(5, 2000), 2),
+            "description": f"Synthetic catalog entry number {i}",
+            "category": rng.choice(CATEGORIES),
+            "inStock": rng.random() < 0.8,
+        }
+        for i in range(1, count + 1)
+    ]
@@ -0,0 +1,137 @@
+"""
+Bounded LRU cache with optional TTL and size weighting
+Shared building block for the products subgraph's in-process caches
+"""
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Generic, Hashable, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+_MISSING = object()
+
+
+class LRUCache(Generic[V]):
+    """
+    Least-recently-used cache bounded by entry count and, optionally, total weight.
+
+    Entries older than `ttl` seconds are treated as misses and dropped on access.
+    Not thread-safe: each event loop (uvicorn worker) owns its own instance.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: Optional[float] = None,
+        max_weight: Optional[int] = None,
+        weigher: Callable[[V], int] = lambda value: 1,
+        on_evict: Optional[Callable[[Hashable, V], None]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        """
+        Args:
+            maxsize: Maximum number of entries
+            ttl: Time-to-live in seconds (None = entries never expire)
+            max_weight: Maximum total weight of all entries (None = unbounded)
+            weigher: Returns the weight of a value (e.g. its size in bytes)
+            on_evict: Called with (key, value) whenever an entry is evicted for space
+            clock: Monotonic time source (injectable for tests)
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.max_weight = max_weight
+        self.weigher = weigher
+        self.on_evict = on_evict
+        self.clock = clock
+
+        # key -> (value, weight, expires_at)
+        self._data: "OrderedDict[Hashable, Tuple[V, int, float]]" = OrderedDict()
+        self.weight = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return self.get(key, _MISSING) is not _MISSING
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """
+        Get a value and mark it most recently used.
+
+        Args:
+            key: Cache key
+            default: Returned on a miss or when the entry has expired
+
+        Returns:
+            The cached value or `default`
+        """
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+
+        value, weight, expires_at = entry
+        if expires_at and expires_at <= self.clock():
+            self._remove(key, weight)
+            self.expirations += 1
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: V) -> bool:
+        """
+        Insert or replace a value, evicting least-recently-used entries as needed.
+
+        Args:
+            key: Cache key
+            value: Value to store
+
+        Returns:
+            False if the value alone exceeds `max_weight` and was not stored
+        """
+        weight = self.weigher(value)
+        if self.max_weight is not None and weight > self.max_weight:
+            return False
+
+        existing = self._data.pop(key, None)
+        if existing is not None:
+            self.weight -= existing[1]
+
+        expires_at = self.clock() + self.ttl if self.ttl else 0.0
+        self._data[key] = (value, weight, expires_at)
+        self.weight += weight
+
+        while len(self._data) > self.maxsize or (
+            self.max_weight is not None and self.weight > self.max_weight
+        ):
+            old_key, (old_value, old_weight, _) = self._data.popitem(last=False)
+            self.weight -= old_weight
+            self.evictions += 1
+            if self.on_evict is not None:
+                self.on_evict(old_key, old_value)
+        return True
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove an entry and return its value (or `default`)."""
+        entry = self._data.get(key)
+        if entry is None:
+            return default
+        self._remove(key, entry[1])
+        return entry[0]
+
+    def clear(self) -> None:
+        """Drop every entry (statistics are kept)."""
+        self._data.clear()
+        self.weight = 0
+
+    def _remove(self, key: Hashable, weight: int) -> None:
+        del self._data[key]
+        self.weight -= weight
@@ -0,0 +1,304 @@
+"""
+Indexed product catalog for the products subgraph
+Builds id, category, stock, price, "top" and positional indexes once so resolvers never scan the raw product list
+Products are materialized once as immutable ProductRecord objects shared by all requests
+"""
+import sys
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+
+class ProductRecord:
+    """
+    Immutable, slot-backed product served directly by the GraphQL resolvers.
+
+    Attribute names match the fields of the Strawberry `Product` type, so
+    resolvers can return catalog records as-is instead of copying them.
+    """
+
+    __slots__ = ("id", "name", "price", "description", "category", "in_stock", "rank")
+
+    id: str
+    name: str
+    price: float
+    description: Optional[str]
+    category: Optional[str]
+    in_stock: bool
+    rank: Optional[float]
+
+    def __init__(
+        self,
+        id: str,
+        name: str,
+        price: float,
+        description: Optional[str] = None,
+        category: Optional[str] = None,
+        in_stock: bool = False,
+        rank: Optional[float] = None,
+    ):
+        setter = object.__setattr__
+        setter(self, "id", id)
+        setter(self, "name", name)
+        setter(self, "price", price)
+        setter(self, "description", description)
+        setter(self, "category", category)
+        setter(self, "in_stock", in_stock)
+        setter(self, "rank", rank)
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "ProductRecord":
+        """
+        Build a record from a raw product dict (PRODUCTS_DATA format).
+
+        Args:
+            data: Dict with "id", "name", "price" and optional "description",
+                "category", "inStock" and "rank" keys
+
+        Returns:
+            The immutable record
+        """
+        return cls(
+            # Ids are GraphQL IDs: numeric ids in catalog files must match product(id: "1")
+            id=str(data["id"]),
+            name=data["name"],
+            price=data["price"],
+            description=data.get("description"),
+            category=data.get("category"),
+            in_stock=data.get("inStock", False),
+            rank=data.get("rank"),
+        )
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"ProductRecord is immutable (cannot set {name!r})")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"ProductRecord is immutable (cannot delete {name!r})")
+
+    def __repr__(self) -> str:
+        return f"ProductRecord(id={self.id!r}, name={self.name!r})"
+
+
+def _price_key(record: ProductRecord) -> float:
+    """Sort key of the price index; sorted() is stable, so equal prices keep catalog order."""
+    return float(record.price)
+
+
+def _top_key(record: ProductRecord) -> Tuple[bool, float]:
+    """Sort key for the "top" ordering: ranked records first, then catalog order."""
+    rank = record.rank
+    return (rank is None, rank if rank is not None else 0)
+
+
+class Catalog:
+    """
+    Read-only, indexed view over a list of product records.
+
+    All indexes are built once in the constructor; lookups are O(1) by id,
+    O(1) by category and O(limit) for the top products and for a page
+    at any catalog position. Filtered pages (by category and/or stock status)
+    are O(limit) slices of prebuilt indexes, and price ranges are located by
+    binary search over price-sorted arrays, so they cost O(log n + limit).
+    """
+
+    def __init__(self, records: Iterable[Mapping]):
+        """
+        Build the catalog indexes.
+
+        Args:
+            records: Product records (dicts with at least an "id" key, or
+                ProductRecord instances). Records with an optional numeric
+                "rank" are ordered first in `top()`; the rest keep their
+                catalog order.
+        """
+        self._records: Tuple[ProductRecord, ...] = tuple(
+            r if isinstance(r, ProductRecord) else ProductRecord.from_dict(r)
+            for r in records
+        )
+
+        self._by_id: Dict[str, ProductRecord] = {}
+        by_category: Dict[Optional[str], List[ProductRecord]] = {}
+        # Keyed by (category, in_stock); in_stock None holds every record of the category
+        by_category_stock: Dict[Tuple[Optional[str], Optional[bool]], List[ProductRecord]] = {}
+        by_stock: Dict[bool, List[ProductRecord]] = {True: [], False: []}
+        for record in self._records:
+            # First record wins on duplicate ids, matching the old linear scan
+            self._by_id.setdefault(record.id, record)
+            by_category.setdefault(record.category, []).append(record)
+            by_category_stock.setdefault((record.category, bool(record.in_stock)), []).append(record)
+            by_stock[bool(record.in_stock)].append(record)
+
+        self._by_category: Dict[Optional[str], Tuple[ProductRecord, ...]] = {
+            category: tuple(items) for category, items in by_category.items()
+        }
+        self._by_category_stock: Dict[Tuple[Optional[str], Optional[bool]], Tuple[ProductRecord, ...]] = {
+            key: tuple(items) for key, items in by_category_stock.items()
+        }
+        for category, items in self._by_category.items():
+            self._by_category_stock[(category, None)] = items
+        self._by_stock: Dict[Optional[bool], Tuple[ProductRecord, ...]] = {
+            True: tuple(by_stock[True]), False: tuple(by_stock[False]), None: self._records,
+        }
+
+        # Price-sorted records (ties in catalog order) with a parallel array of prices to bisect,
+        # one pair for every stock filter
+        self._by_price: Dict[Optional[bool], Tuple[List[float], Tuple[ProductRecord, ...]]] = {}
+        for in_stock, items in self._by_stock.items():
+            ordered = tuple(sorted(items, key=_price_key))
+            self._by_price[in_stock] = ([float(r.price) for r in ordered], ordered)
+
+        self._top: Tuple[ProductRecord, ...] = tuple(sorted(self._records, key=_top_key))
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def footprint(self) -> int:
+        """
+        Estimate the memory held by the records, their values and every index, in bytes.
+
+        Shared objects (e.g. category strings) are counted once. Takes O(n) time,
+        so call it when a catalog is built, not per request.
+        """
+        seen = set()
+        total = 0
+
+        def add(obj) -> None:
+            nonlocal total
+            if id(obj) not in seen:
+                seen.add(id(obj))
+                total += sys.getsizeof(obj)
+
+        for record in self._records:
+            add(record)
+            for name in ProductRecord.__slots__:
+                add(getattr(record, name))
+        for container in (self._records, self._by_id, self._by_category, self._by_category_stock,
+                          self._by_stock, self._by_price, self._top):
+            add(container)
+        for index in (self._by_category, self._by_category_stock, self._by_stock):
+            for items in index.values():
+                add(items)
+        for prices, ordered in self._by_price.values():
+            add(prices)
+            add(ordered)
+            for price in prices:
+                add(price)
+        return total
+
+    def all(self) -> Tuple[ProductRecord, ...]:
+        """Return every record in catalog order."""
+        return self._records
+
+    def page(self, offset: int, limit: int) -> Tuple[ProductRecord, ...]:
+        """
+        Return up to `limit` records starting at catalog position `offset`.
+
+        Args:
+            offset: Zero-based position of the first record (e.g. from a cursor)
+            limit: Maximum number of records
+
+        Returns:
+            The records, in catalog order
+        """
+        return self._records[offset:offset + limit]
+
+    def get(self, id: str) -> Optional[ProductRecord]:
+        """
+        Look up a single record by id.
+
+        Args:
+            id: Product identifier
+
+        Returns:
+            The record, or None if the id is unknown
+        """
+        return self._by_id.get(id)
+
+    def get_many(self, ids: Sequence[str]) -> List[Optional[ProductRecord]]:
+        """
+        Look up several records by id in one call.
+
+        Args:
+            ids: Product identifiers (duplicates allowed)
+
+        Returns:
+            Records aligned with `ids`, with None for unknown ids
+        """
+        lookup = self._by_id.get
+        return [lookup(id) for id in ids]
+
+    def by_category(self, category: str) -> Tuple[ProductRecord, ...]:
+        """Return all records in a category, in catalog order."""
+        return self._by_category.get(category, ())
+
+    def category_page(
+        self, category: str, offset: int, limit: int, in_stock: Optional[bool] = None
+    ) -> Tuple[ProductRecord, ...]:
+        """
+        Return up to `limit` records of a category starting at position `offset` within it.
+
+        Args:
+            category: Category name
+            offset: Zero-based position in the category's catalog-ordered index
+            limit: Maximum number of records
+            in_stock: Only records with this stock status (None = any)
+
+        Returns:
+            The records, in catalog order
+        """
+        return self._by_category_stock.get((category, in_stock), ())[offset:offset + limit]
+
+    def stock_page(self, in_stock: bool, offset: int, limit: int) -> Tuple[ProductRecord, ...]:
+        """
+        Return up to `limit` records with the given stock status, starting at position `offset`.
+
+        Args:
+            in_stock: Stock status to select
+            offset: Zero-based position in the stock index
+            limit: Maximum number of records
+
+        Returns:
+            The records, in catalog order
+        """
+        return self._by_stock[in_stock][offset:offset + limit]
+
+    def price_range(
+        self,
+        minimum: Optional[float],
+        maximum: Optional[float],
+        offset: int,
+        limit: int,
+        in_stock: Optional[bool] = None,
+    ) -> Tuple[ProductRecord, ...]:
+        """
+        Return up to `limit` records priced within [minimum, maximum], cheapest first.
+
+        The range is found by binary search over the price index, so the cost is
+        O(log n + limit) whatever the catalog size.
+
+        Args:
+            minimum: Lowest price included (None = unbounded)
+            maximum: Highest price included (None = unbounded)
+            offset: Zero-based position within the matching range
+            limit: Maximum number of records
+            in_stock: Only records with this stock status (None = any)
+
+        Returns:
+            The records, ordered by price (ties in catalog order)
+        """
+        prices, ordered = self._by_price[in_stock]
+        low = 0 if minimum is None else bisect_left(prices, minimum)
+        high = len(prices) if maximum is None else bisect_right(prices, maximum)
+        start = low + offset
+        return ordered[start:min(start + limit, high)] if start < high else ()
+
+    def top(self, limit: int) -> Tuple[ProductRecord, ...]:
+        """
+        Return the first `limit` records of the precomputed top ordering.
+
+        Args:
+            limit: Maximum number of records (slice semantics, like the old list slice)
+
+        Returns:
+            Up to `limit` records
+        """
+        return self._top[:limit]
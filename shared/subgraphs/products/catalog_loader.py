@@ -0,0 +1,339 @@
+"""
+File-backed product catalog with zero-downtime hot reload for the products subgraph
+Catalog files (JSON array, JSONL, optionally gzip-compressed) are parsed as a stream; on change
+a complete new Catalog snapshot is built in a worker thread and swapped in atomically, so
+in-flight requests keep reading the snapshot they started with
+"""
+import asyncio
+import gzip
+import json
+import mmap
+import os
+import time
+from typing import IO, Any, Dict, Iterator, Mapping, Optional, Tuple
+
+from opentelemetry import metrics
+from opentelemetry.metrics import CallbackOptions, Observation
+
+import json_codec
+from backends import InMemoryBackend, ProductBackend
+from catalog import Catalog, ProductRecord
+
+meter = metrics.get_meter(__name__)
+
+_reload_duration = meter.create_histogram(
+    "products.catalog.reload.duration",
+    unit="s",
+    description="Time to parse and index a catalog file, by outcome",
+)
+_reloads = meter.create_counter(
+    "products.catalog.reloads", unit="{reload}", description="Catalog loads from file, by outcome"
+)
+
+# Characters skipped between the elements of a streamed JSON array
+_ARRAY_SEPARATORS = " \t\r\n,"
+
+# (mtime_ns, size, inode) identifying one version of the catalog file
+FileSignature = Tuple[int, int, int]
+
+
+def _iter_json_array(stream: IO[str], chunk_size: int = 1 << 20) -> Iterator[Any]:
+    """
+    Yield the elements of a top-level JSON array, reading `chunk_size` characters at a time.
+
+    Raises:
+        ValueError: If the document is not a well-formed array
+    """
+    decoder = json.JSONDecoder()
+    buffer = stream.read(chunk_size).lstrip()
+    if not buffer.startswith("["):
+        raise ValueError("catalog JSON must be an array of products")
+    pos = 1
+    while True:
+        while pos < len(buffer) and buffer[pos] in _ARRAY_SEPARATORS:
+            pos += 1
+        if pos == len(buffer):
+            more = stream.read(chunk_size)
+            if not more:
+                raise ValueError("unterminated JSON array")
+            buffer, pos = more, 0
+            continue
+        if buffer[pos] == "]":
+            return
+        try:
+            element, end = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            # Element cut off at the end of the buffer: read on and retry
+            more = stream.read(chunk_size)
+            if not more:
+                raise
+            buffer, pos = buffer[pos:] + more, 0
+            continue
+        yield element
+        pos = end
+        if pos > chunk_size:
+            buffer, pos = buffer[pos:], 0
+
+
+def _iter_json_lines(lines) -> Iterator[Any]:
+    for line in lines:
+        line = line.strip()
+        if line:
+            yield json_codec.loads(line)
+
+
+def iter_catalog_file(path: str, mmap_threshold: int = 64 * 1024 * 1024) -> Iterator[Mapping[str, Any]]:
+    """
+    Stream the product dicts of a catalog file without reading it into memory at once.
+
+    Args:
+        path: `.json` (array of products), `.jsonl` (one product per line), either
+            optionally gzip-compressed (`.json.gz`, `.jsonl.gz`)
+        mmap_threshold: Uncompressed JSONL files at least this large are read through a
+            read-only memory map, which skips copying the file through read() buffers.
+            It does not lower memory use: every record is materialized either way
+
+    Returns:
+        Iterator of product dicts in PRODUCTS_DATA format
+    """
+    compressed = path.endswith(".gz")
+    lines_format = path[:-3 if compressed else None].endswith(".jsonl")
+
+    if compressed:
+        with gzip.open(path, "rb" if lines_format else "rt", encoding=None if lines_format else "utf-8") as f:
+            yield from _iter_json_lines(f) if lines_format else _iter_json_array(f)
+        return
+    if not lines_format:
+        with open(path, encoding="utf-8") as f:
+            yield from _iter_json_array(f)
+        return
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if size and size >= mmap_threshold:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                yield from _iter_json_lines(iter(mapped.readline, b""))
+        else:
+            yield from _iter_json_lines(f)
+
+
+def load_catalog(path: str, mmap_threshold: int = 64 * 1024 * 1024) -> Catalog:
+    """
+    Parse a catalog file and build its indexed snapshot.
+
+    Records are converted to immutable ProductRecords as they are parsed, so the
+    raw dicts never have to be held in memory all at once.
+
+    Args:
+        path: Catalog file (see iter_catalog_file)
+        mmap_threshold: See iter_catalog_file
+
+    Returns:
+        The new catalog
+
+    Raises:
+        OSError: If the file cannot be read
+        ValueError: If the file or one of its records is invalid
+    """
+    def records() -> Iterator[ProductRecord]:
+        for number, data in enumerate(iter_catalog_file(path, mmap_threshold), 1):
+            try:
+                yield ProductRecord.from_dict(data)
+            except (KeyError, TypeError, AttributeError) as e:
+                raise ValueError(f"{path}: product #{number} is invalid ({e!r})") from e
+
+    return Catalog(records())
+
+
+class CatalogReloader:
+    """
+    Serves an InMemoryBackend's catalog from a file and hot-reloads it on change.
+
+    The file's (mtime, size, inode) is polled; a changed file is parsed and indexed in
+    a worker thread into a complete new Catalog, which then replaces the old one in a
+    single reference swap on the event loop (copy-on-write: published snapshots are
+    never modified). Requests pin the snapshot current when they start (see
+    InMemoryBackend.snapshot). A file that fails to load is reported and the
+    previous catalog stays in service. Replace the file atomically (write a temporary
+    file, then rename it) so a reload never sees a partially written catalog.
+    """
+
+    def __init__(
+        self,
+        backend: InMemoryBackend,
+        path: str,
+        poll_interval: float = 5.0,
+        mmap_threshold: int = 64 * 1024 * 1024,
+    ):
+        """
+        Args:
+            backend: Backend whose catalog is replaced on reload
+            path: Catalog file (see iter_catalog_file)
+            poll_interval: Seconds between file checks (0 = load once, no watching)
+            mmap_threshold: See iter_catalog_file
+        """
+        self.backend = backend
+        self.path = path
+        self.poll_interval = poll_interval
+        self.mmap_threshold = mmap_threshold
+
+        self._signature: Optional[FileSignature] = None
+        self._footprint = 0
+        self._loaded_at: Optional[float] = None
+        self._last_duration: Optional[float] = None
+        self._last_error: Optional[str] = None
+        self._reload_requested = asyncio.Event()
+
+        meter.create_observable_gauge(
+            "products.catalog.size", callbacks=[self._observe_size],
+            unit="{product}", description="Products in the served catalog",
+        )
+        meter.create_observable_gauge(
+            "products.catalog.memory", callbacks=[self._observe_memory],
+            unit="By", description="Estimated memory held by the served catalog and its indexes",
+        )
+
+    @classmethod
+    def from_env(cls, backend: ProductBackend) -> Optional["CatalogReloader"]:
+        """
+        Build the reloader from environment variables.
+
+        Environment variables:
+            PRODUCTS_CATALOG_FILE: Catalog file to serve instead of the built-in sample data
+                (.json, .jsonl, optionally .gz; default: unset)
+            PRODUCTS_CATALOG_RELOAD_SECONDS: File check interval (default: 5, 0 = never reload)
+            PRODUCTS_CATALOG_MMAP_MIN_BYTES: Memory-map uncompressed JSONL files from this size
+                (default: 67108864)
+
+        Args:
+            backend: The configured product backend
+
+        Returns:
+            The reloader, or None when no catalog file is configured
+        """
+        path = os.getenv("PRODUCTS_CATALOG_FILE")
+        if not path:
+            return None
+        if not isinstance(backend, InMemoryBackend):
+            print(f"⚠️  PRODUCTS_CATALOG_FILE is ignored by the {backend.name} backend")
+            return None
+        return cls(
+            backend,
+            path,
+            poll_interval=float(os.getenv("PRODUCTS_CATALOG_RELOAD_SECONDS", "5")),
+            mmap_threshold=int(os.getenv("PRODUCTS_CATALOG_MMAP_MIN_BYTES", str(64 * 1024 * 1024))),
+        )
+
+    def _observe_size(self, options: CallbackOptions):
+        yield Observation(len(self.backend.catalog))
+
+    def _observe_memory(self, options: CallbackOptions):
+        if self._footprint:
+            yield Observation(self._footprint)
+
+    def _file_signature(self) -> Optional[FileSignature]:
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size, st.st_ino
+
+    def _build(self) -> Tuple[Catalog, int]:
+        catalog = load_catalog(self.path, self.mmap_threshold)
+        return catalog, catalog.footprint()
+
+    def _record(self, outcome: str, duration: float) -> None:
+        attributes = {"outcome": outcome}
+        _reload_duration.record(duration, attributes)
+        _reloads.add(1, attributes)
+        self._last_duration = duration
+
+    def load_initial(self) -> bool:
+        """
+        Load the catalog file synchronously (at startup, before serving).
+
+        Returns:
+            True if the file was loaded; on failure the backend keeps its current catalog
+        """
+        signature = self._file_signature()
+        start = time.perf_counter()
+        try:
+            catalog, footprint = self._build()
+        except (OSError, ValueError) as e:
+            self._record("failure", time.perf_counter() - start)
+            self._last_error = str(e)
+            print(f"⚠️  Could not load catalog file {self.path}: {e}; serving the built-in catalog")
+            return False
+        self._publish(catalog, footprint, signature, time.perf_counter() - start)
+        return True
+
+    async def reload(self, force: bool = False) -> bool:
+        """
+        Reload the catalog file if it changed since the last load.
+
+        Args:
+            force: Reload even if the file looks unchanged
+
+        Returns:
+            True if a new catalog was swapped in
+        """
+        signature = self._file_signature()
+        if signature is None or (signature == self._signature and not force):
+            return False
+        start = time.perf_counter()
+        try:
+            catalog, footprint = await asyncio.to_thread(self._build)
+        except (OSError, ValueError) as e:
+            self._record("failure", time.perf_counter() - start)
+            # Remember the broken version so it is not parsed again on every poll
+            self._signature = signature
+            self._last_error = str(e)
+            print(f"⚠️  Catalog reload from {self.path} failed, keeping the current catalog: {e}")
+            return False
+        self._publish(catalog, footprint, signature, time.perf_counter() - start)
+        return True
+
+    def _publish(self, catalog: Catalog, footprint: int, signature: Optional[FileSignature], duration: float):
+        # A single reference swap: requests already running keep their pinned snapshot
+        self.backend.replace(catalog)
+        self._signature = signature
+        self._footprint = footprint
+        self._loaded_at = time.time()
+        self._last_error = None
+        self._record("success", duration)
+        print(f"📦 Catalog loaded from {self.path}: {len(catalog)} products in {duration * 1000:.0f} ms")
+
+    async def watch(self) -> None:
+        """Poll the file and reload it on change until cancelled (run as a task from the ASGI lifespan)."""
+        timeout = self.poll_interval if self.poll_interval > 0 else None
+        while True:
+            try:
+                await asyncio.wait_for(self._reload_requested.wait(), timeout)
+                force = True
+            except asyncio.TimeoutError:
+                force = False
+            self._reload_requested.clear()
+            await self.reload(force=force)
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return the state of the served catalog (for the admin endpoint)."""
+        return {
+            "path": self.path,
+            "products": len(self.backend.catalog),
+            "memoryBytes": self._footprint,
+            "loadedAt": self._loaded_at,
+            "lastReloadSeconds": self._last_duration,
+            "lastError": self._last_error,
+            "pollIntervalSeconds": self.poll_interval,
+        }
+
+    def update(self, config: Mapping[str, Any]) -> Dict[str, Any]:
+        """
+        Request an immediate reload with {"reload": true} (picked up by `watch`).
+
+        Raises:
+            ValueError: For any other request
+        """
+        if config.get("reload") is not True or set(config) - {"reload"}:
+            raise ValueError('expected {"reload": true}')
+        self._reload_requested.set()
+        return self.snapshot()
@@ -0,0 +1,190 @@
+"""
+Response compression for the products GraphQL endpoint
+Compresses complete JSON responses with gzip or Brotli, negotiated through the request's
+Accept-Encoding header; streamed (multipart) responses pass through unchanged
+"""
+import asyncio
+import gzip
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from opentelemetry import metrics
+
+try:
+    import brotli
+except ImportError:  # Optional dependency (`pip install brotli`)
+    brotli = None
+
+meter = metrics.get_meter(__name__)
+
+_input_bytes = meter.create_counter(
+    "products.response_compression.input_bytes", unit="By", description="Response bytes before compression"
+)
+_output_bytes = meter.create_counter(
+    "products.response_compression.output_bytes", unit="By", description="Response bytes after compression"
+)
+
+SUPPORTED_ENCODINGS = ("br", "gzip")
+
+# Bodies at least this large are compressed in a worker thread (zlib and brotli release
+# the GIL) so one 100k-product response does not stall every other request on the loop
+THREAD_THRESHOLD = 256 * 1024
+
+
+def parse_accept_encoding(header: str) -> Dict[str, float]:
+    """
+    Parse an Accept-Encoding header into {coding: q-value}.
+
+    Args:
+        header: Header value, e.g. "gzip, br;q=0.9, *;q=0"
+
+    Returns:
+        Lower-cased codings mapped to their weight (1.0 when not given)
+    """
+    accepted = {}
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        if not coding:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip().lower()] = q
+    return accepted
+
+
+class CompressionMiddleware:
+    """
+    Pure ASGI middleware compressing JSON responses the client accepts compressed.
+
+    Only responses sent as a single body message are compressed; streamed
+    responses pass through unchanged.
+    Place it outside the response cache so cached bodies stay uncompressed
+    and can be served with any negotiated encoding.
+    """
+
+    def __init__(
+        self,
+        app,
+        encodings: Iterable[str] = ("gzip",),
+        minimum_size: int = 1024,
+        gzip_level: int = 5,
+        brotli_quality: int = 4,
+    ):
+        """
+        Args:
+            app: The wrapped ASGI app
+            encodings: Encodings the server may use, in order of preference
+            minimum_size: Smaller bodies are sent uncompressed
+            gzip_level: gzip compression level (1-9)
+            brotli_quality: Brotli quality (0-11; higher levels cost far more CPU)
+        """
+        self.app = app
+        self.encodings = tuple(e for e in encodings if e != "br" or brotli is not None)
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+
+    @classmethod
+    def from_env(cls, app) -> Optional["CompressionMiddleware"]:
+        """
+        Build the middleware from environment variables.
+
+        Environment variables:
+            PRODUCTS_RESPONSE_COMPRESSION: Comma-separated encodings in order of preference,
+                e.g. "br,gzip" (default: empty, compression disabled)
+            PRODUCTS_COMPRESSION_MIN_BYTES: Minimum body size to compress (default: 1024)
+            PRODUCTS_GZIP_LEVEL: gzip level (default: 5)
+            PRODUCTS_BROTLI_QUALITY: Brotli quality (default: 4)
+
+        Returns:
+            The middleware, or None when compression is disabled
+        """
+        encodings = [
+            e.strip().lower() for e in os.getenv("PRODUCTS_RESPONSE_COMPRESSION", "").split(",") if e.strip()
+        ]
+        for encoding in encodings:
+            if encoding not in SUPPORTED_ENCODINGS:
+                print(f"⚠️  Unknown response compression '{encoding}', supported: {', '.join(SUPPORTED_ENCODINGS)}")
+            elif encoding == "br" and brotli is None:
+                print("⚠️  Brotli response compression requires the brotli package, skipping 'br'")
+        encodings = [e for e in encodings if e in SUPPORTED_ENCODINGS]
+        if not encodings:
+            return None
+        return cls(
+            app,
+            encodings,
+            minimum_size=int(os.getenv("PRODUCTS_COMPRESSION_MIN_BYTES", "1024")),
+            gzip_level=int(os.getenv("PRODUCTS_GZIP_LEVEL", "5")),
+            brotli_quality=int(os.getenv("PRODUCTS_BROTLI_QUALITY", "4")),
+        )
+
+    def negotiate(self, headers: List[Tuple[bytes, bytes]]) -> Optional[str]:
+        """Return the preferred encoding the client accepts, or None."""
+        header = b",".join(v for k, v in headers if k == b"accept-encoding")
+        if not header:
+            return None
+        accepted = parse_accept_encoding(header.decode("latin-1"))
+        wildcard = accepted.get("*", 0.0)
+        for encoding in self.encodings:
+            if accepted.get(encoding, wildcard) > 0:
+                return encoding
+        return None
+
+    def compress(self, encoding: str, body: bytes) -> bytes:
+        """Compress a body with the given encoding."""
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+    async def __call__(self, scope, receive, send):
+        encoding = self.negotiate(scope["headers"]) if scope["type"] == "http" else None
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start = None
+
+        async def compressing_send(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                # Held back until the first body message shows whether to compress
+                start = message
+                return
+            if message["type"] != "http.response.body" or start is None:
+                await send(message)
+                return
+
+            held, start = start, None
+            body = message.get("body", b"")
+            headers = held.get("headers", [])
+            if (
+                message.get("more_body", False)
+                or len(body) < self.minimum_size
+                or any(k == b"content-encoding" for k, _ in headers)
+                or not any(k == b"content-type" and v.startswith(b"application/json") for k, v in headers)
+            ):
+                await send(held)
+                await send(message)
+                return
+
+            if len(body) >= THREAD_THRESHOLD:
+                compressed = await asyncio.to_thread(self.compress, encoding, body)
+            else:
+                compressed = self.compress(encoding, body)
+            attributes = {"content.encoding": encoding}
+            _input_bytes.add(len(body), attributes)
+            _output_bytes.add(len(compressed), attributes)
+
+            headers = [(k, v) for k, v in headers if k != b"content-length"]
+            headers.append((b"content-encoding", encoding.encode()))
+            headers.append((b"content-length", str(len(compressed)).encode()))
+            headers.append((b"vary", b"Accept-Encoding"))
+            await send({**held, "headers": headers})
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, compressing_send)
@@ -0,0 +1,83 @@
+"""
+Parsed/validated GraphQL document cache for the products subgraph
+Configures Strawberry's ParserCache and ValidationCache extensions, so query strings
+seen before skip parsing and validation, and reports their hit rate as metrics
+"""
+import os
+import weakref
+from typing import Iterable, List, Optional
+
+from opentelemetry import metrics
+from opentelemetry.metrics import CallbackOptions, Observation
+from strawberry.extensions import ParserCache, SchemaExtension, ValidationCache
+
+meter = metrics.get_meter(__name__)
+
+# Every live cache, so the observable instruments below are registered once
+_caches: "weakref.WeakSet[DocumentCache]" = weakref.WeakSet()
+
+
+def _observe(field: str):
+    def callback(options: CallbackOptions) -> Iterable[Observation]:
+        yield Observation(sum(getattr(cache.parser_info(), field) for cache in list(_caches)))
+
+    return callback
+
+
+meter.create_observable_counter(
+    "products.document_cache.hits",
+    callbacks=[_observe("hits")],
+    unit="{request}",
+    description="Operations whose parsed document was cached",
+)
+meter.create_observable_counter(
+    "products.document_cache.misses",
+    callbacks=[_observe("misses")],
+    unit="{request}",
+    description="Operations that had to be parsed",
+)
+meter.create_observable_gauge(
+    "products.document_cache.size",
+    callbacks=[_observe("currsize")],
+    unit="{entry}",
+    description="Parsed documents held in the cache",
+)
+
+
+class DocumentCache:
+    """
+    Bounded LRU caches of parsed documents (keyed by query text and parse options)
+    and validation results (keyed by document, schema and validation rules).
+
+    Both are Strawberry's stateless extensions: the cached document object is the
+    validation cache's key, so a repeated query skips both steps.
+    """
+
+    def __init__(self, maxsize: int = 512):
+        """
+        Args:
+            maxsize: Maximum number of distinct documents kept (and validation results)
+        """
+        self.maxsize = maxsize
+        self.parser = ParserCache(maxsize=maxsize)
+        self.validation = ValidationCache(maxsize=maxsize)
+        _caches.add(self)
+
+    @classmethod
+    def from_env(cls) -> Optional["DocumentCache"]:
+        """
+        Build the cache from PRODUCTS_DOCUMENT_CACHE_SIZE (default: 512, 0 disables it).
+
+        Returns:
+            The cache, or None when disabled
+        """
+        size = int(os.getenv("PRODUCTS_DOCUMENT_CACHE_SIZE", "512"))
+        return cls(size) if size > 0 else None
+
+    def parser_info(self):
+        """Hit/miss statistics of the parser cache (a functools `_CacheInfo`)."""
+        return self.parser.cached_parse_document.cache_info()
+
+    def extensions(self) -> List[SchemaExtension]:
+        """Return the Strawberry extensions to install, parser cache first."""
+        return [self.parser, self.validation]
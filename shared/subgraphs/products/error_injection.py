@@ -1,11 +1,19 @@
 """
 Error injection utility for Python subgraphs
-Allows percentage-based error injection to test error handling and observability
+Allows percentage-based error injection and simulated backend latency
+to test error handling, timeouts and observability
 """
 
+import asyncio
+import json
+import math
 import os
 import random
-from typing import Callable, Any, Optional
+from typing import Callable, Any, Dict, Mapping, Optional, Tuple
+
+from opentelemetry import trace
+
+from runtime_config import RuntimeConfig
 
 
 def get_error_rate(service_name: str, default_rate: float = 0.0) -> float:
@@ -109,3 +117,342 @@ def with_error_injection(
         return wrapper
     else:
         return sync_wrapper
+
+
+def _env_prefix(service_name: str) -> str:
+    return service_name.upper().replace('-', '_')
+
+
+def _clamp_rate(value: Any) -> float:
+    """Parse a rate and clamp it to 0-100 (raises ValueError/TypeError when not a number)."""
+    return max(0.0, min(100.0, float(value)))
+
+
+def _env_json(name: str) -> Optional[Dict[str, Any]]:
+    value = os.getenv(name)
+    if not value:
+        return None
+    try:
+        return json.loads(value)
+    except ValueError:
+        print(f"⚠️  Ignoring invalid {name}: {value}")
+        return None
+
+
+class ErrorInjectionController(RuntimeConfig):
+    """
+    Cached, runtime-adjustable error injection rates.
+
+    Rates are parsed once and kept in an immutable snapshot that is swapped
+    atomically on update, so `should_inject` costs a couple of dict lookups
+    and one random draw. Rates can be set per operation name and per field;
+    the most specific one wins (operation > field > service default).
+
+    Configuration shape (env JSON, config file or admin endpoint):
+        {"rate": 5, "fields": {"products": 20}, "operations": {"GetProducts": 50}}
+    """
+
+    def __init__(
+        self,
+        service_name: str,
+        default_rate: float = 0.0,
+        config_file: Optional[str] = None,
+        reload_interval: float = 2.0,
+    ):
+        """
+        Args:
+            service_name: Service name (used for env var lookup, e.g. PRODUCTS_SUBGRAPH_PY_ERROR_RATE)
+            default_rate: Default error rate if not configured (0-100)
+            config_file: Optional JSON file watched for changes
+            reload_interval: Minimum seconds between config file checks
+        """
+        super().__init__(config_file, reload_interval)
+        self.service_name = service_name
+        self._config: Dict[str, Any] = {"rate": 0.0, "fields": {}, "operations": {}}
+
+        prefix = _env_prefix(service_name)
+        self._apply({"rate": get_error_rate(service_name, default_rate)})
+        rates = _env_json(f"{prefix}_ERROR_RATES")
+        if rates is not None:
+            try:
+                if not isinstance(rates, Mapping):
+                    raise TypeError("expected an object")
+                self._apply(rates)
+            except (ValueError, TypeError) as e:
+                # Keep the legacy rate rather than failing at import
+                print(f"⚠️  Ignoring invalid {prefix}_ERROR_RATES for {service_name}: {e}")
+        self.maybe_reload(force=True)
+
+    @classmethod
+    def from_env(cls, service_name: str, default_rate: float = 0.0) -> "ErrorInjectionController":
+        """
+        Build a controller using ERROR_INJECTION_CONFIG_FILE as the watched config file.
+        """
+        return cls(
+            service_name,
+            default_rate,
+            config_file=os.getenv("ERROR_INJECTION_CONFIG_FILE") or None,
+            reload_interval=float(os.getenv("ERROR_INJECTION_RELOAD_SECONDS", "2")),
+        )
+
+    def _apply(self, config: Mapping[str, Any]) -> None:
+        current = self._config
+        fields = config.get("fields", current["fields"])
+        operations = config.get("operations", current["operations"])
+        if not isinstance(fields, Mapping) or not isinstance(operations, Mapping):
+            raise TypeError("'fields' and 'operations' must be objects")
+
+        self._config = {
+            "rate": _clamp_rate(config.get("rate", current["rate"])),
+            "fields": {str(k): _clamp_rate(v) for k, v in fields.items()},
+            "operations": {str(k): _clamp_rate(v) for k, v in operations.items()},
+        }
+
+    def snapshot(self) -> Dict[str, Any]:
+        config = self._config
+        return {
+            "rate": config["rate"],
+            "fields": dict(config["fields"]),
+            "operations": dict(config["operations"]),
+        }
+
+    def active(self) -> bool:
+        """Whether any field or operation currently has a non-zero error rate."""
+        self.maybe_reload()
+        config = self._config
+        return (
+            config["rate"] > 0
+            or any(rate > 0 for rate in config["fields"].values())
+            or any(rate > 0 for rate in config["operations"].values())
+        )
+
+    def rate_for(self, field: Optional[str] = None, operation: Optional[str] = None) -> float:
+        """
+        Effective error rate for a field/operation.
+
+        Returns:
+            Error rate as a percentage (0-100)
+        """
+        config = self._config
+        if operation is not None:
+            rate = config["operations"].get(operation)
+            if rate is not None:
+                return rate
+        if field is not None:
+            rate = config["fields"].get(field)
+            if rate is not None:
+                return rate
+        return config["rate"]
+
+    def should_inject(self, field: Optional[str] = None, operation: Optional[str] = None) -> bool:
+        """Decide whether to inject an error for a field/operation."""
+        self.maybe_reload()
+        rate = self.rate_for(field, operation)
+        if rate <= 0:
+            return False
+        if rate >= 100:
+            return True
+        return self._random().random() * 100 < rate
+
+
+LATENCY_MODES = ("none", "fixed", "normal", "lognormal")
+
+
+class LatencyProfile:
+    """
+    Immutable description of a simulated latency distribution.
+
+    - fixed: always `ms`
+    - normal: mean `ms`, standard deviation `stddev_ms` (negative draws become 0)
+    - lognormal: median `ms`, shape `sigma` (right-skewed, like real backends)
+
+    Independently of the mode, `spike_rate` percent of calls get an extra
+    `spike_ms` tail spike.
+    """
+
+    __slots__ = ("mode", "ms", "stddev_ms", "sigma", "spike_rate", "spike_ms")
+
+    def __init__(
+        self,
+        mode: str = "none",
+        ms: float = 0.0,
+        stddev_ms: float = 0.0,
+        sigma: float = 0.5,
+        spike_rate: float = 0.0,
+        spike_ms: float = 0.0,
+    ):
+        if mode not in LATENCY_MODES:
+            raise ValueError(f"latency mode must be one of {', '.join(LATENCY_MODES)}")
+        self.mode = mode
+        self.ms = max(0.0, float(ms))
+        self.stddev_ms = max(0.0, float(stddev_ms))
+        self.sigma = max(0.0, float(sigma))
+        self.spike_rate = _clamp_rate(spike_rate)
+        self.spike_ms = max(0.0, float(spike_ms))
+
+    @classmethod
+    def from_dict(cls, data: Mapping[str, Any]) -> "LatencyProfile":
+        if not isinstance(data, Mapping):
+            raise TypeError("latency profile must be an object")
+        unknown = set(data) - set(cls.__slots__)
+        if unknown:
+            raise ValueError(f"unknown latency settings: {', '.join(sorted(unknown))}")
+        return cls(**data)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    @property
+    def enabled(self) -> bool:
+        return (self.mode != "none" and self.ms > 0) or (self.spike_rate > 0 and self.spike_ms > 0)
+
+    def sample(self, rng: random.Random) -> Tuple[float, bool]:
+        """
+        Draw one delay.
+
+        Returns:
+            (delay in milliseconds, whether a tail spike was added)
+        """
+        if self.mode == "fixed":
+            delay = self.ms
+        elif self.mode == "normal":
+            delay = max(0.0, rng.gauss(self.ms, self.stddev_ms))
+        elif self.mode == "lognormal" and self.ms > 0:
+            delay = rng.lognormvariate(math.log(self.ms), self.sigma)
+        else:
+            delay = 0.0
+
+        spike = self.spike_rate > 0 and rng.random() * 100 < self.spike_rate
+        if spike:
+            delay += self.spike_ms
+        return delay, spike
+
+
+_NO_LATENCY = LatencyProfile()
+
+
+class LatencyInjector(RuntimeConfig):
+    """
+    Runtime-adjustable latency injection, per service or per field.
+
+    Delays are awaited with `asyncio.sleep`, so the event loop keeps serving
+    other requests while a resolver is "slow". Every injected delay is
+    recorded on the current span as a `latency.injected` event and an
+    `injection.latency_ms` attribute.
+
+    Configuration shape (env, config file or admin endpoint):
+        {"default": {"mode": "lognormal", "ms": 20, "sigma": 0.6, "spike_rate": 1, "spike_ms": 800},
+         "fields": {"_entities": {"mode": "fixed", "ms": 5}}}
+    """
+
+    def __init__(
+        self,
+        service_name: str,
+        config_file: Optional[str] = None,
+        reload_interval: float = 2.0,
+    ):
+        """
+        Args:
+            service_name: Service name (used for env var lookup, e.g. PRODUCTS_SUBGRAPH_PY_LATENCY_MODE)
+            config_file: Optional JSON file watched for changes
+            reload_interval: Minimum seconds between config file checks
+        """
+        super().__init__(config_file, reload_interval)
+        self.service_name = service_name
+        self._default = _NO_LATENCY
+        self._fields: Dict[str, LatencyProfile] = {}
+
+        prefix = _env_prefix(service_name)
+        default: Dict[str, Any] = {}
+        for key, env_suffix in (
+            ("mode", "LATENCY_MODE"),
+            ("ms", "LATENCY_MS"),
+            ("stddev_ms", "LATENCY_STDDEV_MS"),
+            ("sigma", "LATENCY_SIGMA"),
+            ("spike_rate", "LATENCY_SPIKE_RATE"),
+            ("spike_ms", "LATENCY_SPIKE_MS"),
+        ):
+            value = os.getenv(f"{prefix}_{env_suffix}")
+            if value:
+                default[key] = value.lower() if key == "mode" else value
+
+        try:
+            self._apply({"default": default, "fields": _env_json(f"{prefix}_LATENCY_FIELDS") or {}})
+        except (ValueError, TypeError) as e:
+            print(f"⚠️  Ignoring invalid latency injection settings for {service_name}: {e}")
+        self.maybe_reload(force=True)
+
+    @classmethod
+    def from_env(cls, service_name: str) -> "LatencyInjector":
+        """
+        Build an injector using LATENCY_INJECTION_CONFIG_FILE as the watched config file,
+        checked every LATENCY_INJECTION_RELOAD_SECONDS (default: 2).
+        """
+        return cls(
+            service_name,
+            config_file=os.getenv("LATENCY_INJECTION_CONFIG_FILE") or None,
+            reload_interval=float(os.getenv("LATENCY_INJECTION_RELOAD_SECONDS", "2")),
+        )
+
+    def _apply(self, config: Mapping[str, Any]) -> None:
+        default = self._default
+        if "default" in config:
+            default = LatencyProfile.from_dict(config["default"])
+
+        fields = self._fields
+        if "fields" in config:
+            if not isinstance(config["fields"], Mapping):
+                raise TypeError("'fields' must be an object")
+            fields = {str(k): LatencyProfile.from_dict(v) for k, v in config["fields"].items()}
+
+        self._default, self._fields = default, fields
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "default": self._default.to_dict(),
+            "fields": {name: profile.to_dict() for name, profile in self._fields.items()},
+        }
+
+    def active(self) -> bool:
+        """Whether any field currently gets injected latency."""
+        self.maybe_reload()
+        return self._default.enabled or any(profile.enabled for profile in self._fields.values())
+
+    def profile_for(self, field: Optional[str] = None) -> LatencyProfile:
+        """Effective latency profile for a field (field-specific profile, else the service default)."""
+        if field is not None:
+            profile = self._fields.get(field)
+            if profile is not None:
+                return profile
+        return self._default
+
+    async def inject(self, field: Optional[str] = None) -> float:
+        """
+        Sleep for a delay drawn from the field's profile and record it on the current span.
+
+        Returns:
+            The injected delay in milliseconds (0 when latency injection is off)
+        """
+        self.maybe_reload()
+        profile = self.profile_for(field)
+        if not profile.enabled:
+            return 0.0
+
+        delay_ms, spike = profile.sample(self._random())
+        if delay_ms <= 0:
+            return 0.0
+
+        span = trace.get_current_span()
+        if span.is_recording():
+            span.set_attribute("injection.latency_ms", delay_ms)
+            span.add_event(
+                "latency.injected",
+                {
+                    "latency.ms": delay_ms,
+                    "latency.mode": profile.mode,
+                    "latency.spike": spike,
+                    "graphql.field": field or "",
+                },
+            )
+        await asyncio.sleep(delay_ms / 1000)
+        return delay_ms
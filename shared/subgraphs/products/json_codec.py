@@ -0,0 +1,54 @@
+"""
+JSON encoding and decoding for GraphQL requests and responses of the products subgraph
+Uses orjson when it is installed (serializing straight to bytes) and the standard
+library otherwise; both produce compact JSON
+"""
+import json
+import os
+from typing import Any, Callable, Union
+
+try:
+    import orjson
+except ImportError:  # Optional dependency, see requirements.txt
+    orjson = None
+
+
+def _stdlib_dumps(data: Any) -> bytes:
+    return json.dumps(data, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def _orjson_dumps(data: Any) -> bytes:
+    try:
+        return orjson.dumps(data)
+    except TypeError:
+        # orjson rejects e.g. integers beyond 64 bits, which the stdlib encoder handles
+        return _stdlib_dumps(data)
+
+
+def select_encoder(name: str) -> Callable[[Any], bytes]:
+    """
+    Pick the JSON encoder.
+
+    Args:
+        name: "auto" (orjson when installed), "orjson" or "stdlib"
+
+    Returns:
+        A function serializing a JSON-compatible value to UTF-8 bytes
+    """
+    name = name.lower()
+    if name == "stdlib":
+        return _stdlib_dumps
+    if orjson is None:
+        if name == "orjson":
+            print("⚠️  PRODUCTS_JSON_ENCODER=orjson but orjson is not installed, using the standard library")
+        return _stdlib_dumps
+    return _orjson_dumps
+
+
+# Environment variables:
+#     PRODUCTS_JSON_ENCODER: "auto" (default), "orjson" or "stdlib"
+dumps: Callable[[Any], bytes] = select_encoder(os.getenv("PRODUCTS_JSON_ENCODER", "auto"))
+
+# Parses JSON text or UTF-8 bytes with the same library; both raise json.JSONDecodeError
+# (orjson's error is a subclass) on invalid input
+loads: Callable[[Union[str, bytes]], Any] = orjson.loads if dumps is _orjson_dumps else json.loads
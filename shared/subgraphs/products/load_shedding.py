@@ -0,0 +1,282 @@
+"""
+Concurrency limiting and load shedding for the products GraphQL endpoint
+Caps in-flight requests per worker, queues a bounded number of excess requests for a
+bounded time and sheds the rest immediately, so an overloaded worker fails fast instead
+of slowing down every request (including the router's retries)
+"""
+import asyncio
+import os
+import time
+from collections import deque
+from typing import Optional
+
+from opentelemetry import metrics, trace
+from opentelemetry.metrics import CallbackOptions, Observation
+
+import json_codec
+
+meter = metrics.get_meter(__name__)
+
+# Explicit bucket boundaries (seconds) for time spent waiting for an execution slot
+QUEUE_TIME_BUCKETS = (0.0001, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_queue_time = meter.create_histogram(
+    "products.load_shedding.queue_time",
+    unit="s",
+    description="Time requests waited for an execution slot",
+    explicit_bucket_boundaries_advisory=QUEUE_TIME_BUCKETS,
+)
+_shed = meter.create_counter(
+    "products.load_shedding.shed", unit="{request}", description="Requests rejected without execution, by reason"
+)
+
+QUEUE_FULL = "queue_full"
+QUEUE_TIMEOUT = "queue_timeout"
+
+
+class ConcurrencyLimiter:
+    """
+    Per-worker in-flight request limit with a bounded FIFO wait queue.
+
+    With `adaptive` set the limit follows an AIMD rule evaluated once per window of
+    `limit` completed requests: it shrinks by `backoff` when the window's mean latency
+    exceeds `target_latency`, and grows by one when the window was saturated
+    (requests had to queue) and latency stayed below the target.
+    """
+
+    def __init__(
+        self,
+        limit: int = 100,
+        max_queue: int = 100,
+        queue_timeout: float = 1.0,
+        adaptive: bool = False,
+        min_limit: int = 4,
+        max_limit: int = 500,
+        target_latency: float = 0.25,
+        backoff: float = 0.9,
+    ):
+        """
+        Args:
+            limit: Requests executing at once (the initial limit when adaptive)
+            max_queue: Requests allowed to wait for a slot; further requests are shed
+            queue_timeout: Seconds a request may wait before it is shed
+            adaptive: Adjust the limit to observed latency (AIMD)
+            min_limit: Lower bound of the adaptive limit
+            max_limit: Upper bound of the adaptive limit
+            target_latency: Mean request latency (seconds) above which the limit shrinks
+            backoff: Factor applied to the limit when latency is above the target
+        """
+        self.limit = limit
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.adaptive = adaptive
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.target_latency = target_latency
+        self.backoff = backoff
+
+        self.in_flight = 0
+        self._waiters: "deque[asyncio.Future]" = deque()
+        self._window_count = 0
+        self._window_latency = 0.0
+        self._window_saturated = False
+
+    @classmethod
+    def from_env(cls) -> Optional["ConcurrencyLimiter"]:
+        """
+        Build the limiter from environment variables.
+
+        Environment variables:
+            PRODUCTS_MAX_CONCURRENCY: In-flight GraphQL requests per worker (default: 100, 0 = unlimited)
+            PRODUCTS_MAX_QUEUE: Requests waiting for a slot before new ones are shed (default: 100)
+            PRODUCTS_QUEUE_TIMEOUT_MS: Longest wait for a slot (default: 1000)
+            PRODUCTS_CONCURRENCY_ADAPTIVE: Adapt the limit to latency with AIMD (default: false)
+            PRODUCTS_CONCURRENCY_MIN / PRODUCTS_CONCURRENCY_MAX: Bounds of the adaptive limit (default: 4 / 500)
+            PRODUCTS_CONCURRENCY_TARGET_LATENCY_MS: Latency above which the adaptive limit shrinks (default: 250)
+
+        Returns:
+            The limiter, or None when unlimited
+        """
+        limit = int(os.getenv("PRODUCTS_MAX_CONCURRENCY", "100"))
+        if limit <= 0:
+            return None
+        return cls(
+            limit=limit,
+            max_queue=int(os.getenv("PRODUCTS_MAX_QUEUE", "100")),
+            queue_timeout=float(os.getenv("PRODUCTS_QUEUE_TIMEOUT_MS", "1000")) / 1000,
+            adaptive=os.getenv("PRODUCTS_CONCURRENCY_ADAPTIVE", "false").lower() == "true",
+            min_limit=int(os.getenv("PRODUCTS_CONCURRENCY_MIN", "4")),
+            max_limit=int(os.getenv("PRODUCTS_CONCURRENCY_MAX", "500")),
+            target_latency=float(os.getenv("PRODUCTS_CONCURRENCY_TARGET_LATENCY_MS", "250")) / 1000,
+        )
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> Optional[str]:
+        """
+        Take an execution slot, waiting in the queue if necessary.
+
+        Returns:
+            None once a slot is held (give it back with `release`), or the shed
+            reason (QUEUE_FULL or QUEUE_TIMEOUT) when the request must be rejected
+        """
+        if self.in_flight < self.limit and not self._waiters:
+            self.in_flight += 1
+            return None
+        self._window_saturated = True
+        if len(self._waiters) >= self.max_queue:
+            return QUEUE_FULL
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+            return None
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as the wait ended; pass it on
+                self.release()
+            else:
+                try:
+                    self._waiters.remove(waiter)
+                except ValueError:
+                    pass
+            if isinstance(e, asyncio.CancelledError):
+                raise
+            return QUEUE_TIMEOUT
+
+    def release(self, latency: Optional[float] = None) -> None:
+        """
+        Return a slot and hand it to the oldest waiting request.
+
+        Args:
+            latency: Seconds the request took, fed to the adaptive limit
+        """
+        self.in_flight -= 1
+        if self.adaptive and latency is not None:
+            self._adapt(latency)
+        while self._waiters and self.in_flight < self.limit:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                self.in_flight += 1
+                waiter.set_result(None)
+
+    def _adapt(self, latency: float) -> None:
+        self._window_count += 1
+        self._window_latency += latency
+        if self._window_count < self.limit:
+            return
+        mean = self._window_latency / self._window_count
+        if mean > self.target_latency:
+            self.limit = max(self.min_limit, int(self.limit * self.backoff))
+        elif self._window_saturated:
+            self.limit = min(self.max_limit, self.limit + 1)
+        self._window_count = 0
+        self._window_latency = 0.0
+        self._window_saturated = False
+
+
+class LoadSheddingMiddleware:
+    """
+    Pure ASGI middleware admitting HTTP requests through a ConcurrencyLimiter.
+
+    Shed requests get a GraphQL-shaped error body right away, with HTTP 503 and
+    Retry-After by default, or HTTP 200 so the router passes the error on
+    instead of retrying.
+    """
+
+    def __init__(self, app, limiter: ConcurrencyLimiter, shed_status: int = 503, retry_after: int = 1):
+        """
+        Args:
+            app: The wrapped ASGI app (the GraphQL endpoint)
+            limiter: Shared per-worker limiter
+            shed_status: HTTP status of shed responses (503 or 200)
+            retry_after: Retry-After seconds sent with 503 responses
+        """
+        self.app = app
+        self.limiter = limiter
+        self.shed_status = shed_status
+        self.retry_after = retry_after
+        meter.create_observable_gauge(
+            "products.load_shedding.in_flight", callbacks=[self._observe_in_flight],
+            unit="{request}", description="Requests executing",
+        )
+        meter.create_observable_gauge(
+            "products.load_shedding.queued", callbacks=[self._observe_queued],
+            unit="{request}", description="Requests waiting for an execution slot",
+        )
+        meter.create_observable_gauge(
+            "products.load_shedding.limit", callbacks=[self._observe_limit],
+            unit="{request}", description="Current concurrency limit",
+        )
+
+    @classmethod
+    def from_env(cls, app) -> Optional["LoadSheddingMiddleware"]:
+        """
+        Build the middleware from environment variables (see ConcurrencyLimiter.from_env).
+
+        Environment variables:
+            PRODUCTS_SHED_STATUS: HTTP status of shed responses, 503 (default) or 200
+
+        Returns:
+            The middleware, or None when concurrency is unlimited
+        """
+        limiter = ConcurrencyLimiter.from_env()
+        if limiter is None:
+            return None
+        return cls(app, limiter, shed_status=int(os.getenv("PRODUCTS_SHED_STATUS", "503")))
+
+    def _observe_in_flight(self, options: CallbackOptions):
+        yield Observation(self.limiter.in_flight)
+
+    def _observe_queued(self, options: CallbackOptions):
+        yield Observation(self.limiter.queued)
+
+    def _observe_limit(self, options: CallbackOptions):
+        yield Observation(self.limiter.limit)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        limiter = self.limiter
+        queued_at = time.perf_counter()
+        reason = await limiter.acquire()
+        started = time.perf_counter()
+        _queue_time.record(started - queued_at)
+
+        span = trace.get_current_span()
+        if span.is_recording():
+            span.set_attribute("products.queue_time_ms", round((started - queued_at) * 1000, 3))
+            if reason is not None:
+                span.set_attribute("products.load_shed", reason)
+
+        if reason is not None:
+            _shed.add(1, {"reason": reason})
+            await self._shed(send, reason)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release(time.perf_counter() - started)
+
+    async def _shed(self, send, reason: str) -> None:
+        body = json_codec.dumps({
+            "data": None,
+            "errors": [{
+                "message": "Products subgraph is overloaded, request was not executed",
+                "extensions": {"code": "SERVICE_UNAVAILABLE", "reason": reason},
+            }],
+        })
+        headers = [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ]
+        if self.shed_status == 503:
+            headers.append((b"retry-after", str(self.retry_after).encode()))
+        await send({"type": "http.response.start", "status": self.shed_status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
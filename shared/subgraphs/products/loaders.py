@@ -0,0 +1,47 @@
+"""
+Request-scoped DataLoaders for the products subgraph
+Coalesces every Product reference in a single `_entities` call into one batched backend fetch
+"""
+from typing import List, Optional
+
+from strawberry.dataloader import DataLoader
+
+from backends import ProductBackend
+from catalog import ProductRecord
+from error_injection import LatencyInjector
+from resolver_metrics import record_batch_size
+from tracing import child_span
+
+
+def create_product_loader(
+    backend: ProductBackend, latency: Optional[LatencyInjector] = None
+) -> DataLoader:
+    """
+    Create a DataLoader that resolves product records by id.
+
+    A new loader must be created per request: its cache de-duplicates ids
+    within one request and must not leak records across requests.
+
+    Args:
+        backend: The product backend to read records from
+        latency: Optional latency injector; one delay (field "_entities") is
+            applied per batch, like a slow backend round trip
+
+    Returns:
+        DataLoader whose `load(id)` resolves to a ProductRecord or None
+    """
+    async def load_products(ids: List[str]) -> List[Optional[ProductRecord]]:
+        # One span (and one batch size sample) for the whole batch instead of one per representation
+        record_batch_size(len(ids))
+        with child_span("__resolve_reference.Product.batch") as span:
+            if latency is not None:
+                await latency.inject("_entities")
+            records = await backend.get_many(ids)
+            if span.is_recording():
+                span.set_attribute("product.batch_size", len(ids))
+                span.set_attribute(
+                    "product.found_count", sum(1 for r in records if r is not None)
+                )
+            return records
+
+    return DataLoader(load_fn=load_products)
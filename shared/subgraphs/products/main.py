@@ -2,43 +2,77 @@
 Products Subgraph - Python implementation with Apollo Federation
 Simplified to match Node.js implementation for compatibility
 """
+import asyncio
 import os
-from typing import List, Optional
+from contextlib import asynccontextmanager
+from typing import Annotated, List, Optional
 
 # Initialize OpenTelemetry BEFORE any other imports
-from otel import initialize_opentelemetry, instrument_asgi_app
+from otel import (
+    get_sampling_settings,
+    initialize_opentelemetry,
+    instrument_asgi_app,
+    shutdown_opentelemetry,
+    start_exporters_after_startup,
+)
 
 initialize_opentelemetry('products-subgraph-py')
 
 import strawberry
 from strawberry.asgi import GraphQL
 from strawberry.federation import Schema
+from strawberry.federation.schema import FederationAny
+from strawberry.types import ExecutionResult
 from opentelemetry import trace, context
+from opentelemetry.trace import Status, StatusCode
+from opentelemetry.instrumentation.asgi import asgi_getter
 from opentelemetry.propagate import extract
 from starlette.applications import Starlette
-from starlette.middleware.base import BaseHTTPMiddleware
-from error_injection import with_error_injection, ErrorInjectionException, should_inject_error, get_error_rate
-
-# Get tracer
-tracer = trace.get_tracer(__name__)
+from starlette.responses import Response
+from backends import ProductBackend, create_backend
+from compression import CompressionMiddleware
+from catalog import Catalog, ProductRecord
+from catalog_loader import CatalogReloader
+from document_cache import DocumentCache
+import json_codec
+from load_shedding import LoadSheddingMiddleware
+from loaders import create_product_loader
+from pagination import PageLimits, decode_cursor, encode_cursor
+from persisted_queries import PersistedQueryRegistry
+from query_cost import CostLimiter, int_argument
+from resolver_metrics import instrument_resolver, record_entities
+from response_cache import ResponseCacheMiddleware
+from tracing import child_span
+from admin import AdminEndpoint
+from error_injection import ErrorInjectionController, ErrorInjectionException, LatencyInjector
 
 
 # Middleware to extract trace context from incoming requests
-class TraceContextMiddleware(BaseHTTPMiddleware):
+class TraceContextMiddleware:
     """
-    Extracts trace context from incoming requests (e.g., traceparent header from router)
-    and sets it as the active context for the request.
+    Pure ASGI middleware that makes the caller's trace context (e.g., traceparent header
+    from router) the active context for the request.
     This ensures child spans are properly linked to parent spans.
+
+    When OpenTelemetryMiddleware already extracted the context and started a server span,
+    the request passes straight through. Otherwise the context is extracted once from the
+    raw scope headers and attached for the duration of the call; the response is never
+    wrapped or buffered.
     """
-    async def dispatch(self, request, call_next):
-        # Extract trace context from request headers
-        ctx = extract(request.headers)
-        token = context.attach(ctx)
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] not in ("http", "websocket") or trace.get_current_span().get_span_context().is_valid:
+            await self.app(scope, receive, send)
+            return
+
+        token = context.attach(extract(scope, getter=asgi_getter))
         try:
-            response = await call_next(request)
+            await self.app(scope, receive, send)
         finally:
             context.detach(token)
-        return response
 
 
 # ==================== Data Models ====================
@@ -87,6 +121,36 @@ PRODUCTS_DATA = [
     },
 ]
 
+# Indexed view over PRODUCTS_DATA, built once at startup and shared by every resolver.
+# Resolvers return its immutable ProductRecord objects directly instead of copying them.
+catalog = Catalog(PRODUCTS_DATA)
+
+# Data source for all resolvers: the in-memory catalog by default, or SQLite/PostgreSQL
+# when PRODUCTS_BACKEND is set (see backends.py)
+backend = create_backend(catalog)
+
+# Serve the catalog from PRODUCTS_CATALOG_FILE instead of PRODUCTS_DATA when configured,
+# hot-reloading it on change (see catalog_loader.py)
+catalog_reloader = CatalogReloader.from_env(backend)
+if catalog_reloader is not None:
+    catalog_reloader.load_initial()
+
+# Error injection rates are parsed once and can be changed at runtime
+# (PUT /admin/error-injection or the ERROR_INJECTION_CONFIG_FILE watch)
+error_injection = ErrorInjectionController.from_env('products-subgraph-py', 0)
+
+# Simulated backend latency (fixed/normal/lognormal plus tail spikes), off by default
+# (PUT /admin/latency-injection or the LATENCY_INJECTION_CONFIG_FILE watch)
+latency_injection = LatencyInjector.from_env('products-subgraph-py')
+
+# Default and maximum `first` of productsConnection
+page_limits = PageLimits.from_env()
+
+
+def operation_name(info: strawberry.Info) -> Optional[str]:
+    operation = info.operation
+    return operation.name.value if operation is not None and operation.name else None
+
 
 @strawberry.federation.type(keys=["id"])
 class Product:
@@ -100,25 +164,83 @@ class Product:
     in_stock: bool
 
     @classmethod
-    def resolve_reference(cls, id: strawberry.ID, **kwargs) -> Optional["Product"]:
-        """Resolve a product reference by ID for federation."""
-        with tracer.start_as_current_span("__resolve_reference.Product") as span:
-            span.set_attribute("product.id", str(id))
-
-            for p in PRODUCTS_DATA:
-                if p["id"] == id:
-                    span.set_attribute("product.found", True)
-                    return Product(
-                        id=p["id"],
-                        name=p["name"],
-                        price=p["price"],
-                        description=p["description"],
-                        category=p["category"],
-                        in_stock=p["inStock"],
-                    )
-
-            span.set_attribute("product.found", False)
-            return None
+    def is_type_of(cls, obj, info) -> bool:
+        """Catalog records are served as Products without being copied into this class."""
+        return isinstance(obj, (cls, ProductRecord))
+
+    @classmethod
+    async def resolve_reference(
+        cls, info: strawberry.Info, id: strawberry.ID, **kwargs
+    ) -> Optional["Product"]:
+        """
+        Resolve a product reference by ID for federation.
+        All references in one `_entities` call are batched through the request's loader.
+        """
+        return await info.context["product_loader"].load(id)
+
+
+@strawberry.type
+class PageInfo:
+    """Relay-style pagination state of a connection."""
+
+    has_next_page: bool
+    has_previous_page: bool
+    start_cursor: Optional[str] = None
+    end_cursor: Optional[str] = None
+
+
+@strawberry.type
+class ProductEdge:
+    """A product and its opaque cursor."""
+
+    cursor: str
+    node: Product
+
+
+@strawberry.type
+class ProductConnection:
+    """One page of products from an ordered index (catalog, category, stock or price order)."""
+
+    edges: List[ProductEdge]
+    page_info: PageInfo
+
+
+def request_backend(info: strawberry.Info) -> ProductBackend:
+    """
+    Return the backend snapshot pinned for the request (see ProductsGraphQL.get_context),
+    or the live backend when the schema is executed without one.
+    """
+    context = info.context
+    pinned = context.get("backend") if isinstance(context, dict) else None
+    return pinned if pinned is not None else backend
+
+
+def build_connection(records, offset: int, first: int) -> ProductConnection:
+    """
+    Build a connection from one page of an ordered index.
+
+    Args:
+        records: Up to `first + 1` records starting at `offset`; the extra record
+            only tells whether another page follows
+        offset: Position of the first record in the index (cursors encode positions)
+        first: Page size
+
+    Returns:
+        The connection
+    """
+    edges = [
+        ProductEdge(cursor=encode_cursor(offset + i), node=record)
+        for i, record in enumerate(records[:first])
+    ]
+    return ProductConnection(
+        edges=edges,
+        page_info=PageInfo(
+            has_next_page=len(records) > first,
+            has_previous_page=offset > 0,
+            start_cursor=edges[0].cursor if edges else None,
+            end_cursor=edges[-1].cursor if edges else None,
+        ),
+    )
 
 
 @strawberry.type
@@ -126,86 +248,328 @@ class Query:
     """Root query type for the products subgraph."""
 
     @strawberry.field
-    def products(self) -> List[Product]:
+    @instrument_resolver("products")
+    async def products(self, info: strawberry.Info) -> List[Product]:
         """Get all products."""
-        error_rate = get_error_rate('products-subgraph-py', 0)
-        if should_inject_error(error_rate):
+        if error_injection.should_inject("products", operation_name(info)):
             raise ErrorInjectionException("Failed to fetch products")
 
-        with tracer.start_as_current_span("query.products"):
-            return [
-                Product(
-                    id=p["id"],
-                    name=p["name"],
-                    price=p["price"],
-                    description=p["description"],
-                    category=p["category"],
-                    in_stock=p["inStock"],
-                )
-                for p in PRODUCTS_DATA
-            ]
+        with child_span("query.products"):
+            await latency_injection.inject("products")
+            return await request_backend(info).all()
 
     @strawberry.field
-    def product(self, id: strawberry.ID) -> Optional[Product]:
+    @instrument_resolver("product")
+    async def product(self, info: strawberry.Info, id: strawberry.ID) -> Optional[Product]:
         """Get a single product by ID."""
-        error_rate = get_error_rate('products-subgraph-py', 0)
-        if should_inject_error(error_rate):
+        if error_injection.should_inject("product", operation_name(info)):
             raise ErrorInjectionException("Failed to fetch product")
 
-        with tracer.start_as_current_span("query.product") as span:
-            span.set_attribute("product.id", id)
-
-            for p in PRODUCTS_DATA:
-                if p["id"] == id:
-                    return Product(
-                        id=p["id"],
-                        name=p["name"],
-                        price=p["price"],
-                        description=p["description"],
-                        category=p["category"],
-                        in_stock=p["inStock"],
-                    )
+        with child_span("query.product") as span:
+            recording = span.is_recording()
+            if recording:
+                span.set_attribute("product.id", id)
+            await latency_injection.inject("product")
 
-            span.set_attribute("product.found", False)
-            return None
+            p = await request_backend(info).get(id)
+            if p is None and recording:
+                span.set_attribute("product.found", False)
+            return p
 
     @strawberry.field
-    def top_products(self, limit: int = 5) -> List[Product]:
+    @instrument_resolver("topProducts")
+    async def top_products(self, info: strawberry.Info, limit: int = 5) -> List[Product]:
         """Get top products (limited list)."""
-        error_rate = get_error_rate('products-subgraph-py', 0)
-        if should_inject_error(error_rate):
+        if error_injection.should_inject("topProducts", operation_name(info)):
             raise ErrorInjectionException("Failed to fetch top products")
 
-        with tracer.start_as_current_span("query.topProducts") as span:
-            span.set_attribute("limit", limit)
+        with child_span("query.topProducts", {"limit": limit}):
+            await latency_injection.inject("topProducts")
+
+            return await request_backend(info).top(limit)
+
+    @strawberry.field
+    @instrument_resolver("productsConnection")
+    async def products_connection(
+        self, info: strawberry.Info, first: Optional[int] = None, after: Optional[str] = None
+    ) -> ProductConnection:
+        """Get one page of products in catalog order (`first` items after the `after` cursor)."""
+        if error_injection.should_inject("productsConnection", operation_name(info)):
+            raise ErrorInjectionException("Failed to fetch products")
+
+        first = page_limits.check(first)
+        offset = decode_cursor(after) + 1 if after is not None else 0
+        with child_span("query.productsConnection", {"first": first}):
+            await latency_injection.inject("productsConnection")
+            # One extra record tells whether another page follows
+            records = await request_backend(info).page(offset, first + 1)
+
+        return build_connection(records, offset, first)
 
-            return [
-                Product(
-                    id=p["id"],
-                    name=p["name"],
-                    price=p["price"],
-                    description=p["description"],
-                    category=p["category"],
-                    in_stock=p["inStock"],
-                )
-                for p in PRODUCTS_DATA[:limit]
-            ]
+    @strawberry.field
+    @instrument_resolver("productsByCategory")
+    async def products_by_category(
+        self,
+        info: strawberry.Info,
+        category: str,
+        in_stock: Optional[bool] = None,
+        first: Optional[int] = None,
+        after: Optional[str] = None,
+    ) -> ProductConnection:
+        """Get one page of a category's products in catalog order, optionally filtered by stock status."""
+        if error_injection.should_inject("productsByCategory", operation_name(info)):
+            raise ErrorInjectionException("Failed to fetch products by category")
+
+        first = page_limits.check(first)
+        offset = decode_cursor(after) + 1 if after is not None else 0
+        with child_span("query.productsByCategory", {"category": category, "first": first}):
+            await latency_injection.inject("productsByCategory")
+            records = await request_backend(info).category_page(category, in_stock, offset, first + 1)
+        return build_connection(records, offset, first)
+
+    @strawberry.field
+    @instrument_resolver("productsInStock")
+    async def products_in_stock(
+        self, info: strawberry.Info, first: Optional[int] = None, after: Optional[str] = None
+    ) -> ProductConnection:
+        """Get one page of the products currently in stock, in catalog order."""
+        if error_injection.should_inject("productsInStock", operation_name(info)):
+            raise ErrorInjectionException("Failed to fetch products in stock")
+
+        first = page_limits.check(first)
+        offset = decode_cursor(after) + 1 if after is not None else 0
+        with child_span("query.productsInStock", {"first": first}):
+            await latency_injection.inject("productsInStock")
+            records = await request_backend(info).stock_page(True, offset, first + 1)
+        return build_connection(records, offset, first)
 
+    @strawberry.field
+    @instrument_resolver("productsInPriceRange")
+    async def products_in_price_range(
+        self,
+        info: strawberry.Info,
+        minimum: Annotated[Optional[float], strawberry.argument(name="min")] = None,
+        maximum: Annotated[Optional[float], strawberry.argument(name="max")] = None,
+        in_stock: Optional[bool] = None,
+        first: Optional[int] = None,
+        after: Optional[str] = None,
+    ) -> ProductConnection:
+        """Get one page of the products priced within [min, max], cheapest first."""
+        if error_injection.should_inject("productsInPriceRange", operation_name(info)):
+            raise ErrorInjectionException("Failed to fetch products in price range")
+
+        first = page_limits.check(first)
+        offset = decode_cursor(after) + 1 if after is not None else 0
+        attributes = {"first": first}
+        if minimum is not None:
+            attributes["price.min"] = minimum
+        if maximum is not None:
+            attributes["price.max"] = maximum
+        with child_span("query.productsInPriceRange", attributes):
+            await latency_injection.inject("productsInPriceRange")
+            records = await request_backend(info).price_range(minimum, maximum, in_stock, offset, first + 1)
+        return build_connection(records, offset, first)
+
+
+# Skip parsing/validation for operations the router has sent before
+document_cache = DocumentCache.from_env()
+
+class ProductsSchema(Schema):
+    """Federation schema whose `_entities` field records the same RED metrics as the root resolvers."""
+
+    async def entities_resolver(
+        self, info: strawberry.Info, representations: List[FederationAny]
+    ) -> List[FederationAny]:
+        return await record_entities(super().entities_resolver(info, representations))
+
+
+def catalog_size(arguments) -> int:
+    # Until a SQL backend's first count completes, the startup catalog is the best estimate
+    count = backend.product_count()
+    return len(catalog) if count is None else count
+
+
+def page_size(arguments) -> int:
+    return int_argument(arguments, "first", page_limits.default)
+
+
+# Reject operations over the depth/cost budget and cap concurrent expensive ones.
+# List fields multiply the cost of their selection set by the number of items they return;
+# the unpaginated `products` list grows with the catalog, not with its arguments, so it
+# only counts as one item toward the cost limit (the website queries it in full)
+cost_limiter = CostLimiter.from_env(
+    {
+        "products": catalog_size,
+        "topProducts": lambda arguments: int_argument(arguments, "limit", 5),
+        "productsConnection": page_size,
+        "productsByCategory": page_size,
+        "productsInStock": page_size,
+        "productsInPriceRange": page_size,
+        "_entities": lambda arguments: len(arguments.get("representations") or ()),
+    },
+    data_sized_fields=("products",),
+)
+
+extensions = []
+if document_cache:
+    extensions.extend(document_cache.extensions())
+if cost_limiter:
+    extensions.append(cost_limiter.extension())
 
 # Create the schema with federation 2 enabled
-schema = Schema(
+schema = ProductsSchema(
     query=Query,
     enable_federation_2=True,
+    extensions=extensions,
 )
 
+# Automatic persisted queries: accept sha256 hashes instead of full query text
+persisted_queries = PersistedQueryRegistry.from_env()
+
+
+class ProductsGraphQL(GraphQL):
+    """
+    Strawberry ASGI app that builds a fresh context (and DataLoaders) per request,
+    resolves automatic persisted queries before execution and encodes JSON with
+    the fast codec from json_codec.py.
+    """
+
+    def create_response(self, response_data, sub_response) -> Response:
+        # Serialize straight to bytes (orjson) instead of the default str round trip
+        response = Response(json_codec.dumps(response_data), media_type="application/json")
+        response.headers.raw.extend(sub_response.headers.raw)
+        if sub_response.background:
+            response.background = sub_response.background
+        if sub_response.status_code:
+            response.status_code = sub_response.status_code
+        return response
+
+    def encode_json(self, data) -> str:
+        # Still used for websocket messages
+        return json_codec.dumps(data).decode()
+
+    def decode_json(self, data):
+        return json_codec.loads(data)
+
+    async def execute_single(
+        self, request, request_adapter, sub_response, context, root_value, request_data
+    ):
+        if persisted_queries is not None:
+            query, error = persisted_queries.resolve(request_data.query, request_data.extensions)
+            if error is not None:
+                return ExecutionResult(data=None, errors=[error])
+            request_data.query = query
+
+        result = await super().execute_single(
+            request=request,
+            request_adapter=request_adapter,
+            sub_response=sub_response,
+            context=context,
+            root_value=root_value,
+            request_data=request_data,
+        )
+
+        # GraphQL errors are returned with HTTP 200; mark the request span as failed
+        # so the tail sampler always keeps these traces (including injected errors).
+        errors = result.errors
+        if errors:
+            span = trace.get_current_span()
+            if span.is_recording():
+                span.set_attribute("graphql.errors.count", len(errors))
+                for error in errors:
+                    span.record_exception(error.original_error or error)
+                span.set_status(Status(StatusCode.ERROR, errors[0].message))
+        return result
+
+    async def get_context(self, request, response):
+        # Every resolver of the request reads the same catalog snapshot, even across a hot reload
+        request_backend = backend.snapshot()
+        return {
+            "request": request,
+            "response": response,
+            "backend": request_backend,
+            "product_loader": create_product_loader(request_backend, latency_injection),
+        }
+
+
 # Create the ASGI app using Starlette with GraphQL
-graphql_app = GraphQL(schema)
-app = Starlette()
+graphql_app = ProductsGraphQL(schema)
+
+# Cap in-flight GraphQL requests per worker and shed excess load early (PRODUCTS_MAX_CONCURRENCY).
+# Inside the response cache, so cache hits are always served
+graphql_endpoint = graphql_app
+load_shedding = LoadSheddingMiddleware.from_env(graphql_endpoint)
+if load_shedding is not None:
+    graphql_endpoint = load_shedding
+
+# Serve hot read-only root queries from an in-process response cache,
+# invalidated whenever the backend reports a catalog change. It is bypassed while
+# error or latency injection is active, so injection applies to every request
+if os.getenv("PRODUCTS_RESPONSE_CACHE_ENABLED", "true").lower() == "true":
+    response_cache = ResponseCacheMiddleware.from_env(
+        graphql_endpoint,
+        cacheable_fields=(
+            "products", "topProducts", "productsConnection",
+            "productsByCategory", "productsInStock", "productsInPriceRange",
+        ),
+        query_resolver=persisted_queries.lookup_request if persisted_queries else None,
+        bypass=lambda: error_injection.active() or latency_injection.active(),
+    )
+    backend.add_change_listener(response_cache.invalidate)
+    graphql_endpoint = response_cache
+
+# Optionally compress large responses (PRODUCTS_RESPONSE_COMPRESSION), outside the
+# response cache so cached bodies stay uncompressed
+compression = CompressionMiddleware.from_env(graphql_endpoint)
+if compression is not None:
+    graphql_endpoint = compression
+
+
+@asynccontextmanager
+async def lifespan(app):
+    """
+    Start telemetry exporters once the server is up (keeps them off the cold start path)
+    and the catalog file watch (if configured), then release backend resources (e.g. pooled DB connections) and flush telemetry on shutdown.
+    """
+    exporters = asyncio.create_task(start_exporters_after_startup())
+    backend.product_count()  # Start counting SQL catalogs for query cost estimates
+    catalog_watch = asyncio.create_task(catalog_reloader.watch()) if catalog_reloader else None
+    yield
+    exporters.cancel()
+    if catalog_watch is not None:
+        catalog_watch.cancel()
+    await backend.close()
+    shutdown_opentelemetry()
+
+
+app = Starlette(lifespan=lifespan)
 
 # Add middleware to extract trace context from incoming requests
 app.add_middleware(TraceContextMiddleware)
-app.add_route("/graphql", graphql_app)
+app.add_route("/graphql", graphql_endpoint)
 app.add_websocket_route("/graphql", graphql_app)
+app.add_route(
+    "/admin/error-injection",
+    AdminEndpoint(error_injection.snapshot, error_injection.update),
+    methods=["GET", "PUT", "POST"],
+)
+app.add_route(
+    "/admin/latency-injection",
+    AdminEndpoint(latency_injection.snapshot, latency_injection.update),
+    methods=["GET", "PUT", "POST"],
+)
+if catalog_reloader is not None:
+    app.add_route(
+        "/admin/catalog",
+        AdminEndpoint(catalog_reloader.snapshot, catalog_reloader.update),
+        methods=["GET", "PUT", "POST"],
+    )
+sampling_settings = get_sampling_settings()
+app.add_route(
+    "/admin/sampling",
+    AdminEndpoint(sampling_settings.snapshot, sampling_settings.update),
+    methods=["GET", "PUT", "POST"],
+)
 
 # Add OpenTelemetry instrumentation as OUTERMOST wrapper (AFTER setting up routes and other middleware)
 app = instrument_asgi_app(app)
@@ -213,6 +577,7 @@ app = instrument_asgi_app(app)
 if __name__ == "__main__":
     import uvicorn
 
+    # Development server with auto-reload; use `python server.py` for production
     port = int(os.getenv("PORT", 4003))
     print(f"🚀 Products subgraph ready at http://localhost:{port}/graphql")
     uvicorn.run("main:app", host="0.0.0.0", port=port, reload=True)
@@ -3,21 +3,32 @@ OpenTelemetry initialization for Python subgraph.
 Provides manual span creation for GraphQL operations.
 Includes trace context propagation for distributed tracing.
 Exports both traces and metrics to Dash0.
+
+Exporters (and their HTTP/protobuf dependencies) are only imported when an endpoint
+is configured, and by default they are constructed after startup so they do not
+add to pod cold start time (see PRODUCTS_OTEL_INIT).
 """
+import asyncio
 import os
+import socket
 from opentelemetry import trace, metrics
 from opentelemetry.sdk.trace import TracerProvider
-from opentelemetry.sdk.trace.export import BatchSpanProcessor
-from opentelemetry.sdk.trace.sampling import ParentBased, TraceIdRatioBased
-from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
-from opentelemetry.exporter.otlp.proto.http.metric_exporter import OTLPMetricExporter
-from opentelemetry.sdk.metrics import MeterProvider
-from opentelemetry.sdk.metrics.export import PeriodicExportingMetricReader
 from opentelemetry.sdk.resources import Resource
 from opentelemetry.trace.propagation.tracecontext import TraceContextTextMapPropagator
 from opentelemetry.propagate import set_global_textmap
-from opentelemetry.instrumentation.asgi import OpenTelemetryMiddleware
-from opentelemetry.instrumentation.requests import RequestsInstrumentor
+
+from export_pipeline import BufferingSpanProcessor, create_span_processor, exporter_options
+from sampling import AdaptiveSampler, SamplingSettings, TailSamplingProcessor
+
+# Providers created by initialize_opentelemetry, flushed by shutdown_opentelemetry
+_tracer_provider = None
+_meter_provider = None
+_sampling_settings = None
+
+# State needed to construct the exporters later (see start_exporters)
+_resource = None
+_tail_processor = None
+_exporters_started = False
 
 
 def initialize_opentelemetry(service_name: str):
@@ -25,77 +36,193 @@ def initialize_opentelemetry(service_name: str):
     Initialize OpenTelemetry with traces and metrics export.
     Uses manual span creation in GraphQL resolvers for precise control.
 
+    Sets up the tracer provider, sampler and propagator right away. The OTLP
+    exporters and the meter provider are created by `start_exporters()`:
+    immediately with PRODUCTS_OTEL_INIT=eager, or after the server has started
+    (deferred, the default) via `start_exporters_after_startup()`. Sampled spans
+    ending before then are buffered; metrics recorded before then are not exported.
+
     Args:
         service_name: The name of the service (e.g., 'products-subgraph-py')
     """
+    global _tracer_provider, _sampling_settings, _resource, _tail_processor
+
     environment = os.getenv('ENVIRONMENT', 'demo')
     service_version = os.getenv('SERVICE_VERSION', '1.0.0')
-    auth_token = os.getenv('DASH0_AUTH_TOKEN')
-    traces_endpoint = os.getenv('DASH0_TRACES_ENDPOINT')
-    metrics_endpoint = os.getenv('DASH0_METRICS_ENDPOINT')
-    dataset = os.getenv('DASH0_DATASET')
-
-    # Validate required configuration
-    if not auth_token or not traces_endpoint or not metrics_endpoint or not dataset:
-        print('⚠️  OpenTelemetry configuration incomplete. Telemetry data will not be exported.')
-        print('   Required: DASH0_AUTH_TOKEN, DASH0_TRACES_ENDPOINT, DASH0_METRICS_ENDPOINT, DASH0_DATASET')
 
     # Configure resource with service information
+    # service.instance.id is unique per worker process so telemetry from
+    # multiple uvicorn workers in one pod never collides (e.g. delta metrics)
+    hostname = os.getenv('HOSTNAME') or socket.gethostname()
     resource = Resource.create({
         "service.name": service_name,
         "service.namespace": os.getenv('SERVICE_NAMESPACE', 'retail-services'),
         "service.version": service_version,
+        "service.instance.id": f"{hostname}-{os.getpid()}",
         "deployment.environment": environment,
+        "host.name": hostname,
+        "process.pid": os.getpid(),
     })
 
-    # Configure exporters with authentication headers
-    headers = {"Dash0-Dataset": dataset}
-    if auth_token:
-        headers["Authorization"] = auth_token
-
-    # Configure trace exporter
-    trace_exporter = OTLPSpanExporter(
-        endpoint=traces_endpoint if traces_endpoint else "http://localhost:4317/v1/traces",
-        headers=headers,
-    )
-
-    # Configure metric exporter
-    metric_exporter = OTLPMetricExporter(
-        endpoint=metrics_endpoint if metrics_endpoint else "http://localhost:4317/v1/metrics",
-        headers=headers,
-    )
-
-    # Configure tracer provider with parent-based sampler to respect the router's sampling decision
+    # Configure tracer provider with a parent-based adaptive sampler to respect the router's sampling decision
     # If a parent span exists, use its sampling decision
-    # If no parent, use TraceIdRatioBased sampler with 25% probability
+    # If no parent, sample 25% of traces (PRODUCTS_TRACE_SAMPLE_RATIO), capped at
+    # PRODUCTS_TRACE_RATE_LIMIT traces/s; failed and slow requests are always exported
+    sampling_settings = SamplingSettings.from_env()
     tracer_provider = TracerProvider(
         resource=resource,
-        sampler=ParentBased(root=TraceIdRatioBased(0.25))
+        sampler=AdaptiveSampler(sampling_settings)
     )
-    tracer_provider.add_span_processor(BatchSpanProcessor(trace_exporter))
+    # Spans are buffered until start_exporters swaps in the exporting processor
+    tail_processor = TailSamplingProcessor(BufferingSpanProcessor(), sampling_settings)
+    tracer_provider.add_span_processor(tail_processor)
     trace.set_tracer_provider(tracer_provider)
 
-    # Configure meter provider with metric exporter
-    metric_reader = PeriodicExportingMetricReader(
-        exporter=metric_exporter,
-        export_interval_millis=60000,  # Export metrics every 60 seconds
-    )
-    meter_provider = MeterProvider(resource=resource, metric_readers=[metric_reader])
-    metrics.set_meter_provider(meter_provider)
-
     # Configure trace context propagation to extract parent spans from incoming requests
     # This enables the router's trace context (traceparent header) to be properly linked
     propagator = TraceContextTextMapPropagator()
     set_global_textmap(propagator)
 
-    # Initialize RequestsInstrumentor for outbound HTTP calls
-    RequestsInstrumentor().instrument()
+    _tracer_provider = tracer_provider
+    _sampling_settings = sampling_settings
+    _resource = resource
+    _tail_processor = tail_processor
+
+    if os.getenv('PRODUCTS_OTEL_INIT', 'deferred').lower() == 'eager':
+        start_exporters()
 
     print(f'🔭 OpenTelemetry initialized for {service_name}')
 
     return tracer_provider
 
 
+def start_exporters():
+    """
+    Construct the configured OTLP exporters, the meter provider and optional instrumentors.
+    Safe to call more than once; only the first call has an effect.
+
+    Environment variables:
+        DASH0_TRACES_ENDPOINT / DASH0_METRICS_ENDPOINT: Exporters are only created for configured endpoints
+        PRODUCTS_OTEL_INSTRUMENT_REQUESTS: Instrument outbound `requests` calls (default: false;
+            this subgraph makes none)
+    """
+    global _meter_provider, _exporters_started
+    if _exporters_started or _tracer_provider is None:
+        return
+    _exporters_started = True
+
+    auth_token = os.getenv('DASH0_AUTH_TOKEN')
+    traces_endpoint = os.getenv('DASH0_TRACES_ENDPOINT')
+    metrics_endpoint = os.getenv('DASH0_METRICS_ENDPOINT')
+    dataset = os.getenv('DASH0_DATASET')
+
+    # Validate required configuration
+    if not auth_token or not traces_endpoint or not metrics_endpoint or not dataset:
+        print('⚠️  OpenTelemetry configuration incomplete. Telemetry data will not be exported.')
+        print('   Required: DASH0_AUTH_TOKEN, DASH0_TRACES_ENDPOINT, DASH0_METRICS_ENDPOINT, DASH0_DATASET')
+
+    # Configure exporters with authentication headers
+    headers = {"Dash0-Dataset": dataset}
+    if auth_token:
+        headers["Authorization"] = auth_token
+
+    if traces_endpoint:
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+
+        # Configure trace exporter
+        # Compression and timeout come from PRODUCTS_OTLP_* (see export_pipeline.py)
+        trace_exporter = OTLPSpanExporter(
+            endpoint=traces_endpoint,
+            headers=headers,
+            **exporter_options(),
+        )
+        # Queue and batch sizes come from PRODUCTS_SPAN_* (see export_pipeline.py); the
+        # processor reports queue depth, dropped spans and export latency as metrics
+        _tail_processor.attach(create_span_processor(trace_exporter))
+    else:
+        _tail_processor.attach(None)
+
+    if metrics_endpoint:
+        from opentelemetry.exporter.otlp.proto.http.metric_exporter import OTLPMetricExporter
+        from opentelemetry.sdk.metrics import (
+            Counter,
+            Histogram,
+            MeterProvider,
+            ObservableCounter,
+            ObservableGauge,
+            ObservableUpDownCounter,
+            UpDownCounter,
+        )
+        from opentelemetry.sdk.metrics.export import AggregationTemporality, PeriodicExportingMetricReader
+
+        # Configure metric exporter
+        # Delta temporality matches the router's metrics config (see router.yaml), so
+        # per-worker series from multiple processes can be summed by the backend
+        metric_exporter = OTLPMetricExporter(
+            endpoint=metrics_endpoint,
+            headers=headers,
+            **exporter_options(),
+            preferred_temporality={
+                Counter: AggregationTemporality.DELTA,
+                UpDownCounter: AggregationTemporality.CUMULATIVE,
+                Histogram: AggregationTemporality.DELTA,
+                ObservableCounter: AggregationTemporality.DELTA,
+                ObservableUpDownCounter: AggregationTemporality.CUMULATIVE,
+                ObservableGauge: AggregationTemporality.CUMULATIVE,
+            },
+        )
+
+        # Configure meter provider with metric exporter
+        # Instruments created earlier through metrics.get_meter() are bound to it now
+        metric_reader = PeriodicExportingMetricReader(
+            exporter=metric_exporter,
+            export_interval_millis=60000,  # Export metrics every 60 seconds
+        )
+        meter_provider = MeterProvider(resource=_resource, metric_readers=[metric_reader])
+        metrics.set_meter_provider(meter_provider)
+        _meter_provider = meter_provider
+
+    # Initialize RequestsInstrumentor for outbound HTTP calls (only when asked for)
+    if os.getenv('PRODUCTS_OTEL_INSTRUMENT_REQUESTS', 'false').lower() == 'true':
+        from opentelemetry.instrumentation.requests import RequestsInstrumentor
+
+        RequestsInstrumentor().instrument()
+
+
+async def start_exporters_after_startup():
+    """
+    Start the exporters in a worker thread once the server is up.
+    Meant to be scheduled as a task from the ASGI lifespan; a no-op in eager mode.
+
+    Environment variables:
+        PRODUCTS_OTEL_EXPORT_DELAY_SECONDS: Wait before constructing exporters (default: 1)
+    """
+    if _exporters_started:
+        return
+    await asyncio.sleep(float(os.getenv('PRODUCTS_OTEL_EXPORT_DELAY_SECONDS', '1')))
+    await asyncio.to_thread(start_exporters)
+
+
+def get_sampling_settings():
+    """
+    Return the runtime-adjustable sampling settings (see sampling.py),
+    or None before initialize_opentelemetry has run.
+    """
+    return _sampling_settings
+
+
+def shutdown_opentelemetry():
+    """
+    Flush and shut down the tracer and meter providers.
+    Call on graceful shutdown so spans queued in the BatchSpanProcessor
+    and the last metric interval are exported before the process exits.
+    """
+    if _tracer_provider is not None:
+        _tracer_provider.shutdown()
+    if _meter_provider is not None:
+        _meter_provider.shutdown()
+
+
 def instrument_asgi_app(app):
     """
     Wrap a Starlette/ASGI app with OpenTelemetry instrumentation middleware.
@@ -107,4 +234,6 @@ def instrument_asgi_app(app):
     Returns:
         The instrumented app wrapped with OpenTelemetryMiddleware
     """
+    from opentelemetry.instrumentation.asgi import OpenTelemetryMiddleware
+
     return OpenTelemetryMiddleware(app)
@@ -0,0 +1,90 @@
+"""
+Cursor pagination support for the products subgraph
+Cursors are opaque, base64-encoded positions in the catalog's ordered index, so a page
+is a single slice (or one indexed range query) no matter how deep the client pages
+"""
+import base64
+import binascii
+import os
+from typing import Optional
+
+CURSOR_PREFIX = "product:"
+
+
+class InvalidCursorError(ValueError):
+    """Raised for a cursor that was not issued by this subgraph."""
+
+
+def encode_cursor(position: int) -> str:
+    """
+    Encode a catalog position as an opaque cursor.
+
+    Args:
+        position: Zero-based position in catalog order
+
+    Returns:
+        The cursor string returned to clients
+    """
+    return base64.b64encode(f"{CURSOR_PREFIX}{position}".encode()).decode()
+
+
+def decode_cursor(cursor: str) -> int:
+    """
+    Decode a cursor produced by `encode_cursor`.
+
+    Args:
+        cursor: Cursor string received from a client
+
+    Returns:
+        The catalog position the cursor points at
+
+    Raises:
+        InvalidCursorError: If the cursor is malformed
+    """
+    try:
+        value = base64.b64decode(cursor.encode(), validate=True).decode()
+    except (binascii.Error, UnicodeDecodeError) as e:
+        raise InvalidCursorError(f"Invalid cursor: {cursor!r}") from e
+    if not value.startswith(CURSOR_PREFIX) or not value[len(CURSOR_PREFIX):].isdigit():
+        raise InvalidCursorError(f"Invalid cursor: {cursor!r}")
+    return int(value[len(CURSOR_PREFIX):])
+
+
+class PageLimits:
+    """Default and maximum page sizes for connection fields."""
+
+    def __init__(self, default: int = 20, maximum: int = 100):
+        self.default = default
+        self.maximum = maximum
+
+    @classmethod
+    def from_env(cls) -> "PageLimits":
+        """
+        Environment variables:
+            PRODUCTS_PAGE_SIZE_DEFAULT: Page size when `first` is omitted (default: 20)
+            PRODUCTS_PAGE_SIZE_MAX: Largest accepted `first` (default: 100)
+        """
+        return cls(
+            default=int(os.getenv("PRODUCTS_PAGE_SIZE_DEFAULT", "20")),
+            maximum=int(os.getenv("PRODUCTS_PAGE_SIZE_MAX", "100")),
+        )
+
+    def check(self, first: Optional[int]) -> int:
+        """
+        Validate a requested page size.
+
+        Args:
+            first: The `first` argument, or None for the default
+
+        Returns:
+            The page size to fetch
+
+        Raises:
+            ValueError: If `first` is negative or above the maximum
+        """
+        if first is None:
+            return self.default
+        if first < 0 or first > self.maximum:
+            raise ValueError(f"`first` must be between 0 and {self.maximum}")
+        return first
+
@@ -0,0 +1,230 @@
+"""
+Automatic persisted query (APQ) support for the products subgraph
+Lets clients send `extensions.persistedQuery.sha256Hash` instead of the full query text,
+backed by a bounded in-memory registry, an optional on-disk registry and a startup manifest
+"""
+import hashlib
+import json
+import os
+from typing import Any, Mapping, Optional, Tuple
+
+from graphql import GraphQLError
+from opentelemetry import metrics
+
+from cache import LRUCache
+
+meter = metrics.get_meter(__name__)
+
+_hits = meter.create_counter(
+    "products.persisted_queries.hits", unit="{request}", description="APQ lookups that found the query"
+)
+_misses = meter.create_counter(
+    "products.persisted_queries.misses", unit="{request}", description="APQ lookups answered with PersistedQueryNotFound"
+)
+_registrations = meter.create_counter(
+    "products.persisted_queries.registrations", unit="{query}", description="Queries registered by hash"
+)
+
+PERSISTED_QUERY_NOT_FOUND = "PersistedQueryNotFound"
+
+
+def sha256_hex(query: str) -> str:
+    return hashlib.sha256(query.encode()).hexdigest()
+
+
+class PersistedQueryRegistry:
+    """
+    Maps SHA-256 hashes to query texts.
+
+    Lookups hit the in-memory LRU first, then the optional directory of
+    `<hash>.graphql` files (which survives restarts and is shared by workers).
+    """
+
+    def __init__(self, maxsize: int = 1000, directory: Optional[str] = None):
+        """
+        Args:
+            maxsize: Maximum number of queries kept in memory
+            directory: Optional directory for the on-disk registry
+        """
+        self.memory: LRUCache[str] = LRUCache(maxsize)
+        self.directory = directory
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    @classmethod
+    def from_env(cls) -> Optional["PersistedQueryRegistry"]:
+        """
+        Build the registry from environment variables.
+
+        Environment variables:
+            PRODUCTS_APQ_ENABLED: Accept persisted query hashes (default: true)
+            PRODUCTS_APQ_CACHE_SIZE: Queries kept in memory (default: 1000)
+            PRODUCTS_APQ_DIR: Directory for the optional on-disk registry
+            PRODUCTS_APQ_MANIFEST: Manifest file loaded at startup to pre-warm the registry
+
+        Returns:
+            The registry, or None when APQ is disabled
+        """
+        if os.getenv("PRODUCTS_APQ_ENABLED", "true").lower() != "true":
+            return None
+
+        registry = cls(
+            maxsize=int(os.getenv("PRODUCTS_APQ_CACHE_SIZE", "1000")),
+            directory=os.getenv("PRODUCTS_APQ_DIR") or None,
+        )
+        manifest = os.getenv("PRODUCTS_APQ_MANIFEST")
+        if manifest:
+            count = registry.load_manifest(manifest)
+            print(f"📦 Pre-warmed {count} persisted queries from {manifest}")
+        return registry
+
+    def get(self, sha256_hash: str) -> Optional[str]:
+        """Return the query registered under a hash, or None."""
+        query = self.memory.get(sha256_hash)
+        if query is None and self.directory:
+            query = self._read_disk(sha256_hash)
+            if query is not None:
+                self.memory.set(sha256_hash, query)
+        return query
+
+    def register(self, sha256_hash: str, query: str) -> None:
+        """
+        Register a query under its hash.
+
+        Raises:
+            ValueError: If the hash does not match the query text
+        """
+        if sha256_hex(query) != sha256_hash:
+            raise ValueError("provided sha does not match query")
+        if self.memory.get(sha256_hash) is not None:
+            return
+        self.memory.set(sha256_hash, query)
+        _registrations.add(1)
+        if self.directory:
+            self._write_disk(sha256_hash, query)
+
+    def load_manifest(self, path: str) -> int:
+        """
+        Pre-warm the registry from a manifest file.
+
+        Supports the Apollo persisted query manifest format
+        (`{"operations": [{"id": ..., "body": ...}]}`) and a plain
+        `{"<sha256>": "<query>"}` mapping. Entries whose hash does not
+        match their body are skipped.
+
+        Returns:
+            Number of queries registered
+        """
+        with open(path) as f:
+            manifest = json.load(f)
+
+        if isinstance(manifest, Mapping) and "operations" in manifest:
+            entries = [(op.get("id"), op.get("body")) for op in manifest["operations"]]
+        else:
+            entries = list(manifest.items())
+
+        count = 0
+        for sha256_hash, query in entries:
+            if not isinstance(sha256_hash, str) or not isinstance(query, str):
+                continue
+            try:
+                self.register(sha256_hash, query)
+            except ValueError:
+                continue
+            count += 1
+        return count
+
+    def resolve(
+        self, query: Optional[str], extensions: Optional[Mapping[str, Any]]
+    ) -> Tuple[Optional[str], Optional[GraphQLError]]:
+        """
+        Apply the APQ protocol to one GraphQL request.
+
+        - hash only: return the registered query, or a PersistedQueryNotFound error
+        - hash + query: verify and register the query, then return it
+        - no persistedQuery extension: return the query unchanged
+
+        Returns:
+            (query text to execute, error to return instead of executing)
+        """
+        persisted = (extensions or {}).get("persistedQuery")
+        if not isinstance(persisted, Mapping):
+            return query, None
+
+        if persisted.get("version", 1) != 1:
+            return None, GraphQLError(
+                "Unsupported persisted query version",
+                extensions={"code": "PERSISTED_QUERY_NOT_SUPPORTED"},
+            )
+
+        sha256_hash = persisted.get("sha256Hash")
+        if not isinstance(sha256_hash, str):
+            return query, None
+
+        if query is None:
+            query = self.get(sha256_hash)
+            if query is None:
+                _misses.add(1)
+                return None, GraphQLError(
+                    PERSISTED_QUERY_NOT_FOUND,
+                    extensions={"code": "PERSISTED_QUERY_NOT_FOUND"},
+                )
+            _hits.add(1)
+            return query, None
+
+        try:
+            self.register(sha256_hash, query)
+        except ValueError as e:
+            return None, GraphQLError(str(e), extensions={"code": "BAD_USER_INPUT"})
+        return query, None
+
+    def lookup_request(self, data: Mapping[str, Any]) -> Optional[str]:
+        """
+        Return the query text of a decoded request body, resolving a persisted hash if needed.
+
+        A query sent with its hash is verified and registered, as in `resolve`. Returns
+        None when the request would fail the APQ protocol (unsupported version, unknown
+        hash, or a hash that does not match the query text), so callers such as the
+        response cache leave it to `resolve` to produce the error.
+        """
+        query = data.get("query")
+        extensions = data.get("extensions")
+        persisted = extensions.get("persistedQuery") if isinstance(extensions, Mapping) else None
+        if not isinstance(persisted, Mapping):
+            return query if isinstance(query, str) else None
+        if persisted.get("version", 1) != 1:
+            return None
+        sha256_hash = persisted.get("sha256Hash")
+        if not isinstance(sha256_hash, str):
+            return query if isinstance(query, str) else None
+        if isinstance(query, str):
+            # Register here as well: a response cache hit skips `resolve`
+            try:
+                self.register(sha256_hash, query)
+            except ValueError:
+                return None
+            return query
+        return self.get(sha256_hash)
+
+    def _path(self, sha256_hash: str) -> str:
+        # Only hex digests are valid hashes; this also keeps file names safe
+        if len(sha256_hash) != 64 or any(c not in "0123456789abcdef" for c in sha256_hash):
+            raise ValueError("invalid sha256 hash")
+        return os.path.join(self.directory, f"{sha256_hash}.graphql")
+
+    def _read_disk(self, sha256_hash: str) -> Optional[str]:
+        try:
+            with open(self._path(sha256_hash)) as f:
+                return f.read()
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, sha256_hash: str, query: str) -> None:
+        path = self._path(sha256_hash)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                f.write(query)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"⚠️  Could not persist query {sha256_hash}: {e}")
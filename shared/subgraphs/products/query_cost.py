@@ -0,0 +1,300 @@
+"""
+Static query cost and depth limits with admission control for the products subgraph
+A Strawberry extension that estimates the work an operation will cause before executing it,
+rejects operations over the depth/cost budget and caps how many expensive operations run
+concurrently per worker, so a burst of heavy queries cannot starve cheap ones
+"""
+import asyncio
+import os
+import time
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, Mapping, NamedTuple, Optional
+
+from graphql import (
+    DocumentNode,
+    Undefined,
+    ExecutionResult as GraphQLExecutionResult,
+    FieldNode,
+    FragmentDefinitionNode,
+    FragmentSpreadNode,
+    GraphQLError,
+    SelectionSetNode,
+    get_operation_ast,
+    value_from_ast_untyped,
+)
+from opentelemetry import metrics, trace
+from strawberry.extensions import SchemaExtension
+
+meter = metrics.get_meter(__name__)
+
+# Explicit bucket boundaries for operation cost (roughly fields resolved)
+COST_BUCKETS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 50000, 100000, 1000000)
+
+_cost = meter.create_histogram(
+    "products.query.cost",
+    unit="{field}",
+    description="Estimated fields resolved per operation",
+    explicit_bucket_boundaries_advisory=COST_BUCKETS,
+)
+_rejected = meter.create_counter(
+    "products.query.rejected", unit="{operation}", description="Operations rejected before execution, by reason"
+)
+_queue_time = meter.create_histogram(
+    "products.query.expensive_queue_time",
+    unit="s",
+    description="Time expensive operations waited for an execution slot",
+)
+
+# Field name -> multiplier applied to the cost of the field's selection set,
+# computed from the field's arguments (e.g. `limit`, `first`, `representations`)
+ListSizes = Mapping[str, Callable[[Dict[str, Any]], int]]
+
+
+def int_argument(arguments: Mapping[str, Any], name: str, default: int) -> int:
+    """Return an integer argument for a list size, or `default` when it is missing or not an integer."""
+    value = arguments.get(name)
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    return default
+
+
+class CostEstimate(NamedTuple):
+    cost: int  # Estimated fields resolved
+    limited_cost: int  # The part of `cost` a client controls through arguments, checked against max_cost
+    depth: int
+
+
+class CostLimiter:
+    """
+    Estimates operation cost and depth and admits operations within the budget.
+
+    The cost of a field is 1 plus its selection set's cost times the field's
+    list multiplier (from `list_sizes`, 1 for fields without one); `__typename`
+    is free. Depth counts nested fields, not fragments.
+
+    Unpaginated list fields whose size is set by the data rather than by arguments
+    (`data_sized_fields`, e.g. a full product list) count with their real size toward the
+    cost histogram and the expensive-operation threshold, but as a single item toward
+    `max_cost`: the cap bounds the amplification a client can ask for, and must not
+    start rejecting a fixed query once the catalog grows.
+    """
+
+    def __init__(
+        self,
+        list_sizes: ListSizes,
+        data_sized_fields: Iterable[str] = (),
+        max_depth: int = 0,
+        max_cost: int = 0,
+        expensive_cost: int = 0,
+        max_expensive: int = 4,
+        queue_timeout: float = 1.0,
+    ):
+        """
+        Args:
+            list_sizes: List multipliers by field name
+            data_sized_fields: Fields in `list_sizes` whose size the client cannot choose
+            max_depth: Reject operations nested deeper than this (0 = unlimited)
+            max_cost: Reject operations costing more than this (0 = unlimited)
+            expensive_cost: Operations costing at least this need an execution slot (0 = no slots)
+            max_expensive: Expensive operations executing at once, per worker
+            queue_timeout: Seconds an expensive operation may wait for a slot before it is rejected
+        """
+        self.list_sizes = list_sizes
+        self.data_sized_fields = frozenset(data_sized_fields)
+        self.max_depth = max_depth
+        self.max_cost = max_cost
+        self.expensive_cost = expensive_cost
+        self.max_expensive = max_expensive
+        self.queue_timeout = queue_timeout
+        self.slots = asyncio.Semaphore(max_expensive)
+
+    @classmethod
+    def from_env(cls, list_sizes: ListSizes, data_sized_fields: Iterable[str] = ()) -> Optional["CostLimiter"]:
+        """
+        Build the limiter from environment variables.
+
+        Environment variables:
+            PRODUCTS_MAX_QUERY_DEPTH: Maximum field depth (default: 10, 0 = unlimited)
+            PRODUCTS_MAX_QUERY_COST: Maximum estimated cost (default: 100000, 0 = unlimited)
+            PRODUCTS_EXPENSIVE_QUERY_COST: Cost from which an operation is expensive (default: 1000, 0 = off)
+            PRODUCTS_MAX_EXPENSIVE_QUERIES: Expensive operations executing at once per worker (default: 4)
+            PRODUCTS_EXPENSIVE_QUEUE_TIMEOUT_MS: Wait for an execution slot before rejecting (default: 1000)
+
+        Args:
+            list_sizes: List multipliers by field name
+            data_sized_fields: Fields in `list_sizes` whose size the client cannot choose
+
+        Returns:
+            The limiter, or None when every limit is disabled
+        """
+        limiter = cls(
+            list_sizes,
+            data_sized_fields,
+            max_depth=int(os.getenv("PRODUCTS_MAX_QUERY_DEPTH", "10")),
+            max_cost=int(os.getenv("PRODUCTS_MAX_QUERY_COST", "100000")),
+            expensive_cost=int(os.getenv("PRODUCTS_EXPENSIVE_QUERY_COST", "1000")),
+            max_expensive=int(os.getenv("PRODUCTS_MAX_EXPENSIVE_QUERIES", "4")),
+            queue_timeout=float(os.getenv("PRODUCTS_EXPENSIVE_QUEUE_TIMEOUT_MS", "1000")) / 1000,
+        )
+        if not (limiter.max_depth or limiter.max_cost or limiter.expensive_cost):
+            return None
+        return limiter
+
+    def estimate(
+        self, document: DocumentNode, operation_name: Optional[str], variables: Optional[Dict[str, Any]]
+    ) -> CostEstimate:
+        """
+        Estimate the cost and depth of one operation of a validated document.
+
+        Args:
+            document: Parsed (and validated) document
+            operation_name: Operation to estimate (may be None for single-operation documents)
+            variables: Variable values, used to resolve list size arguments
+
+        Returns:
+            The operation's cost, limited cost and depth
+        """
+        operation = get_operation_ast(document, operation_name)
+        if operation is None:
+            return CostEstimate(0, 0, 0)
+        fragments = {
+            d.name.value: d for d in document.definitions if isinstance(d, FragmentDefinitionNode)
+        }
+        return self._selection_cost(operation.selection_set, fragments, variables or {}, 0)
+
+    def _selection_cost(
+        self,
+        selection_set: SelectionSetNode,
+        fragments: Dict[str, FragmentDefinitionNode],
+        variables: Dict[str, Any],
+        depth: int,
+    ) -> CostEstimate:
+        cost = limited_cost = 0
+        max_depth = depth
+        for selection in selection_set.selections:
+            if isinstance(selection, FieldNode):
+                name = selection.name.value
+                if name == "__typename":
+                    continue
+                child_cost, child_limited_cost, field_depth = 0, 0, depth + 1
+                if selection.selection_set is not None:
+                    child_cost, child_limited_cost, field_depth = self._selection_cost(
+                        selection.selection_set, fragments, variables, depth + 1
+                    )
+                    list_size = self.list_sizes.get(name)
+                    if list_size is not None:
+                        size = max(list_size(self._arguments(selection, variables)), 0)
+                        child_cost *= size
+                        if name not in self.data_sized_fields:
+                            child_limited_cost *= size
+                cost += 1 + child_cost
+                limited_cost += 1 + child_limited_cost
+            else:
+                # Validation has rejected unknown and cyclic fragments by now
+                if isinstance(selection, FragmentSpreadNode):
+                    fragment = fragments.get(selection.name.value)
+                    if fragment is None:
+                        continue
+                    sub_selection = fragment.selection_set
+                else:
+                    sub_selection = selection.selection_set
+                child_cost, child_limited_cost, field_depth = self._selection_cost(
+                    sub_selection, fragments, variables, depth
+                )
+                cost += child_cost
+                limited_cost += child_limited_cost
+            max_depth = max(max_depth, field_depth)
+        return CostEstimate(cost, limited_cost, max_depth)
+
+    @staticmethod
+    def _arguments(field: FieldNode, variables: Dict[str, Any]) -> Dict[str, Any]:
+        # Omitted and null variables leave the argument out, so list sizes fall back to its default
+        arguments = {}
+        for arg in field.arguments:
+            value = value_from_ast_untyped(arg.value, variables)
+            if value is not Undefined and value is not None:
+                arguments[arg.name.value] = value
+        return arguments
+
+    def check(self, estimate: CostEstimate) -> Optional[GraphQLError]:
+        """Return the error rejecting an operation over the depth or cost limit, or None."""
+        depth, cost = estimate.depth, estimate.limited_cost
+        if self.max_depth and depth > self.max_depth:
+            _rejected.add(1, {"reason": "depth"})
+            return GraphQLError(
+                f"Operation depth {depth} exceeds the limit of {self.max_depth}",
+                extensions={"code": "OPERATION_TOO_DEEP", "depth": depth, "maxDepth": self.max_depth},
+            )
+        if self.max_cost and cost > self.max_cost:
+            _rejected.add(1, {"reason": "cost"})
+            return GraphQLError(
+                f"Operation cost {cost} exceeds the limit of {self.max_cost}",
+                extensions={"code": "OPERATION_TOO_EXPENSIVE", "cost": cost, "maxCost": self.max_cost},
+            )
+        return None
+
+    async def acquire(self) -> Optional[GraphQLError]:
+        """
+        Wait for an expensive-operation slot.
+
+        Returns:
+            None once a slot is held (release it with `slots.release()`), or the
+            error rejecting the operation when no slot freed up within the queue timeout
+        """
+        start = time.perf_counter()
+        try:
+            await asyncio.wait_for(self.slots.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            _rejected.add(1, {"reason": "concurrency"})
+            return GraphQLError(
+                f"Too many expensive operations in flight (limit {self.max_expensive}), retry later",
+                extensions={"code": "OPERATION_LIMITED"},
+            )
+        finally:
+            _queue_time.record(time.perf_counter() - start)
+        return None
+
+    def extension(self) -> type:
+        """Return a Strawberry extension class bound to this limiter."""
+        limiter = self
+
+        class BoundCostLimitExtension(CostLimitExtension):
+            cost_limiter = limiter
+
+        return BoundCostLimitExtension
+
+
+class CostLimitExtension(SchemaExtension):
+    """
+    Admits operations through a CostLimiter after validation.
+
+    A rejected operation is answered with a single GraphQL error and never executed;
+    the error marks the request span as failed, so its trace is always kept.
+    """
+
+    cost_limiter: CostLimiter
+
+    async def on_execute(self) -> AsyncIterator[None]:
+        execution_context = self.execution_context
+        limiter = self.cost_limiter
+        estimate = limiter.estimate(
+            execution_context.graphql_document, execution_context.operation_name, execution_context.variables
+        )
+        _cost.record(estimate.cost)
+        span = trace.get_current_span()
+        if span.is_recording():
+            span.set_attribute("graphql.operation.cost", estimate.cost)
+            span.set_attribute("graphql.operation.depth", estimate.depth)
+
+        error = limiter.check(estimate)
+        slot = False
+        if error is None and limiter.expensive_cost and estimate.cost >= limiter.expensive_cost:
+            error = await limiter.acquire()
+            slot = error is None
+        if error is not None:
+            execution_context.result = GraphQLExecutionResult(data=None, errors=[error])
+
+        try:
+            yield
+        finally:
+            if slot:
+                limiter.slots.release()
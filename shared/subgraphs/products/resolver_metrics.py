@@ -0,0 +1,129 @@
+"""
+Resolver RED metrics for the products subgraph
+Records request count, error count and latency for every root field call, independent of trace sampling,
+so percentiles stay accurate at any sampling ratio
+"""
+import asyncio
+import functools
+import time
+from typing import Any, Awaitable, Callable, List, Optional, Sequence, TypeVar
+
+from opentelemetry import metrics
+
+meter = metrics.get_meter(__name__)
+
+# Explicit bucket boundaries (seconds): fine-grained below 10ms where in-memory resolvers live,
+# coarse up to the router's 30s timeout for injected latency and slow backends
+DURATION_BUCKETS = (
+    0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+
+# Explicit bucket boundaries for the number of product references per `_entities` batch
+BATCH_SIZE_BUCKETS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 5000)
+
+_requests = meter.create_counter(
+    "products.resolver.requests", unit="{call}", description="Root field resolver calls"
+)
+_errors = meter.create_counter(
+    "products.resolver.errors", unit="{call}", description="Root field resolver calls that raised"
+)
+_duration = meter.create_histogram(
+    "products.resolver.duration",
+    unit="s",
+    description="Root field resolver latency",
+    explicit_bucket_boundaries_advisory=DURATION_BUCKETS,
+)
+_batch_size = meter.create_histogram(
+    "products.entities.batch_size",
+    unit="{entity}",
+    description="Product references resolved per batched backend fetch",
+    explicit_bucket_boundaries_advisory=BATCH_SIZE_BUCKETS,
+)
+
+R = TypeVar("R")
+
+
+class _FieldMetrics:
+    """Pre-built attribute sets for one field, so recording allocates nothing per call."""
+
+    __slots__ = ("attributes", "error_attributes")
+
+    def __init__(self, field: str):
+        self.attributes = {"graphql.field.name": field}
+        self.error_attributes = {}
+
+    def record(self, start: float, error: Optional[BaseException] = None) -> None:
+        _requests.add(1, self.attributes)
+        _duration.record(time.perf_counter() - start, self.attributes)
+        if error is not None:
+            error_type = type(error).__name__
+            attributes = self.error_attributes.get(error_type)
+            if attributes is None:
+                attributes = self.error_attributes[error_type] = {
+                    **self.attributes,
+                    "error.type": error_type,
+                }
+            _errors.add(1, attributes)
+
+
+def instrument_resolver(field: str) -> Callable[[Callable[..., Awaitable[R]]], Callable[..., Awaitable[R]]]:
+    """
+    Decorator recording RED metrics for an async resolver.
+
+    Apply it below `@strawberry.field` so Strawberry still sees the original signature:
+
+        @strawberry.field
+        @instrument_resolver("products")
+        async def products(self, info: strawberry.Info) -> List[Product]: ...
+
+    Args:
+        field: GraphQL field name used as the `graphql.field.name` attribute
+    """
+    field_metrics = _FieldMetrics(field)
+
+    def decorator(resolver: Callable[..., Awaitable[R]]) -> Callable[..., Awaitable[R]]:
+        @functools.wraps(resolver)
+        async def wrapper(*args: Any, **kwargs: Any) -> R:
+            start = time.perf_counter()
+            try:
+                result = await resolver(*args, **kwargs)
+            except Exception as e:
+                field_metrics.record(start, e)
+                raise
+            field_metrics.record(start)
+            return result
+
+        return wrapper
+
+    return decorator
+
+
+_entities_metrics = _FieldMetrics("_entities")
+
+
+async def record_entities(results: Sequence[Any]) -> List[Any]:
+    """
+    Await the per-representation results of an `_entities` call and record its RED metrics.
+
+    Failed references are returned as exception values (as Strawberry does), so one
+    missing or failing entity does not fail the others.
+
+    Args:
+        results: Values, awaitables or exceptions, one per representation
+    """
+    start = time.perf_counter()
+    resolved = list(results)
+    pending = [i for i, result in enumerate(resolved) if asyncio.isfuture(result) or asyncio.iscoroutine(result)]
+    if pending:
+        values = await asyncio.gather(*(resolved[i] for i in pending), return_exceptions=True)
+        for i, value in zip(pending, values):
+            resolved[i] = value
+
+    error = next((r for r in resolved if isinstance(r, Exception)), None)
+    _entities_metrics.record(start, error)
+    return resolved
+
+
+def record_batch_size(size: int) -> None:
+    """Record the number of references fetched in one batched backend call."""
+    _batch_size.record(size)
@@ -0,0 +1,245 @@
+"""
+In-process response cache for hot root queries of the products subgraph
+Caches serialized JSON responses for read-only root fields such as `products` and `topProducts`,
+keyed by the normalized query document (including its selection set), variables and operation name
+"""
+import hashlib
+import json
+import os
+from typing import Any, Callable, Iterable, List, Mapping, Optional, Tuple
+
+from graphql import FieldNode, GraphQLError, OperationDefinitionNode, OperationType, parse, print_ast
+from opentelemetry import metrics, trace
+
+import json_codec
+from cache import LRUCache
+
+meter = metrics.get_meter(__name__)
+
+_hits = meter.create_counter(
+    "products.response_cache.hits", unit="{request}", description="Responses served from the response cache"
+)
+_misses = meter.create_counter(
+    "products.response_cache.misses", unit="{request}", description="Cacheable requests that had to be executed"
+)
+_evictions = meter.create_counter(
+    "products.response_cache.evictions", unit="{entry}", description="Responses evicted to respect size limits"
+)
+_invalidations = meter.create_counter(
+    "products.response_cache.invalidations", unit="{event}", description="Full cache invalidations on catalog changes"
+)
+
+# Marker stored for query texts that can never be cached
+_NOT_CACHEABLE = ""
+
+
+class CachedResponse:
+    """Serialized HTTP response (headers and body) ready to be replayed."""
+
+    __slots__ = ("headers", "body")
+
+    def __init__(self, headers: List[Tuple[bytes, bytes]], body: bytes):
+        self.headers = headers
+        self.body = body
+
+
+async def read_body(receive) -> bytes:
+    """Read the complete HTTP request body from an ASGI receive channel."""
+    chunks = []
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+
+def replay_receive(body: bytes, receive):
+    """Return an ASGI receive channel that yields an already-read body once, then defers to `receive`."""
+    sent = False
+
+    async def replay():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return await receive()
+
+    return replay
+
+
+class ResponseCacheMiddleware:
+    """
+    ASGI wrapper around the GraphQL endpoint that caches successful responses.
+
+    Only single-operation queries whose root fields are all in `cacheable_fields`
+    are cached, and only when the response is a 200 without GraphQL errors.
+    Call `invalidate()` whenever the catalog changes.
+
+    Cache hits never reach the resolvers, so they skip error/latency injection and
+    the per-field resolver metrics (they are counted in `products.response_cache.hits`).
+    While `bypass()` returns True the cache is neither read nor written, so injected
+    failures and delays apply to every request.
+    """
+
+    def __init__(
+        self,
+        app,
+        cacheable_fields: Iterable[str],
+        max_entries: int = 256,
+        max_bytes: int = 32 * 1024 * 1024,
+        ttl: float = 5.0,
+        query_resolver: Optional[Callable[[Mapping[str, Any]], Optional[str]]] = None,
+        bypass: Optional[Callable[[], bool]] = None,
+    ):
+        """
+        Args:
+            app: The wrapped ASGI app (the Strawberry GraphQL app)
+            cacheable_fields: Root query fields whose results may be cached
+            max_entries: Maximum number of cached responses
+            max_bytes: Maximum total size of cached response bodies
+            ttl: Seconds a cached response stays valid
+            query_resolver: Returns the query text of a decoded request body
+                (e.g. resolving persisted query hashes); defaults to its "query" key
+            bypass: Returns True while requests must skip the cache (e.g. fault injection is on)
+        """
+        self.app = app
+        self.query_resolver = query_resolver
+        self.bypass = bypass
+        self.cacheable_fields = frozenset(cacheable_fields) | {"__typename"}
+        self.responses: LRUCache[CachedResponse] = LRUCache(
+            max_entries,
+            ttl=ttl,
+            max_weight=max_bytes,
+            weigher=lambda response: len(response.body),
+            on_evict=lambda key, value: _evictions.add(1),
+        )
+        # Query text -> normalized document, so each distinct text is parsed only once
+        self._documents: LRUCache[str] = LRUCache(max_entries * 4)
+        self.generation = 0
+
+    @classmethod
+    def from_env(cls, app, cacheable_fields: Iterable[str], **kwargs) -> "ResponseCacheMiddleware":
+        """
+        Build the middleware from environment variables.
+
+        Environment variables:
+            PRODUCTS_RESPONSE_CACHE_MAX_ENTRIES: Maximum cached responses (default: 256)
+            PRODUCTS_RESPONSE_CACHE_MAX_BYTES: Maximum total cached bytes (default: 32 MiB)
+            PRODUCTS_RESPONSE_CACHE_TTL_SECONDS: Time-to-live of an entry (default: 5)
+        """
+        return cls(
+            app,
+            cacheable_fields,
+            max_entries=int(os.getenv("PRODUCTS_RESPONSE_CACHE_MAX_ENTRIES", "256")),
+            max_bytes=int(os.getenv("PRODUCTS_RESPONSE_CACHE_MAX_BYTES", str(32 * 1024 * 1024))),
+            ttl=float(os.getenv("PRODUCTS_RESPONSE_CACHE_TTL_SECONDS", "5")),
+            **kwargs,
+        )
+
+    def invalidate(self) -> None:
+        """Drop every cached response (called when the catalog changes)."""
+        self.generation += 1
+        self.responses.clear()
+        _invalidations.add(1)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or (self.bypass is not None and self.bypass()):
+            await self.app(scope, receive, send)
+            return
+
+        body = await read_body(receive)
+        key = self._cache_key(body)
+        if key is None:
+            await self.app(scope, replay_receive(body, receive), send)
+            return
+
+        span = trace.get_current_span()
+        cached = self.responses.get(key)
+        if cached is not None:
+            _hits.add(1)
+            span.set_attribute("graphql.response_cache.hit", True)
+            await send({"type": "http.response.start", "status": 200, "headers": cached.headers})
+            await send({"type": "http.response.body", "body": cached.body})
+            return
+
+        _misses.add(1)
+        span.set_attribute("graphql.response_cache.hit", False)
+
+        generation = self.generation
+        start = None
+        chunks = []
+
+        async def capture(message):
+            nonlocal start
+            if message["type"] == "http.response.start":
+                start = message
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        await self.app(scope, replay_receive(body, receive), capture)
+
+        # Never cache failures, GraphQL errors, or results computed from a stale catalog
+        if start is None or start["status"] != 200 or generation != self.generation:
+            return
+        headers = start.get("headers", [])
+        if not any(k == b"content-type" and v.startswith(b"application/json") for k, v in headers):
+            return
+        response_body = b"".join(chunks)
+        if b'"errors"' in response_body:
+            return
+        self.responses.set(key, CachedResponse(list(headers), response_body))
+
+    def _cache_key(self, body: bytes) -> Optional[str]:
+        """Compute the cache key for a request body, or None if it is not cacheable."""
+        try:
+            data = json_codec.loads(body)
+        except ValueError:
+            return None
+        if not isinstance(data, dict):
+            return None
+
+        if self.query_resolver is not None:
+            query = self.query_resolver(data)
+        else:
+            query = data.get("query")
+        if not isinstance(query, str):
+            return None
+        normalized = self._normalize(query)
+        if not normalized:
+            return None
+
+        variables = data.get("variables") or {}
+        digest = hashlib.sha256(normalized.encode())
+        digest.update(b"\0")
+        digest.update(json.dumps(variables, sort_keys=True, separators=(",", ":")).encode())
+        digest.update(b"\0")
+        digest.update(str(data.get("operationName") or "").encode())
+        return digest.hexdigest()
+
+    def _normalize(self, query: str) -> str:
+        """Return the printed (normalized) document, or "" if the query cannot be cached."""
+        normalized = self._documents.get(query)
+        if normalized is None:
+            normalized = self._normalize_uncached(query)
+            self._documents.set(query, normalized)
+        return normalized
+
+    def _normalize_uncached(self, query: str) -> str:
+        try:
+            document = parse(query, no_location=True)
+        except GraphQLError:
+            return _NOT_CACHEABLE
+
+        operations = [d for d in document.definitions if isinstance(d, OperationDefinitionNode)]
+        if len(operations) != 1 or operations[0].operation != OperationType.QUERY:
+            return _NOT_CACHEABLE
+
+        for selection in operations[0].selection_set.selections:
+            if not isinstance(selection, FieldNode) or selection.name.value not in self.cacheable_fields:
+                return _NOT_CACHEABLE
+
+        return print_ast(document)
@@ -0,0 +1,99 @@
+"""
+Runtime-adjustable configuration shared by the chaos and telemetry controls of the products subgraph
+Settings are parsed once, swapped atomically, and can be changed through an admin endpoint or a watched file
+"""
+import json
+import os
+import random
+import threading
+import time
+from typing import Any, Dict, Mapping, Optional
+
+
+class RuntimeConfig:
+    """
+    Configuration that is parsed once, swapped atomically and adjustable at runtime.
+
+    Subclasses implement `_apply(config)` (validate a partial mapping and
+    replace `self._config`) and `snapshot()`. Updates can be persisted to a
+    JSON file whose mtime is polled at most every `reload_interval` seconds,
+    so a change made through one worker's admin endpoint reaches all workers.
+    """
+
+    def __init__(self, config_file: Optional[str] = None, reload_interval: float = 2.0):
+        self.config_file = config_file
+        self.reload_interval = reload_interval
+        self._rng = threading.local()
+        self._lock = threading.Lock()
+        self._next_check = 0.0
+        self._file_mtime: Optional[float] = None
+
+    def _apply(self, config: Mapping[str, Any]) -> None:
+        raise NotImplementedError
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return a copy of the active configuration."""
+        raise NotImplementedError
+
+    def update(self, config: Mapping[str, Any], persist: bool = True) -> Dict[str, Any]:
+        """
+        Change the configuration at runtime. Keys that are omitted keep their current value.
+
+        Args:
+            config: Partial configuration
+            persist: Also write the result to the config file (if configured) so
+                every worker process picks it up
+
+        Returns:
+            The new configuration
+
+        Raises:
+            ValueError, TypeError: If the configuration is invalid
+        """
+        if not isinstance(config, Mapping):
+            raise TypeError("configuration must be an object")
+        with self._lock:
+            self._apply(config)
+            snapshot = self.snapshot()
+            if persist and self.config_file:
+                tmp_path = f"{self.config_file}.{os.getpid()}.tmp"
+                with open(tmp_path, "w") as f:
+                    json.dump(snapshot, f)
+                os.replace(tmp_path, self.config_file)
+                self._file_mtime = os.stat(self.config_file).st_mtime
+        return snapshot
+
+    def maybe_reload(self, force: bool = False) -> None:
+        """Reload the config file if it changed (checked at most every `reload_interval` seconds)."""
+        if not self.config_file:
+            return
+        now = time.monotonic()
+        if not force and now < self._next_check:
+            return
+        self._next_check = now + self.reload_interval
+
+        try:
+            mtime = os.stat(self.config_file).st_mtime
+        except OSError:
+            return
+        if mtime == self._file_mtime:
+            return
+
+        try:
+            with open(self.config_file) as f:
+                config = json.load(f)
+            with self._lock:
+                if not isinstance(config, Mapping):
+                    raise TypeError("configuration must be an object")
+                self._apply(config)
+                self._file_mtime = mtime
+        except (OSError, ValueError, TypeError) as e:
+            print(f"⚠️  Could not reload {self.config_file}: {e}")
+            self._file_mtime = mtime
+
+    def _random(self) -> random.Random:
+        """Per-thread RNG, so concurrent callers never contend on shared RNG state."""
+        rng = getattr(self._rng, "random", None)
+        if rng is None:
+            rng = self._rng.random = random.Random()
+        return rng
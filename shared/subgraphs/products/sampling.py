@@ -0,0 +1,370 @@
+"""
+Adaptive trace sampling for the products subgraph
+- AdaptiveSampler: ratio sampling capped by a traces-per-second rate limiter, adjustable at runtime
+- TailSamplingProcessor: enforces a per-second span budget and always keeps failed or slow requests
+
+Together they bound telemetry overhead regardless of request rate while keeping the traces
+that matter for debugging.
+"""
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Mapping, Optional, Sequence
+
+from opentelemetry import context as context_api
+from opentelemetry import metrics, trace
+from opentelemetry.sdk.trace import ReadableSpan, Span, SpanProcessor
+from opentelemetry.sdk.trace.sampling import Decision, Sampler, SamplingResult
+from opentelemetry.trace import SpanContext, StatusCode, TraceFlags
+
+from runtime_config import RuntimeConfig
+
+meter = metrics.get_meter(__name__)
+
+_sampled = meter.create_counter(
+    "products.tracing.sampled_traces", unit="{trace}", description="Root traces sampled by the head sampler"
+)
+_promoted = meter.create_counter(
+    "products.tracing.promoted_traces", unit="{trace}",
+    description="Unsampled traces exported because they failed or were slow",
+)
+_tail_recorded = meter.create_counter(
+    "products.tracing.tail_recorded_traces", unit="{trace}",
+    description="Unsampled root traces recorded so they can be exported if they fail or are slow",
+)
+_budget_dropped = meter.create_counter(
+    "products.tracing.budget_dropped_spans", unit="{span}", description="Sampled spans dropped by the span budget"
+)
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled at `rate` tokens per second, holding at most `burst` tokens."""
+
+    def __init__(self, rate: float, burst: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            rate: Tokens added per second (<= 0 means unlimited)
+            burst: Bucket capacity (default: one second worth of tokens)
+            clock: Monotonic time source (injectable for tests)
+        """
+        self.clock = clock
+        self._lock = threading.Lock()
+        self.configure(rate, burst)
+
+    def configure(self, rate: float, burst: Optional[float] = None) -> None:
+        with self._lock:
+            self.rate = float(rate)
+            self.burst = float(burst) if burst is not None else max(self.rate, 1.0)
+            self.tokens = self.burst
+            self.updated = self.clock()
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Take `tokens` from the bucket; returns False (taking nothing) if there are not enough."""
+        if self.rate <= 0:
+            return True
+        with self._lock:
+            now = self.clock()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens < tokens:
+                return False
+            self.tokens -= tokens
+            return True
+
+
+class SamplingSettings(RuntimeConfig):
+    """
+    Runtime-adjustable sampling settings shared by AdaptiveSampler and TailSamplingProcessor.
+
+    Configuration shape (env, config file or admin endpoint):
+        {"ratio": 0.25, "traces_per_second": 50, "span_budget": 2000,
+         "keep_errors": true, "slow_threshold_ms": 500, "tail_traces_per_second": 10}
+    """
+
+    DEFAULTS: Dict[str, Any] = {
+        "ratio": 0.25,
+        "traces_per_second": 50.0,
+        "span_budget": 2000.0,
+        "keep_errors": True,
+        "slow_threshold_ms": 500.0,
+        "tail_traces_per_second": 10.0,
+    }
+
+    def __init__(self, config_file: Optional[str] = None, reload_interval: float = 2.0, **overrides: Any):
+        """
+        Args:
+            config_file: Optional JSON file watched for changes
+            reload_interval: Minimum seconds between config file checks
+            **overrides: Initial values for any of the DEFAULTS keys
+        """
+        super().__init__(config_file, reload_interval)
+        self._config: Dict[str, Any] = dict(self.DEFAULTS)
+        self.traces = TokenBucket(self.DEFAULTS["traces_per_second"])
+        self.spans = TokenBucket(self.DEFAULTS["span_budget"])
+        self.tail_traces = TokenBucket(self.DEFAULTS["tail_traces_per_second"])
+        self._apply(overrides)
+        self.maybe_reload(force=True)
+
+    @classmethod
+    def from_env(cls) -> "SamplingSettings":
+        """
+        Build the settings from environment variables.
+
+        Environment variables:
+            PRODUCTS_TRACE_SAMPLE_RATIO: Fraction of root traces sampled (default: 0.25)
+            PRODUCTS_TRACE_RATE_LIMIT: Maximum sampled root traces per second (default: 50, 0 = unlimited)
+            PRODUCTS_SPAN_BUDGET: Maximum exported spans per second (default: 2000, 0 = unlimited)
+            PRODUCTS_TRACE_KEEP_ERRORS: Export unsampled traces that failed (default: true)
+            PRODUCTS_TRACE_SLOW_THRESHOLD_MS: Export unsampled traces slower than this (default: 500, 0 = off)
+            PRODUCTS_TRACE_TAIL_RATE_LIMIT: Maximum unsampled root traces recorded per second for
+                the two checks above (default: 10, 0 = unlimited); the rest are not recorded at all
+            PRODUCTS_SAMPLING_CONFIG_FILE: Optional JSON file watched for changes
+            PRODUCTS_SAMPLING_RELOAD_SECONDS: How often the config file's mtime is checked (default: 2)
+        """
+        overrides: Dict[str, Any] = {}
+        for key, env_var in (
+            ("ratio", "PRODUCTS_TRACE_SAMPLE_RATIO"),
+            ("traces_per_second", "PRODUCTS_TRACE_RATE_LIMIT"),
+            ("span_budget", "PRODUCTS_SPAN_BUDGET"),
+            ("keep_errors", "PRODUCTS_TRACE_KEEP_ERRORS"),
+            ("slow_threshold_ms", "PRODUCTS_TRACE_SLOW_THRESHOLD_MS"),
+            ("tail_traces_per_second", "PRODUCTS_TRACE_TAIL_RATE_LIMIT"),
+        ):
+            value = os.getenv(env_var)
+            if value:
+                overrides[key] = value
+        return cls(
+            config_file=os.getenv("PRODUCTS_SAMPLING_CONFIG_FILE") or None,
+            reload_interval=float(os.getenv("PRODUCTS_SAMPLING_RELOAD_SECONDS", "2")),
+            **overrides,
+        )
+
+    def _apply(self, config: Mapping[str, Any]) -> None:
+        unknown = set(config) - set(self.DEFAULTS)
+        if unknown:
+            raise ValueError(f"unknown sampling settings: {', '.join(sorted(unknown))}")
+
+        new = dict(self._config)
+        for key, value in config.items():
+            if key == "keep_errors":
+                new[key] = value if isinstance(value, bool) else str(value).lower() == "true"
+            else:
+                new[key] = max(0.0, float(value))
+        new["ratio"] = min(1.0, new["ratio"])
+
+        if new["traces_per_second"] != self._config["traces_per_second"]:
+            self.traces.configure(new["traces_per_second"])
+        if new["span_budget"] != self._config["span_budget"]:
+            self.spans.configure(new["span_budget"])
+        if new["tail_traces_per_second"] != self._config["tail_traces_per_second"]:
+            self.tail_traces.configure(new["tail_traces_per_second"])
+        self._config = new
+
+    def snapshot(self) -> Dict[str, Any]:
+        return dict(self._config)
+
+    @property
+    def ratio(self) -> float:
+        return self._config["ratio"]
+
+    @property
+    def keep_errors(self) -> bool:
+        return self._config["keep_errors"]
+
+    @property
+    def slow_threshold_ns(self) -> int:
+        return int(self._config["slow_threshold_ms"] * 1_000_000)
+
+    @property
+    def tail_enabled(self) -> bool:
+        """Whether unsampled spans must be recorded so failed/slow traces can be promoted."""
+        return self.keep_errors or self._config["slow_threshold_ms"] > 0
+
+
+_TRACE_ID_LIMIT = (1 << 64) - 1
+
+
+class AdaptiveSampler(Sampler):
+    """
+    Parent-based head sampler with a ratio and a traces-per-second cap.
+
+    - Sampled parent (e.g. the router): always sampled, respecting upstream decisions
+    - Root span: sampled if its trace id falls within `ratio` AND the rate limiter has a token
+
+    While tail capture is enabled, up to `tail_traces_per_second` unsampled root traces
+    are still recorded (RECORD_ONLY), so TailSamplingProcessor can export them if the
+    request fails or is slow. Every other unsampled trace is dropped outright, so its
+    spans are never created, whatever the request rate. Child spans within the
+    process follow their parent.
+    """
+
+    def __init__(self, settings: SamplingSettings):
+        self.settings = settings
+
+    def should_sample(
+        self,
+        parent_context: Optional[context_api.Context],
+        trace_id: int,
+        name: str,
+        kind: Optional[trace.SpanKind] = None,
+        attributes: Optional[Mapping[str, Any]] = None,
+        links: Optional[Sequence[trace.Link]] = None,
+        trace_state: Optional[trace.TraceState] = None,
+    ) -> SamplingResult:
+        settings = self.settings
+        settings.maybe_reload()
+        parent_span = trace.get_current_span(parent_context)
+        parent = parent_span.get_span_context()
+
+        if parent.is_valid and not parent.is_remote:
+            # Local child: same decision as its parent span
+            if parent.trace_flags.sampled:
+                decision = Decision.RECORD_AND_SAMPLE
+            elif parent_span.is_recording():
+                decision = Decision.RECORD_ONLY
+            else:
+                decision = Decision.DROP
+            return SamplingResult(decision, attributes, parent.trace_state)
+
+        if parent.is_valid:
+            sampled = parent.trace_flags.sampled
+        else:
+            # Same trace-id based decision as TraceIdRatioBased, so it is consistent across services
+            sampled = (trace_id & _TRACE_ID_LIMIT) < settings.ratio * (_TRACE_ID_LIMIT + 1)
+            sampled = sampled and settings.traces.try_acquire()
+            if sampled:
+                _sampled.add(1)
+
+        if sampled:
+            decision = Decision.RECORD_AND_SAMPLE
+        elif settings.tail_enabled and settings.tail_traces.try_acquire():
+            _tail_recorded.add(1)
+            decision = Decision.RECORD_ONLY
+        else:
+            decision = Decision.DROP
+        # RECORD_ONLY spans keep their start attributes too: the SDK builds the span from
+        # the sampling result, and tail sampling may still export it
+        return SamplingResult(decision, attributes, parent.trace_state if parent.is_valid else trace_state)
+
+    def get_description(self) -> str:
+        return f"AdaptiveSampler{{ratio={self.settings.ratio}}}"
+
+
+def _is_local_root(span: ReadableSpan) -> bool:
+    return span.parent is None or span.parent.is_remote
+
+
+def _as_sampled(span: ReadableSpan) -> ReadableSpan:
+    """Copy of a finished span whose context carries the sampled flag, so exporters accept it."""
+    ctx = span.context
+    return ReadableSpan(
+        name=span.name,
+        context=SpanContext(
+            ctx.trace_id, ctx.span_id, ctx.is_remote, TraceFlags(TraceFlags.SAMPLED), ctx.trace_state
+        ),
+        parent=span.parent,
+        resource=span.resource,
+        attributes=span.attributes,
+        events=span.events,
+        links=span.links,
+        kind=span.kind,
+        status=span.status,
+        start_time=span.start_time,
+        end_time=span.end_time,
+        instrumentation_scope=span.instrumentation_scope,
+    )
+
+
+class _PendingTrace:
+    __slots__ = ("spans", "failed")
+
+    def __init__(self):
+        self.spans: List[ReadableSpan] = []
+        self.failed = False
+
+
+class TailSamplingProcessor(SpanProcessor):
+    """
+    Span processor in front of the exporting processor (e.g. BatchSpanProcessor).
+
+    - Sampled spans are forwarded while the per-second span budget lasts
+    - Unsampled (RECORD_ONLY) spans are buffered per trace until the local root
+      span ends; the trace is then exported if any of its spans failed or the
+      root took longer than the slow threshold, and discarded otherwise.
+      Promoted traces bypass the span budget.
+    """
+
+    def __init__(
+        self,
+        delegate: SpanProcessor,
+        settings: SamplingSettings,
+        max_traces: int = 1000,
+        max_spans_per_trace: int = 256,
+    ):
+        """
+        Args:
+            delegate: Processor that exports spans
+            settings: Shared sampling settings
+            max_traces: Unsampled traces buffered at once (oldest are discarded)
+            max_spans_per_trace: Spans buffered per unsampled trace
+        """
+        self.delegate = delegate
+        self.settings = settings
+        self.max_traces = max_traces
+        self.max_spans_per_trace = max_spans_per_trace
+        self._pending: "OrderedDict[int, _PendingTrace]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def on_start(self, span: Span, parent_context: Optional[context_api.Context] = None) -> None:
+        self.delegate.on_start(span, parent_context=parent_context)
+
+    def on_end(self, span: ReadableSpan) -> None:
+        if span.context.trace_flags.sampled:
+            if self.settings.spans.try_acquire():
+                self.delegate.on_end(span)
+            else:
+                _budget_dropped.add(1)
+            return
+
+        trace_id = span.context.trace_id
+        failed = span.status.status_code is StatusCode.ERROR
+        with self._lock:
+            pending = self._pending.get(trace_id)
+            if pending is None:
+                pending = self._pending[trace_id] = _PendingTrace()
+                while len(self._pending) > self.max_traces:
+                    self._pending.popitem(last=False)
+            pending.failed = pending.failed or failed
+            if len(pending.spans) < self.max_spans_per_trace:
+                pending.spans.append(span)
+            if not _is_local_root(span):
+                return
+            del self._pending[trace_id]
+
+        settings = self.settings
+        slow_ns = settings.slow_threshold_ns
+        slow = slow_ns > 0 and span.end_time - span.start_time >= slow_ns
+        if (pending.failed and settings.keep_errors) or slow:
+            _promoted.add(1, {"reason": "error" if pending.failed else "slow"})
+            for buffered in pending.spans:
+                self.delegate.on_end(_as_sampled(buffered))
+
+    def attach(self, delegate: Optional[SpanProcessor]) -> None:
+        """
+        Replace the downstream processor (None discards spans from now on).
+        Spans held by a buffering placeholder (see export_pipeline.BufferingSpanProcessor)
+        are handed to the new processor.
+        """
+        previous = self.delegate
+        self.delegate = delegate if delegate is not None else SpanProcessor()
+        drain = getattr(previous, "drain", None)
+        if drain is not None and delegate is not None:
+            for span in drain():
+                delegate.on_end(span)
+
+    def shutdown(self) -> None:
+        self.delegate.shutdown()
+
+    def force_flush(self, timeout_millis: int = 30000) -> bool:
+        return self.delegate.force_flush(timeout_millis)
@@ -0,0 +1,77 @@
+"""
+Production launcher for the products subgraph
+Runs uvicorn with one worker process per available core, uvloop/httptools when installed,
+and keep-alive/backlog tuned for a router holding long-lived connection pools
+"""
+import importlib.util
+import math
+import os
+
+import uvicorn
+
+
+def available_cpus() -> int:
+    """
+    Count the CPUs this process may actually use.
+
+    Honors CPU affinity and the cgroup v2 CPU quota (container CPU limits),
+    which os.cpu_count() ignores.
+    """
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except AttributeError:
+        cpus = os.cpu_count() or 1
+
+    try:
+        with open("/sys/fs/cgroup/cpu.max") as f:
+            quota, period = f.read().split()
+        if quota != "max":
+            cpus = min(cpus, max(1, math.ceil(int(quota) / int(period))))
+    except (OSError, ValueError):
+        pass
+
+    return cpus
+
+
+def worker_count() -> int:
+    """Worker processes from PRODUCTS_WORKERS ("auto" or unset = one per available CPU)."""
+    configured = os.getenv("PRODUCTS_WORKERS", "auto")
+    if configured == "auto":
+        return available_cpus()
+    return max(1, int(configured))
+
+
+def main():
+    """
+    Start the production server.
+
+    Environment variables:
+        PORT: Listen port (default: 4003)
+        PRODUCTS_WORKERS: Worker processes, or "auto" (default)
+        PRODUCTS_BACKLOG: Listen socket backlog (default: 2048)
+        PRODUCTS_KEEPALIVE_SECONDS: Idle keep-alive timeout (default: 65, longer than the router's pool idle timeout)
+        PRODUCTS_GRACEFUL_SHUTDOWN_SECONDS: Time allowed for in-flight requests and telemetry flush (default: 20)
+    """
+    port = int(os.getenv("PORT", 4003))
+    workers = worker_count()
+    loop = "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+    http = "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+    print(f"🚀 Products subgraph starting on :{port} with {workers} worker(s) (loop={loop}, http={http})")
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=port,
+        workers=workers,
+        loop=loop,
+        http=http,
+        backlog=int(os.getenv("PRODUCTS_BACKLOG", "2048")),
+        timeout_keep_alive=int(os.getenv("PRODUCTS_KEEPALIVE_SECONDS", "65")),
+        timeout_graceful_shutdown=int(os.getenv("PRODUCTS_GRACEFUL_SHUTDOWN_SECONDS", "20")),
+        lifespan="on",
+        access_log=False,
+    )
+
+
+if __name__ == "__main__":
+    main()
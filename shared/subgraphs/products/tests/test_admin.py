@@ -0,0 +1,24 @@
+"""Authentication of the runtime admin endpoints."""
+from starlette.testclient import TestClient
+
+from admin import AdminEndpoint
+
+
+def endpoint(token):
+    config = {"rate": 0}
+    return AdminEndpoint(lambda: dict(config), lambda update: {**config, **update}, token=token)
+
+
+def test_endpoint_is_disabled_without_a_token():
+    client = TestClient(endpoint(""))
+    assert client.get("/").status_code == 404
+    assert client.put("/", json={"rate": 100}).status_code == 404
+
+
+def test_endpoint_requires_the_bearer_token():
+    client = TestClient(endpoint("secret"))
+    assert client.get("/").status_code == 401
+    assert client.get("/", headers={"Authorization": "Bearer wrong"}).status_code == 401
+    response = client.put("/", json={"rate": 5}, headers={"Authorization": "Bearer secret"})
+    assert response.status_code == 200
+    assert response.json() == {"rate": 5}
@@ -0,0 +1,119 @@
+"""SQLite backend queries against a seeded file, checked against the in-memory catalog."""
+import asyncio
+
+import pytest
+
+from backends import InMemoryBackend, SQLiteBackend, seed_sqlite
+from catalog import Catalog
+
+RECORDS = [
+    {"id": "1", "name": "Desk", "price": 250.0, "description": "Oak", "category": "Furniture", "inStock": True},
+    {"id": "2", "name": "Lamp", "price": 40.0, "description": "LED", "category": "Lighting", "inStock": False},
+    {"id": "3", "name": "Chair", "price": 120.0, "description": "Mesh", "category": "Furniture", "inStock": True},
+    {"id": "4", "name": "Shelf", "price": 80.0, "description": "Pine", "category": "Furniture", "inStock": False,
+     "rank": 1},
+]
+
+
+@pytest.fixture
+def backends(tmp_path):
+    path = str(tmp_path / "products.db")
+    assert seed_sqlite(path, RECORDS) == len(RECORDS)
+    return SQLiteBackend(path, pool_size=2), InMemoryBackend(Catalog(RECORDS))
+
+
+def ids(records):
+    return [record.id if record else None for record in records]
+
+
+def test_get_and_bulk_fetch(backends):
+    sqlite, _ = backends
+
+    async def scenario():
+        try:
+            product = await sqlite.get("3")
+            assert (product.name, product.price, product.in_stock) == ("Chair", 120.0, True)
+            assert await sqlite.get("missing") is None
+            # Results stay aligned with the requested ids, duplicates and misses included
+            assert ids(await sqlite.get_many(["4", "missing", "1", "4"])) == ["4", None, "1", "4"]
+            assert await sqlite.get_many([]) == []
+        finally:
+            await sqlite.close()
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize(
+    "minimum, maximum, in_stock, offset, limit",
+    [
+        (None, None, None, 0, 10),
+        (50.0, 200.0, None, 0, 10),
+        (None, 100.0, False, 0, 10),
+        (None, None, True, 1, 1),
+        (None, None, None, 0, 0),
+    ],
+)
+def test_price_range_matches_memory_backend(backends, minimum, maximum, in_stock, offset, limit):
+    sqlite, memory = backends
+
+    async def scenario():
+        try:
+            return (
+                ids(await sqlite.price_range(minimum, maximum, in_stock, offset, limit)),
+                ids(await memory.price_range(minimum, maximum, in_stock, offset, limit)),
+            )
+        finally:
+            await sqlite.close()
+
+    from_sqlite, from_memory = asyncio.run(scenario())
+    assert from_sqlite == from_memory
+
+
+def test_orderings_match_memory_backend(backends):
+    sqlite, memory = backends
+
+    async def orderings(backend):
+        return [
+            ids(await backend.all()),
+            ids(await backend.top(2)),
+            ids(await backend.page(1, 2)),
+            ids(await backend.category_page("Furniture", False, 0, 10)),
+        ]
+
+    async def scenario():
+        try:
+            return await orderings(sqlite), await orderings(memory)
+        finally:
+            await sqlite.close()
+
+    from_sqlite, from_memory = asyncio.run(scenario())
+    assert from_sqlite == from_memory
+
+
+def test_product_count_is_refreshed_in_the_background(backends):
+    sqlite, _ = backends
+
+    async def scenario():
+        try:
+            # No count is known until the background query has run
+            assert sqlite.product_count() is None
+            await sqlite._count_task
+            return sqlite.product_count()
+        finally:
+            await sqlite.close()
+
+    assert asyncio.run(scenario()) == len(RECORDS)
+
+
+def test_close_empties_the_pool(backends):
+    sqlite, _ = backends
+
+    async def scenario():
+        await asyncio.gather(*(sqlite.get(id) for id in ("1", "2", "3")))
+        assert sqlite._pool.qsize() == 2
+        await sqlite.close()
+        assert sqlite._pool.empty()
+        with pytest.raises(RuntimeError):
+            await sqlite.get("1")
+
+    asyncio.run(scenario())
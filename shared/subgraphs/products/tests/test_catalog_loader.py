@@ -0,0 +1,51 @@
+"""Catalog files: formats, memory-mapped reads and id normalization."""
+import gzip
+import json
+
+import pytest
+
+from catalog_loader import load_catalog
+
+PRODUCTS = [
+    {"id": 1, "name": "Desk", "price": 250.0, "category": "Furniture", "inStock": True},
+    {"id": "2", "name": "Lamp", "price": 40, "category": "Lighting"},
+]
+
+
+def write_catalog(directory, name):
+    path = directory / name
+    if ".jsonl" in name:
+        text = "".join(json.dumps(product) + "\n" for product in PRODUCTS)
+    else:
+        text = json.dumps(PRODUCTS)
+    if name.endswith(".gz"):
+        path.write_bytes(gzip.compress(text.encode()))
+    else:
+        path.write_text(text)
+    return str(path)
+
+
+@pytest.mark.parametrize(
+    "name, mmap_threshold",
+    [
+        ("catalog.json", 1),
+        ("catalog.json.gz", 1),
+        ("catalog.jsonl", 1 << 30),
+        ("catalog.jsonl", 1),  # read through the memory map
+        ("catalog.jsonl.gz", 1),
+    ],
+)
+def test_numeric_ids_are_served_as_strings(tmp_path, name, mmap_threshold):
+    catalog = load_catalog(write_catalog(tmp_path, name), mmap_threshold)
+
+    assert [record.id for record in catalog.all()] == ["1", "2"]
+    assert catalog.get("1").name == "Desk"
+    assert catalog.get(1) is None
+
+
+def test_invalid_record_names_its_position(tmp_path):
+    path = tmp_path / "catalog.jsonl"
+    path.write_text(json.dumps(PRODUCTS[0]) + "\n" + json.dumps({"name": "No id"}) + "\n")
+
+    with pytest.raises(ValueError, match="product #2"):
+        load_catalog(str(path))
@@ -0,0 +1,44 @@
+"""Parsed/validated document caching through Strawberry's ParserCache and ValidationCache."""
+import pytest
+from starlette.testclient import TestClient
+
+import main
+
+pytestmark = pytest.mark.skipif(main.document_cache is None, reason="document cache disabled")
+
+VALID = "{ topProducts(limit: 2) { id name } }"
+INVALID = "{ topProducts(limit: 2) { id noSuchField } }"
+
+
+@pytest.fixture(autouse=True)
+def bypass_response_cache(monkeypatch):
+    # The response cache would answer repeats before the document cache is reached
+    monkeypatch.setattr(main.latency_injection, "active", lambda: True)
+
+
+def post(client, query):
+    return client.post("/graphql", json={"query": query}).json()
+
+
+def test_repeated_queries_skip_parsing_and_validation():
+    cache = main.document_cache
+    with TestClient(main.app) as client:
+        first = post(client, VALID)
+        parsed = cache.parser_info()
+        validated = cache.validation.cached_validate_document.cache_info()
+        assert post(client, VALID) == first
+
+    assert cache.parser_info().hits == parsed.hits + 1
+    assert cache.parser_info().misses == parsed.misses
+    assert cache.validation.cached_validate_document.cache_info().hits == validated.hits + 1
+
+
+def test_cached_validation_errors_are_returned_again():
+    with TestClient(main.app) as client:
+        first = post(client, INVALID)
+        second = post(client, INVALID)
+        valid = post(client, VALID)
+
+    assert "noSuchField" in first["errors"][0]["message"]
+    assert second["errors"] == first["errors"]
+    assert "errors" not in valid
@@ -0,0 +1,21 @@
+"""Error injection settings from the environment."""
+from error_injection import ErrorInjectionController
+
+SERVICE = "products-subgraph-test"
+
+
+def test_error_rates_from_env(monkeypatch):
+    monkeypatch.setenv("PRODUCTS_SUBGRAPH_TEST_ERROR_RATE", "5")
+    monkeypatch.setenv("PRODUCTS_SUBGRAPH_TEST_ERROR_RATES", '{"fields": {"products": 20}}')
+    controller = ErrorInjectionController(SERVICE)
+    assert controller.rate_for("products") == 20
+    assert controller.rate_for("product") == 5
+
+
+def test_invalid_error_rates_fall_back_to_the_legacy_rate(monkeypatch, capsys):
+    monkeypatch.setenv("PRODUCTS_SUBGRAPH_TEST_ERROR_RATE", "5")
+    for invalid in ('{"rate": "lots"}', '{"fields": {"products": "x"}}', '{"fields": []}', "[1, 2]"):
+        monkeypatch.setenv("PRODUCTS_SUBGRAPH_TEST_ERROR_RATES", invalid)
+        controller = ErrorInjectionController(SERVICE)
+        assert controller.snapshot() == {"rate": 5.0, "fields": {}, "operations": {}}
+        assert "Ignoring invalid PRODUCTS_SUBGRAPH_TEST_ERROR_RATES" in capsys.readouterr().out
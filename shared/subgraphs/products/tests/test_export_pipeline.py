@@ -0,0 +1,92 @@
+"""Span export pipeline: processor sizing, exporter options and self-monitoring."""
+import pytest
+from opentelemetry.exporter.otlp.proto.http import Compression
+from opentelemetry.sdk.trace import ReadableSpan
+from opentelemetry.sdk.trace.export.in_memory_span_exporter import InMemorySpanExporter
+from opentelemetry.trace import SpanContext, TraceFlags
+
+import export_pipeline
+from export_pipeline import MonitoredBatchSpanProcessor, create_span_processor, exporter_options
+
+
+class RecordingCounter:
+    def __init__(self):
+        self.total = 0
+
+    def add(self, amount, attributes=None):
+        self.total += amount
+
+
+def finished_span(span_id: int, sampled: bool = True) -> ReadableSpan:
+    flags = TraceFlags(TraceFlags.SAMPLED if sampled else TraceFlags.DEFAULT)
+    return ReadableSpan(name="test", context=SpanContext(1, span_id, is_remote=False, trace_flags=flags))
+
+
+@pytest.mark.parametrize(
+    "value, expected",
+    [
+        (None, Compression.Gzip),
+        ("gzip", Compression.Gzip),
+        ("DEFLATE", Compression.Deflate),
+        ("none", Compression.NoCompression),
+        ("brotli", Compression.NoCompression),
+    ],
+)
+def test_exporter_compression(monkeypatch, value, expected):
+    if value is None:
+        monkeypatch.delenv("PRODUCTS_OTLP_COMPRESSION", raising=False)
+    else:
+        monkeypatch.setenv("PRODUCTS_OTLP_COMPRESSION", value)
+    assert exporter_options()["compression"] is expected
+
+
+def test_exporter_timeout(monkeypatch):
+    monkeypatch.delenv("PRODUCTS_OTLP_TIMEOUT_SECONDS", raising=False)
+    assert exporter_options()["timeout"] == 10.0
+    monkeypatch.setenv("PRODUCTS_OTLP_TIMEOUT_SECONDS", "2.5")
+    assert exporter_options()["timeout"] == 2.5
+
+
+def test_create_span_processor_reads_sizes_from_env(monkeypatch):
+    monkeypatch.setenv("PRODUCTS_SPAN_QUEUE_SIZE", "64")
+    monkeypatch.setenv("PRODUCTS_SPAN_BATCH_SIZE", "16")
+    monkeypatch.setenv("PRODUCTS_SPAN_SCHEDULE_DELAY_MS", "250")
+    monkeypatch.setenv("PRODUCTS_SPAN_EXPORT_TIMEOUT_MS", "1000")
+    processor = create_span_processor(InMemorySpanExporter())
+    try:
+        batch = processor._batch_processor
+        assert (batch._max_queue_size, batch._max_export_batch_size) == (64, 16)
+        assert (batch._schedule_delay_millis, batch._export_timeout_millis) == (250.0, 1000.0)
+        assert processor._span_queue.maxlen == 64
+    finally:
+        processor.shutdown()
+
+
+def test_create_span_processor_defaults_to_sdk_sizes(monkeypatch):
+    for name in ("QUEUE_SIZE", "BATCH_SIZE", "SCHEDULE_DELAY_MS", "EXPORT_TIMEOUT_MS"):
+        monkeypatch.delenv(f"PRODUCTS_SPAN_{name}", raising=False)
+    processor = create_span_processor(InMemorySpanExporter())
+    try:
+        assert processor._batch_processor._max_queue_size == 2048
+        assert processor._batch_processor._max_export_batch_size == 512
+    finally:
+        processor.shutdown()
+
+
+def test_full_queue_counts_dropped_spans_and_reports_depth(monkeypatch):
+    dropped = RecordingCounter()
+    monkeypatch.setattr(export_pipeline, "_dropped", dropped)
+    exporter = InMemorySpanExporter()
+    processor = MonitoredBatchSpanProcessor(exporter, max_queue_size=2, max_export_batch_size=1)
+    try:
+        # Holding the export lock keeps the worker from draining the queue
+        with processor._batch_processor._export_lock:
+            for span_id in range(1, 4):
+                processor.on_end(finished_span(span_id))
+            processor.on_end(finished_span(4, sampled=False))
+            depth = [observation.value for observation in processor._observe_queue(None)]
+        assert dropped.total == 1
+        assert depth == [2]
+    finally:
+        processor.shutdown()
+    assert len(exporter.get_finished_spans()) == 2
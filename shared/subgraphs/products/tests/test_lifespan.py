@@ -0,0 +1,27 @@
+"""Startup and shutdown of the products subgraph through the ASGI lifespan."""
+from starlette.testclient import TestClient
+
+import main
+
+
+def test_lifespan_closes_backend_and_flushes_telemetry(monkeypatch):
+    calls = []
+    close = main.backend.close
+
+    async def recording_close():
+        calls.append("backend.close")
+        await close()
+
+    def recording_shutdown():
+        calls.append("shutdown_opentelemetry")
+
+    monkeypatch.setattr(main.backend, "close", recording_close)
+    monkeypatch.setattr(main, "shutdown_opentelemetry", recording_shutdown)
+
+    with TestClient(main.app) as client:
+        response = client.post("/graphql", json={"query": "{ topProducts(limit: 1) { id } }"})
+        assert response.status_code == 200
+        assert response.json()["data"]["topProducts"][0]["id"]
+        assert calls == []
+
+    assert calls == ["backend.close", "shutdown_opentelemetry"]
@@ -0,0 +1,31 @@
+"""Automatic persisted queries in front of the response cache."""
+from starlette.testclient import TestClient
+
+import main
+from persisted_queries import sha256_hex
+
+QUERY = "{ topProducts(limit: 2) { id name } }"
+
+
+def persisted(sha256_hash):
+    return {"persistedQuery": {"version": 1, "sha256Hash": sha256_hash}}
+
+
+def test_mismatched_hash_is_rejected_even_when_the_response_is_cached():
+    with TestClient(main.app) as client:
+        # Warm the response cache with the plain query
+        assert client.post("/graphql", json={"query": QUERY}).json()["data"]["topProducts"]
+
+        response = client.post("/graphql", json={"query": QUERY, "extensions": persisted("0" * 64)})
+        body = response.json()
+        assert body.get("data") is None
+        assert body["errors"][0]["message"] == "provided sha does not match query"
+
+
+def test_registered_hash_is_served():
+    with TestClient(main.app) as client:
+        registered = client.post("/graphql", json={"query": QUERY, "extensions": persisted(sha256_hex(QUERY))})
+        assert registered.json()["data"]["topProducts"]
+
+        by_hash = client.post("/graphql", json={"extensions": persisted(sha256_hex(QUERY))})
+        assert by_hash.json() == registered.json()
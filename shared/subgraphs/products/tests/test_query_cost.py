@@ -0,0 +1,122 @@
+"""Query cost estimation, limits and admission control."""
+import asyncio
+
+import pytest
+from graphql import parse
+from starlette.testclient import TestClient
+
+import main
+from catalog import Catalog
+from query_cost import CostLimiter, int_argument
+
+# The router's fetch for the website's GetProducts query
+GET_PRODUCTS = "query GetProducts__products__0{products{__typename id name price description category inStock}}"
+ENTITIES = "query($r:[_Any!]!){_entities(representations:$r){...on Product{id name price description category inStock}}}"
+
+
+@pytest.fixture
+def large_catalog():
+    original = main.backend.catalog
+    main.backend.replace(Catalog(
+        {"id": str(i), "name": f"Product {i}", "price": i % 500 + 0.99, "description": "",
+         "category": "Telescopes", "inStock": i % 3 != 0}
+        for i in range(1, 50_001)
+    ))
+    yield
+    main.backend.replace(original)
+
+
+def test_full_product_list_is_not_rejected_on_a_large_catalog(large_catalog):
+    with TestClient(main.app) as client:
+        body = client.post("/graphql", json={"query": GET_PRODUCTS}).json()
+    assert "errors" not in body
+    assert len(body["data"]["products"]) == 50_000
+
+
+def test_client_controlled_lists_are_still_limited(large_catalog):
+    representations = [{"__typename": "Product", "id": str(i)} for i in range(1, 20_001)]
+    with TestClient(main.app) as client:
+        body = client.post("/graphql", json={"query": ENTITIES, "variables": {"r": representations}}).json()
+    assert body["errors"][0]["extensions"]["code"] == "OPERATION_TOO_EXPENSIVE"
+
+
+def test_estimate_uses_the_backend_product_count(large_catalog):
+    estimate = main.cost_limiter.estimate(parse(GET_PRODUCTS), None, None)
+    assert estimate.cost == 1 + 50_000 * 6
+    assert estimate.limited_cost == 1 + 6
+
+
+TOP_PRODUCTS = "query($l:Int){topProducts(limit:$l){id name}}"
+CONNECTION = "query($f:Int){productsConnection(first:$f){edges{node{id name}}}}"
+
+
+@pytest.mark.parametrize(
+    "query, variables, size",
+    [
+        (TOP_PRODUCTS, None, 5),
+        (TOP_PRODUCTS, {"l": None}, 5),
+        (TOP_PRODUCTS, {"l": 3}, 3),
+        ("{topProducts(limit:7){id name}}", None, 7),
+        (CONNECTION, None, main.page_limits.default),
+        (CONNECTION, {"f": None}, main.page_limits.default),
+        (CONNECTION, {"f": 10}, 10),
+        ("{productsConnection(first:4){edges{node{id name}}}}", None, 4),
+    ],
+    ids=["omitted", "null", "variable", "literal", "first-omitted", "first-null", "first-variable", "first-literal"],
+)
+def test_list_size_variables(query, variables, size):
+    per_item = main.cost_limiter.estimate(parse("{topProducts(limit:1){id name}}"), None, None).cost - 1
+    estimate = main.cost_limiter.estimate(parse(query), None, variables)
+    if "topProducts" in query:
+        assert estimate.cost == 1 + size * per_item
+    else:
+        # productsConnection { edges { node { id name } } }
+        assert estimate.cost == 1 + size * (1 + 1 + 2)
+
+
+def test_omitted_list_size_variables_execute():
+    with TestClient(main.app) as client:
+        top = client.post("/graphql", json={"query": TOP_PRODUCTS}).json()
+        page = client.post("/graphql", json={"query": CONNECTION, "variables": {"f": None}}).json()
+    assert len(top["data"]["topProducts"]) == 5
+    assert "errors" not in page
+
+
+def limiter(**limits):
+    return CostLimiter({"items": lambda arguments: int_argument(arguments, "first", 10)}, **limits)
+
+
+def test_estimate_counts_fragments_and_skips_typename():
+    document = parse(
+        "query{items(first:3){__typename id ...Details ...on Item{name}}}"
+        " fragment Details on Item{price tags{label}}"
+    )
+    estimate = limiter().estimate(document, None, None)
+    # Each item resolves id, name, price, tags and tags.label
+    assert estimate == (1 + 3 * 5, 1 + 3 * 5, 3)
+
+
+def test_depth_and_cost_limits_reject():
+    deep = limiter(max_depth=2).estimate(parse("{items{tags{label}}}"), None, None)
+    assert limiter(max_depth=2).check(deep).extensions["code"] == "OPERATION_TOO_DEEP"
+    assert limiter(max_depth=3).check(deep) is None
+
+    wide = limiter(max_cost=100).estimate(parse("{items(first:60){id name}}"), None, None)
+    assert limiter(max_cost=100).check(wide).extensions["code"] == "OPERATION_TOO_EXPENSIVE"
+    assert limiter(max_cost=121).check(wide) is None
+
+
+def test_expensive_operations_wait_for_a_slot():
+    cost_limiter = limiter(expensive_cost=1, max_expensive=1, queue_timeout=0.01)
+
+    async def scenario():
+        assert await cost_limiter.acquire() is None
+        rejected = await cost_limiter.acquire()
+        cost_limiter.slots.release()
+        admitted = await cost_limiter.acquire()
+        cost_limiter.slots.release()
+        return rejected, admitted
+
+    rejected, admitted = asyncio.run(scenario())
+    assert rejected.extensions["code"] == "OPERATION_LIMITED"
+    assert admitted is None
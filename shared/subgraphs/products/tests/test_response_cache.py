@@ -0,0 +1,29 @@
+"""Response cache interaction with fault injection."""
+from starlette.testclient import TestClient
+
+import main
+
+QUERY = "{ topProducts(limit: 3) { id name } }"
+
+
+def test_error_injection_applies_to_cached_queries():
+    original = main.error_injection.snapshot()
+    with TestClient(main.app) as client:
+        assert "errors" not in client.post("/graphql", json={"query": QUERY}).json()
+        try:
+            main.error_injection.update({"fields": {"topProducts": 100}})
+            body = client.post("/graphql", json={"query": QUERY}).json()
+        finally:
+            main.error_injection.update(original)
+    assert body["errors"]
+
+
+def test_latency_injection_turns_the_cache_off():
+    original = main.latency_injection.snapshot()
+    try:
+        assert not main.latency_injection.active()
+        main.latency_injection.update({"fields": {"topProducts": {"mode": "fixed", "ms": 1}}})
+        assert main.latency_injection.active()
+    finally:
+        main.latency_injection.update(original)
+    assert not main.latency_injection.active()
@@ -0,0 +1,64 @@
+"""Head sampling decisions of AdaptiveSampler."""
+from opentelemetry.sdk.trace.sampling import Decision
+
+from sampling import AdaptiveSampler, SamplingSettings
+
+ATTRIBUTES = {"http.method": "POST", "http.target": "/graphql"}
+
+
+def test_record_only_spans_keep_their_start_attributes():
+    sampler = AdaptiveSampler(SamplingSettings(ratio=0, keep_errors=True))
+    result = sampler.should_sample(None, 1, "POST /graphql", attributes=ATTRIBUTES)
+    assert result.decision == Decision.RECORD_ONLY
+    assert dict(result.attributes) == ATTRIBUTES
+
+
+def test_sampled_spans_keep_their_start_attributes():
+    sampler = AdaptiveSampler(SamplingSettings(ratio=1, traces_per_second=0))
+    result = sampler.should_sample(None, 1, "POST /graphql", attributes=ATTRIBUTES)
+    assert result.decision == Decision.RECORD_AND_SAMPLE
+    assert dict(result.attributes) == ATTRIBUTES
+
+
+def test_reload_interval_has_its_own_variable(monkeypatch):
+    monkeypatch.setenv("ERROR_INJECTION_RELOAD_SECONDS", "30")
+    monkeypatch.setenv("PRODUCTS_SAMPLING_RELOAD_SECONDS", "7")
+    assert SamplingSettings.from_env().reload_interval == 7
+
+
+def test_unsampled_traces_above_the_tail_budget_are_dropped():
+    clock = [0.0]
+    settings = SamplingSettings(ratio=0, tail_traces_per_second=3)
+    settings.tail_traces.clock = lambda: clock[0]
+    settings.tail_traces.configure(3)
+    sampler = AdaptiveSampler(settings)
+
+    decisions = [sampler.should_sample(None, i + 1, "POST /graphql").decision for i in range(10)]
+    assert decisions == [Decision.RECORD_ONLY] * 3 + [Decision.DROP] * 7
+
+    clock[0] += 1.0  # The budget refills over time
+    assert sampler.should_sample(None, 11, "POST /graphql").decision == Decision.RECORD_ONLY
+
+
+def test_unsampled_traces_are_dropped_without_tail_capture():
+    sampler = AdaptiveSampler(SamplingSettings(ratio=0, keep_errors=False, slow_threshold_ms=0))
+    assert sampler.should_sample(None, 1, "POST /graphql").decision == Decision.DROP
+
+
+def test_local_children_follow_their_parent():
+    from opentelemetry import trace
+    from opentelemetry.sdk.trace import TracerProvider
+
+    settings = SamplingSettings(ratio=0, tail_traces_per_second=1)
+    tracer = TracerProvider(sampler=AdaptiveSampler(settings)).get_tracer(__name__)
+
+    with tracer.start_as_current_span("recorded") as root:
+        assert root.is_recording() and not root.get_span_context().trace_flags.sampled
+        with tracer.start_as_current_span("child") as child:
+            assert child.is_recording()
+
+    with tracer.start_as_current_span("dropped") as root:
+        assert not root.is_recording()
+        with tracer.start_as_current_span("child") as child:
+            assert not child.is_recording()
+    assert trace.get_current_span() is trace.INVALID_SPAN
@@ -0,0 +1,56 @@
+"""Child spans are skipped for requests whose trace is not recorded."""
+import pytest
+from opentelemetry.trace import INVALID_SPAN
+from starlette.testclient import TestClient
+
+import main
+import tracing
+
+# `product` is not response-cacheable, so every request runs the resolvers
+QUERY = {
+    "query": 'query($r:[_Any!]!){ product(id:"2"){ id name } topProducts(limit:2){ id }'
+             ' _entities(representations:$r){ ...on Product{ id } } }',
+    "variables": {"r": [{"__typename": "Product", "id": "1"}]},
+}
+
+
+@pytest.fixture
+def spans(monkeypatch):
+    """Child spans yielded by child_span, and every real span it started."""
+    yielded, started = [], []
+    enter = tracing.child_span.__enter__
+    start = tracing.tracer.start_as_current_span
+
+    def recording_enter(self):
+        span = enter(self)
+        yielded.append(span)
+        return span
+
+    def recording_start(name, *args, **kwargs):
+        started.append(name)
+        return start(name, *args, **kwargs)
+
+    monkeypatch.setattr(tracing.child_span, "__enter__", recording_enter)
+    monkeypatch.setattr(tracing.tracer, "start_as_current_span", recording_start)
+    return yielded, started
+
+
+def test_unrecorded_request_creates_no_child_spans(spans):
+    yielded, started = spans
+    settings = main.sampling_settings
+    original = settings.snapshot()
+    # Nothing sampled, and a tail capture budget of one trace that the first request uses up
+    settings.update({"ratio": 0, "tail_traces_per_second": 0.001}, persist=False)
+    try:
+        with TestClient(main.app) as client:
+            assert "errors" not in client.post("/graphql", json=QUERY).json()
+            assert started, "the first unsampled request is recorded for tail capture"
+
+            yielded.clear()
+            started.clear()
+            assert "errors" not in client.post("/graphql", json=QUERY).json()
+    finally:
+        settings.update(original, persist=False)
+
+    assert yielded and all(span is INVALID_SPAN for span in yielded)
+    assert started == []
@@ -0,0 +1,108 @@
+"""
+Low-overhead span helpers for the products subgraph
+Child spans are only created (and made current) when their trace is being recorded
+and their name is enabled by configuration
+
+Unsampled traces are not recorded beyond the tail capture budget
+(PRODUCTS_TRACE_TAIL_RATE_LIMIT, see sampling.py), so under load almost every
+unsampled request skips its child spans entirely.
+"""
+import fnmatch
+import os
+from typing import Dict, Optional, Sequence
+
+from opentelemetry import trace
+from opentelemetry.trace import INVALID_SPAN, Span
+from opentelemetry.util.types import Attributes
+
+tracer = trace.get_tracer(__name__)
+
+
+def _patterns(value: Optional[str], default: str) -> Sequence[str]:
+    value = default if value is None else value
+    return tuple(p.strip() for p in value.split(",") if p.strip())
+
+
+class SpanFilter:
+    """
+    Decides which span names are created, from fnmatch-style include/exclude patterns.
+    Decisions are cached per name, so checking a name costs one dict lookup.
+    """
+
+    def __init__(self, include: Sequence[str] = ("*",), exclude: Sequence[str] = ()):
+        """
+        Args:
+            include: Patterns of span names to create (e.g. "query.*")
+            exclude: Patterns of span names never to create (e.g. "db.query.*")
+        """
+        self.include = tuple(include)
+        self.exclude = tuple(exclude)
+        self._decisions: Dict[str, bool] = {}
+
+    @classmethod
+    def from_env(cls) -> "SpanFilter":
+        """
+        Build the filter from environment variables.
+
+        Environment variables:
+            PRODUCTS_TRACE_SPANS: Comma-separated span name patterns to create (default: "*")
+            PRODUCTS_TRACE_SPANS_EXCLUDE: Comma-separated span name patterns to skip (default: none)
+        """
+        return cls(
+            include=_patterns(os.getenv("PRODUCTS_TRACE_SPANS"), "*"),
+            exclude=_patterns(os.getenv("PRODUCTS_TRACE_SPANS_EXCLUDE"), ""),
+        )
+
+    def enabled(self, name: str) -> bool:
+        decision = self._decisions.get(name)
+        if decision is None:
+            decision = any(fnmatch.fnmatchcase(name, p) for p in self.include) and not any(
+                fnmatch.fnmatchcase(name, p) for p in self.exclude
+            )
+            self._decisions[name] = decision
+        return decision
+
+
+span_filter = SpanFilter.from_env()
+
+
+class child_span:
+    """
+    Context manager for a resolver/backend child span.
+
+    Yields INVALID_SPAN (a non-recording no-op) without touching the context when:
+    - the span name is disabled by `span_filter`, or
+    - the current span belongs to a trace that is not being recorded (unsampled and
+      beyond the tail capture budget)
+
+    Callers that compute attributes should guard expensive formatting with
+    `span.is_recording()`:
+
+        with child_span("query.product") as span:
+            if span.is_recording():
+                span.set_attribute("product.id", id)
+    """
+
+    __slots__ = ("name", "attributes", "_scope")
+
+    def __init__(self, name: str, attributes: Attributes = None):
+        self.name = name
+        self.attributes = attributes
+        self._scope = None
+
+    def __enter__(self) -> Span:
+        if not span_filter.enabled(self.name):
+            return INVALID_SPAN
+        parent = trace.get_current_span()
+        if not parent.is_recording() and parent.get_span_context().is_valid:
+            # Child of an unsampled, unrecorded trace: nothing would ever be exported
+            return INVALID_SPAN
+        self._scope = tracer.start_as_current_span(self.name, attributes=self.attributes)
+        return self._scope.__enter__()
+
+    def __exit__(self, exc_type, exc_value, traceback) -> Optional[bool]:
+        scope = self._scope
+        if scope is None:
+            return None
+        self._scope = None
+        return scope.__exit__(exc_type, exc_value, traceback)
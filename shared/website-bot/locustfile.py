@@ -2,7 +2,8 @@
 """
 Locust-based load test for Apollo Router with Playwright for RUM metrics
 - ApolloRouterBrowserUser: Playwright-based browser for realistic RUM telemetry (ACTIVE)
-- ApolloRouterUser: HTTP-based GraphQL queries (disabled by default, can be enabled)
+- ApolloRouterUser: weighted GraphQL workload over pooled keep-alive connections
+  (disabled by default, GRAPHQL_USER_ENABLED=true)
 - Collects Web Vitals, page load metrics, and user interaction data
 - Full OpenTelemetry instrumentation for traces, metrics, and logs
 """
@@ -26,11 +27,12 @@ try:
 except ImportError:
     pass
 
-from locust import HttpUser, task, between
+from locust import FastHttpUser, between, constant, constant_throughput, task
 from locust_plugins.users.playwright import PlaywrightUser, pw, PageWithRetry
 
 from opentelemetry import context, baggage, trace
 from opentelemetry.context import Context
+from opentelemetry.propagate import inject
 from opentelemetry.sdk.trace import TracerProvider
 from opentelemetry.sdk.trace.export import BatchSpanProcessor
 from opentelemetry.exporter.otlp.proto.grpc.trace_exporter import OTLPSpanExporter
@@ -97,11 +99,13 @@ RequestsInstrumentor().instrument()
 
 logging.info("OpenTelemetry instrumentation initialized")
 
-# GraphQL queries for HTTP user
+# GraphQL queries for HTTP user, with their share of the GraphQL workload
+# (operation names match the website's queries so router metrics group them the same way)
 GRAPHQL_QUERIES = {
     "topProducts": {
+        "weight": 5,
         "query": """
-            query {
+            query GetTopProducts {
                 topProducts {
                     id
                     name
@@ -112,19 +116,24 @@ GRAPHQL_QUERIES = {
         """
     },
     "reviews": {
+        "weight": 3,
         "query": """
-            query {
-                reviews {
+            query TopProductReviews {
+                topProducts {
                     id
-                    body
-                    rating
+                    reviews {
+                        id
+                        body
+                        rating
+                    }
                 }
             }
         """
     },
     "inventory": {
+        "weight": 2,
         "query": """
-            query {
+            query TopProductInventory {
                 topProducts {
                     id
                     name
@@ -135,64 +144,208 @@ GRAPHQL_QUERIES = {
             }
         """
     },
+    "products": {
+        "weight": 2,
+        "query": """
+            query GetProducts {
+                products {
+                    id
+                    name
+                    price
+                    description
+                    category
+                    inStock
+                    inventory {
+                        quantity
+                        warehouse
+                        estimatedDelivery
+                    }
+                }
+            }
+        """
+    },
+    "productDetails": {
+        "weight": 3,
+        "query": """
+            query GetProductDetails($id: ID!) {
+                product(id: $id) {
+                    id
+                    name
+                    price
+                    inventory {
+                        quantity
+                    }
+                    reviews {
+                        id
+                        rating
+                        body
+                        author {
+                            name
+                        }
+                    }
+                }
+            }
+        """,
+        "variables": {"id": "1"},
+    },
 }
 
 
-# NOTE: ApolloRouterUser disabled because bot targets website frontend (not GraphQL router)
-# The website frontend doesn't have /graphql endpoint
-# For GraphQL load testing, point bot to apollo-router:4000 instead
-# To re-enable, set LOCUST_HOST to router and uncomment this class
-#
-# class ApolloRouterUser(HttpUser):
-#     """
-#     HTTP-based user for GraphQL API load testing (DISABLED)
-#     To use: Set LOCUST_HOST=http://apollo-router:4000 and uncomment this class
-#     """
-#
-#     wait_time = between(2, 5)
-#
-#     def __init__(self, *args, **kwargs):
-#         super().__init__(*args, **kwargs)
-#         self.tracer = trace.get_tracer(__name__)
-#
-#     @task(5)
-#     def query_top_products(self):
-#         """Query top products"""
-#         with self.tracer.start_as_current_span("graphql_top_products"):
-#             try:
-#                 self.client.post(
-#                     "/graphql",
-#                     json=GRAPHQL_QUERIES["topProducts"],
-#                     headers={"Content-Type": "application/json"}
-#                 )
-#             except Exception as e:
-#                 logging.error(f"GraphQL query failed: {e}")
-#
-#     @task(3)
-#     def query_reviews(self):
-#         """Query reviews"""
-#         with self.tracer.start_as_current_span("graphql_reviews"):
-#             try:
-#                 self.client.post(
-#                     "/graphql",
-#                     json=GRAPHQL_QUERIES["reviews"],
-#                     headers={"Content-Type": "application/json"}
-#                 )
-#             except Exception as e:
-#                 logging.error(f"GraphQL query failed: {e}")
-#
-#     @task(2)
-#     def query_inventory(self):
-#         """Query inventory"""
-#         with self.tracer.start_as_current_span("graphql_inventory"):
-#             try:
-#                 self.client.post(
-#                     "/graphql",
-#                     json=GRAPHQL_QUERIES["inventory"],
-#                     headers={"Content-Type": "application/json"}
-#                 )
-#             except Exception as e:
-#                 logging.error(f"GraphQL query failed: {e}")
+# ==================== GraphQL load user ====================
+
+
+def _env_float(name, default):
+    value = os.environ.get(name)
+    return float(value) if value else default
+
+
+def load_vegeta_payloads(directory):
+    """
+    Load the vegeta/*.json GraphQL request bodies as extra workload entries.
+
+    Returns:
+        Dict of "vegeta/<file>" -> request body (dict); empty if the directory is missing
+    """
+    payloads = {}
+    if not directory or not os.path.isdir(directory):
+        return payloads
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(directory, filename)) as f:
+                body = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.warning(f"Skipping vegeta payload {filename}: {e}")
+            continue
+        if isinstance(body, dict) and "query" in body:
+            payloads[f"vegeta/{filename}"] = body
+    return payloads
+
+
+def build_workload():
+    """
+    Build the weighted GraphQL workload from GRAPHQL_QUERIES and the vegeta payloads.
+
+    Environment variables:
+        VEGETA_PAYLOAD_DIR: Directory with vegeta/*.json bodies (default: the repository's
+            top-level vegeta/, resolved relative to this file)
+        VEGETA_PAYLOAD_WEIGHT: Weight of each vegeta payload (default: 1)
+        GRAPHQL_WEIGHTS: Optional JSON overriding weights by name, e.g.
+            {"topProducts": 10, "vegeta/large.json": 0} (0 removes an entry)
+
+    Returns:
+        (names, pre-encoded request bodies, cumulative weights)
+    """
+    # shared/website-bot/locustfile.py -> <repo>/vegeta
+    default_dir = os.path.normpath(
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "vegeta")
+    )
+    vegeta_dir = os.environ.get("VEGETA_PAYLOAD_DIR", default_dir)
+    vegeta_weight = _env_float("VEGETA_PAYLOAD_WEIGHT", 1.0)
+
+    entries = {name: (spec, spec.get("weight", 1)) for name, spec in GRAPHQL_QUERIES.items()}
+    vegeta_payloads = load_vegeta_payloads(vegeta_dir)
+    if not vegeta_payloads and vegeta_weight > 0:
+        logging.warning(
+            f"No vegeta payloads loaded from {vegeta_dir}; the workload only uses GRAPHQL_QUERIES "
+            "(set VEGETA_PAYLOAD_DIR to the repository's vegeta/ directory)"
+        )
+    for name, body in vegeta_payloads.items():
+        entries[name] = (body, vegeta_weight)
+
+    overrides = json.loads(os.environ.get("GRAPHQL_WEIGHTS") or "{}")
+    names, bodies, cum_weights = [], [], []
+    total = 0.0
+    for name, (spec, weight) in entries.items():
+        weight = float(overrides.get(name, weight))
+        if weight <= 0:
+            continue
+        body = {key: spec[key] for key in ("query", "variables", "operationName") if key in spec}
+        total += weight
+        names.append(name)
+        # Bodies are encoded once; each request only picks one
+        bodies.append(json.dumps(body).encode())
+        cum_weights.append(total)
+
+    if not names:
+        raise RuntimeError("GraphQL workload is empty (check GRAPHQL_WEIGHTS / VEGETA_PAYLOAD_DIR)")
+    return names, bodies, cum_weights
+
+
+GRAPHQL_WORKLOAD = build_workload()
+
+
+def graphql_wait_time():
+    """
+    Wait time of GraphQL users.
+
+    Environment variables:
+        GRAPHQL_RPS_PER_USER: Target requests/s per user (constant throughput, overrides the wait range)
+        GRAPHQL_WAIT_MIN / GRAPHQL_WAIT_MAX: Seconds between requests (default: 0, i.e. closed loop)
+    """
+    rps = _env_float("GRAPHQL_RPS_PER_USER", 0)
+    if rps > 0:
+        return constant_throughput(rps)
+    wait_min = _env_float("GRAPHQL_WAIT_MIN", 0)
+    wait_max = _env_float("GRAPHQL_WAIT_MAX", wait_min)
+    return between(wait_min, wait_max) if wait_max > 0 else constant(0)
+
+
+class ApolloRouterUser(FastHttpUser):
+    """
+    HTTP-based user sending a weighted mix of GraphQL operations
+    - Point GRAPHQL_HOST at the router (http://apollo-router:4000) or straight at a subgraph
+    - Pooled keep-alive connections (geventhttpclient), thousands of RPS per process
+    - Optional tracing of a sampled fraction of requests (GRAPHQL_TRACE_RATIO)
+
+    Environment variables:
+        GRAPHQL_USER_ENABLED: Run this user class (default: false; the bot targets the website)
+        GRAPHQL_HOST: Base URL of the GraphQL server (default: --host / LOCUST_HOST)
+        GRAPHQL_PATH: GraphQL endpoint path (default: /graphql)
+        GRAPHQL_USER_WEIGHT: Share of spawned users relative to browser users (default: 1)
+        GRAPHQL_TRACE_RATIO: Fraction of requests wrapped in a client span with traceparent (default: 0)
+    """
+
+    abstract = os.environ.get("GRAPHQL_USER_ENABLED", "false").lower() != "true"
+    host = os.environ.get("GRAPHQL_HOST") or None
+    weight = int(os.environ.get("GRAPHQL_USER_WEIGHT", "1"))
+    wait_time = graphql_wait_time()
+
+    # One keep-alive connection per user: requests of a user are sequential anyway
+    concurrency = 1
+    connection_timeout = 5.0
+    network_timeout = 30.0
+
+    path = os.environ.get("GRAPHQL_PATH", "/graphql")
+    trace_ratio = _env_float("GRAPHQL_TRACE_RATIO", 0.0)
+    headers = {"Content-Type": "application/json", "Accept": "application/json"}
+
+    def on_start(self):
+        self.tracer = trace.get_tracer(__name__)
+        self.rng = random.Random()
+
+    @task
+    def graphql(self):
+        """Send one operation picked from the weighted workload"""
+        names, bodies, cum_weights = GRAPHQL_WORKLOAD
+        index = self.rng.choices(range(len(names)), cum_weights=cum_weights)[0]
+        name = names[index]
+
+        if self.trace_ratio and self.rng.random() < self.trace_ratio:
+            with self.tracer.start_as_current_span(f"graphql {name}", kind=trace.SpanKind.CLIENT):
+                headers = dict(self.headers)
+                inject(headers)
+                self._post(name, bodies[index], headers)
+        else:
+            self._post(name, bodies[index], self.headers)
+
+    def _post(self, name, body, headers):
+        with self.client.post(self.path, data=body, headers=headers, name=name, catch_response=True) as response:
+            if response.status_code != 200:
+                response.failure(f"HTTP {response.status_code}")
+            elif b'"errors"' in (response.content or b""):
+                response.failure("GraphQL errors")
 
 
 class ApolloRouterBrowserUser(PlaywrightUser):
@@ -1,6 +1,6 @@
 import { useState } from 'react'
 import { useQuery } from '@apollo/client'
-import { GET_PRODUCTS } from './queries'
+import { GET_PRODUCTS, PRODUCTS_PAGE_SIZE } from './queries'
 import ProductCard from './components/ProductCard'
 import InventoryModal from './components/InventoryModal'
 import './App.css'
@@ -21,7 +21,15 @@ interface Product {
 
 function App() {
   const [selectedProduct, setSelectedProduct] = useState<Product | null>(null)
-  const { loading, error, data } = useQuery(GET_PRODUCTS)
+  const { loading, error, data, fetchMore } = useQuery(GET_PRODUCTS, {
+    variables: { first: PRODUCTS_PAGE_SIZE },
+    notifyOnNetworkStatusChange: true,
+  })
+  const products: Product[] = data?.productsConnection.edges.map((edge: { node: Product }) => edge.node) ?? []
+  const pageInfo = data?.productsConnection.pageInfo
+
+  const loadMore = () =>
+    fetchMore({ variables: { first: PRODUCTS_PAGE_SIZE, after: pageInfo?.endCursor } })
 
   return (
     <div className="app">
@@ -31,19 +39,28 @@ function App() {
       </header>
 
       <main>
-        {loading && <div className="loading">Loading products...</div>}
+        {loading && products.length === 0 && <div className="loading">Loading products...</div>}
         {error && <div className="error">Error loading products: {error.message}</div>}
 
-        {data && data.products && data.products.length > 0 ? (
-          <div className="products-grid">
-            {data.products.map((product: Product) => (
-              <ProductCard
-                key={product.id}
-                product={product}
-                onViewInventory={setSelectedProduct}
-              />
-            ))}
-          </div>
+        {products.length > 0 ? (
+          <>
+            <div className="products-grid">
+              {products.map((product: Product) => (
+                <ProductCard
+                  key={product.id}
+                  product={product}
+                  onViewInventory={setSelectedProduct}
+                />
+              ))}
+            </div>
+            {pageInfo?.hasNextPage && (
+              <div className="load-more">
+                <button className="view-inventory" onClick={loadMore} disabled={loading}>
+                  {loading ? 'Loading...' : 'Load more products'}
+                </button>
+              </div>
+            )}
+          </>
         ) : (
           !loading && <div className="empty-state">No products found</div>
         )}
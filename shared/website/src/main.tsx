@@ -1,6 +1,7 @@
 import React from 'react'
 import ReactDOM from 'react-dom/client'
 import { ApolloClient, InMemoryCache, HttpLink, ApolloProvider } from '@apollo/client'
+import { relayStylePagination } from '@apollo/client/utilities'
 import { init as initDash0 } from '@dash0/sdk-web'
 import App from './App'
 import './index.css'
@@ -37,7 +38,16 @@ const apolloClient = new ApolloClient({
     uri: graphqlUri,
     credentials: 'same-origin',
   }),
-  cache: new InMemoryCache(),
+  cache: new InMemoryCache({
+    typePolicies: {
+      Query: {
+        fields: {
+          // Append fetched pages of productsConnection instead of replacing the list
+          productsConnection: relayStylePagination(),
+        },
+      },
+    },
+  }),
 })
 
 ReactDOM.createRoot(document.getElementById('root')!).render(
@@ -1,18 +1,29 @@
 import gql from 'graphql-tag'
 
+// Products are fetched one page at a time; `after` is the previous page's endCursor
+export const PRODUCTS_PAGE_SIZE = 24
+
 export const GET_PRODUCTS = gql`
-  query GetProducts {
-    products {
-      id
-      name
-      price
-      description
-      category
-      inStock
-      inventory {
-        quantity
-        warehouse
-        estimatedDelivery
+  query GetProducts($first: Int, $after: String) {
+    productsConnection(first: $first, after: $after) {
+      edges {
+        node {
+          id
+          name
+          price
+          description
+          category
+          inStock
+          inventory {
+            quantity
+            warehouse
+            estimatedDelivery
+          }
+        }
+      }
+      pageInfo {
+        hasNextPage
+        endCursor
       }
     }
   }